@@ -14,52 +14,201 @@ Claude SEO Agent - AI驱动的SEO分析和优化助手
 """
 
 import json
+import os
 import re
+import sys
 import requests
-from typing import Dict, List, Optional, Tuple
-from dataclasses import dataclass
+from requests.adapters import HTTPAdapter
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+from dataclasses import asdict, dataclass, field
 from urllib.parse import urljoin, urlparse
 import time
-from bs4 import BeautifulSoup
-import csv
-from datetime import datetime
+from datetime import datetime, timezone
+
+from seo_assets import AssetFetcher, AssetInfo, page_assets
+from seo_cache import DEFAULT_CACHE_DIR, HttpCache, ResultMemo, RunState, code_fingerprint
+from seo_crawler import (DEFAULT_MAX_PAGE_BYTES, MAX_RETRY_AFTER, RETRY_ERRORS, RETRY_STATUSES, CrawlEngine,
+                         CrawlStats, Frontier, FrontierStats, PageDownloader, RetryPolicy, normalize_url,
+                         parse_retry_after)
+from seo_discovery import COMMON_PAGE_PATHS, DISCOVERY_DEADLINE, DiscoveryStats, PageDiscovery
+from seo_dom import PageIndex, build_page_index, decode_html, get_backend
+from seo_catalog import ISSUE_CATALOG, PAGE_RULES
+from seo_duplicates import DuplicateDetector, PageFingerprint, page_fingerprint, simhash, text_hash
+from seo_history import RunDiff, RunHistory
+from seo_links import LinkChecker
+from seo_local import CHUNK_PAGES, LocalPageResult, LocalSite, LocalSitemapReader, LocalStats
+from seo_report import CodeSolutions, Report, ReportSection, write_report
+from seo_robots import RobotsCache, RobotsRule, RobotsTxt
+from seo_rules import RuleSet, TraversalPlan, load_rule_file
+from seo_issues import IssueRecord, IssueStore, MetricStore, SEOIssue, SEOMetric
+from seo_sitemap import SitemapReader
+from seo_timing import PhaseTimings
 
 @dataclass
-class SEOIssue:
-    """SEO问题描述"""
-    category: str
-    severity: str  # critical, high, medium, low
-    title: str
-    description: str
-    recommendation: str
-    code_solution: Optional[str] = None
-    impact_score: float = 0.0
-
-@dataclass
-class SEOMetric:
-    """SEO指标"""
-    name: str
-    current_value: float
-    target_value: float
-    unit: str
-    status: str  # good, warning, critical
+class PageResult:
+    """单个页面的分析结果"""
+    url: str
+    issues: List[IssueRecord] = field(default_factory=list)  # 紧凑记录，文本在问题目录中
+    metrics: List[SEOMetric] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)  # 页面中的站内链接（绝对URL）
+    link_targets: List[str] = field(default_factory=list)  # 页面中所有http(s)链接目标，用于链接验证
+    assets: List[Tuple[str, str]] = field(default_factory=list)  # 页面引用的资源 [(绝对URL, 类型)]
+    html_bytes: int = 0
+    fingerprint: Optional[PageFingerprint] = None  # Title/描述哈希和正文SimHash，用于重复内容检测
+    ok: bool = False
+
+    def add_issue(self, key: str, **params) -> None:
+        """记录一个问题（key为问题目录中的类型，params为描述/代码方案模板的字段值）"""
+        self.issues.append(ISSUE_CATALOG.record(key, **params))
 
 class SEOOptimizerAgent:
     """Claude SEO优化Agent"""
 
-    def __init__(self, base_url: str):
+    # 规则引擎的语义变化无法从字节码和规则定义看出时（例如修改了依赖的全局常量），手动递增
+    RULESET_REVISION = 7
+
+    SEVERITY_ORDER = ['low', 'medium', 'high', 'critical']
+
+    # 交互模式中问题列表最多显示的条数，超过时按影响分显示前面的问题
+    LIST_LIMIT = 50
+    # 重复内容问题的描述中最多列出的页面数
+    DUPLICATE_URLS_SHOWN = 5
+    # 分析报告中显示请求速率的主机数
+    HOSTS_SHOWN = 5
+    # 分析报告中列出的阻止抓取URL最多的robots.txt规则数
+    ROBOTS_RULES_SHOWN = 5
+    # 检查robots.txt是否禁止抓取首页的搜索引擎爬虫（没有专门的组时使用 * 组）
+    SEARCH_ENGINE_AGENTS = ['googlebot', 'bingbot']
+    # 遵守的Crawl-delay上限（秒），过大的值会让分析无法完成
+    MAX_CRAWL_DELAY = 30.0
+
+    def __init__(self, base_url: str, max_workers: int = 8, per_host_limit: int = 2,
+                 parser_backend: Optional[str] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 session: Optional[requests.Session] = None, verbose: bool = True, log_stream=None,
+                 profile: bool = False, measure_assets: bool = False, check_links: bool = False,
+                 max_page_bytes: Optional[int] = DEFAULT_MAX_PAGE_BYTES, head_only: bool = False,
+                 record_history: bool = False, find_duplicates: bool = False,
+                 rule_files: Optional[List[str]] = None, local_dir: Optional[str] = None,
+                 local_processes: int = 0, max_per_host: Optional[int] = None, max_retries: int = 2,
+                 obey_robots: bool = True, discover_paths: Optional[List[str]] = None,
+                 discover_deadline: float = DISCOVERY_DEADLINE):
         self.base_url = base_url.rstrip('/')
         self.parsed_url = urlparse(self.base_url)
-        self.session = requests.Session()
+
+        # 进度输出，批量模式下可以关闭或输出到stderr
+        self.verbose = verbose
+        self.log_stream = log_stream
+
+        # 批量分析多个网站时可以共享同一个会话（连接池）
+        self.session = session or requests.Session()
         self.session.headers.update({
             'User-Agent': 'Claude-SEO-Agent/1.0 (SEO Analysis Bot)'
         })
 
-        # SEO分析结果
-        self.issues: List[SEOIssue] = []
-        self.metrics: List[SEOMetric] = []
+        # 并发抓取：全局并发上限 + 每个主机的自适应并发上限
+        # （从per_host_limit开始，服务器正常时逐步提高到max_per_host，默认为线程数；被限流或变慢时减半）
+        self.crawler = CrawlEngine(max_workers=max_workers, per_host_limit=per_host_limit,
+                                   max_per_host=max_workers if max_per_host is None else max_per_host)
+        # 临时性错误的重试：带抖动的指数退避，重试总量不超过首次请求的10%（另有少量初始额度）
+        self.retry_policy = RetryPolicy(max_retries)
+        if session is None:
+            adapter = HTTPAdapter(pool_connections=max_workers, pool_maxsize=max_workers)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+        # 流式下载页面正文：超过最大大小时截断；head_only时读到</head>就停止，只执行<head>检查
+        self.downloader = PageDownloader(max_page_bytes, stop_at_head=head_only)
+
+        # 页面检查：内置规则 + 自定义规则文件，编译为一次DOM遍历；head_only时只执行选择<head>标签的规则
+        self.rule_files = list(rule_files or ())
+        rules = list(PAGE_RULES)
+        for path in self.rule_files:
+            rules.extend(load_rule_file(path, ISSUE_CATALOG))
+        self.rules = RuleSet(rules, ISSUE_CATALOG, self.base_url, head_only=head_only)
+        self.page_checks = self.rules.checks
+
+        # HTML解析器后端，默认使用已安装的最快后端
+        self.parser = get_backend(parser_backend)
+
+        # 持久化HTTP缓存，重新分析时用条件请求跳过未变化页面的下载
+        self.cache_dir = cache_dir
+        self.cache = HttpCache(cache_dir) if cache_dir else None
+        # 检查结果缓存：正文未变化的页面跳过解析和检查
+        self.result_memo = ResultMemo(cache_dir) if cache_dir else None
+        self.ruleset_version = self.compute_ruleset_version()
+        # 记录上次运行时间，增量分析时只抓取网站地图中此后变化的页面
+        self.run_state = RunState(cache_dir) if cache_dir else None
+        # 运行历史：每次运行的问题和指标写入SQLite，与上次运行对比
+        self.history = RunHistory(cache_dir) if (record_history and cache_dir) else None
+        self.history_run: Optional[int] = None
+        self.history_diff: Optional[RunDiff] = None
+        self.analyzed_pages: List[str] = []  # 成功分析的页面，运行历史只对比两次都分析过的页面
+        self.pages_ok = 0  # 成功分析的页面数
+        self.pages_failed = 0  # 抓取或解析失败的页面数
+
+        # 本地构建目录模式：直接从磁盘读取HTML文件，在进程池中解析和检查（0表示CPU核心数）；
+        # robots.txt和网站地图也从目录中读取
+        self.local_site = LocalSite(local_dir, self.base_url) if local_dir else None
+        self.local_processes = local_processes
+        self.local_stats: Optional[LocalStats] = None
+
+        # 网站地图流式读取
+        self.sitemap_reader = (LocalSitemapReader(self.local_site) if self.local_site
+                               else SitemapReader(self.session))
+
+        # robots.txt：每个主机获取和编译一次；obey_robots时爬取和网站地图中被禁止的URL不抓取，
+        # 并遵守Crawl-delay（明确指定的页面仍然分析）
+        self.obey_robots = obey_robots
+        self.robots = RobotsCache(self.fetch_robots_txt, on_load=self.apply_robots_txt)
+        self.skipped_unchanged = 0
+
+        # 多页面分析时探测的常见页面：并发探测，整个探测不超过discover_deadline秒
+        self.discover_paths = list(discover_paths) if discover_paths else list(COMMON_PAGE_PATHS)
+        self.discover_deadline = discover_deadline
+        self.discovery_stats: Optional[DiscoveryStats] = None
+
+        # SEO分析结果：边产生边写入JSONL文件，内存中只保留汇总
+        self.issues = IssueStore(catalog=ISSUE_CATALOG)
+        self.metrics = MetricStore()
+        self.crawl_stats = CrawlStats()
+        self.frontier_stats: Optional[FrontierStats] = None
+        # 分阶段耗时统计，关闭时几乎没有开销
+        self.timings = PhaseTimings(enabled=profile)
+        # 页面资源测量（可选）：下载CSS/JS/字体/图片，多个页面共享的资源只下载一次
+        self.assets = (AssetFetcher(self.session, max_workers, host_limiter=self.crawler.host_limiter)
+                       if measure_assets else None)
+        # 链接有效性验证（可选）：所有页面的链接目标去重后并发验证
+        self.link_checker = (LinkChecker(self.session, max_workers, host_limiter=self.crawler.host_limiter)
+                             if check_links else None)
+        # 重复内容检测（可选）：每个页面只保存指纹，分析结束后找出重复的页面组
+        self.duplicates = DuplicateDetector() if find_duplicates else None
         self.analysis_timestamp = datetime.now()
 
+    def log(self, message: str) -> None:
+        """输出分析进度"""
+        if self.verbose:
+            print(message, file=self.log_stream)
+
+    def close(self) -> None:
+        """关闭缓存数据库"""
+        if self.cache:
+            self.cache.close()
+        if self.result_memo:
+            self.result_memo.close()
+        if self.run_state:
+            self.run_state.close()
+        if self.assets:
+            self.assets.close()
+        if self.link_checker:
+            self.link_checker.close()
+        if self.history:
+            self.history.close()
+        self.issues.close()
+        self.metrics.close()
+
     def print_header(self):
         """打印Agent头部信息"""
         print("=" * 80)
@@ -96,414 +245,599 @@ class SEOOptimizerAgent:
             except ValueError:
                 print("⚠️  请输入数字")
 
-    def analyze_page(self, url: str) -> Optional[BeautifulSoup]:
-        """分析单个页面"""
-        try:
-            print(f"🔍 正在分析: {url}")
-            response = self.session.get(url, timeout=10)
-            response.raise_for_status()
+    def fetch_page(self, url: str) -> Tuple[bytes, Optional[str]]:
+        """下载页面，返回 (正文, 响应头声明的编码)；有缓存时先发送条件请求"""
+        entry = self.cache.get(url) if self.cache else None
+        headers = self.cache.conditional_headers(entry) if self.cache else {}
 
-            soup = BeautifulSoup(response.content, 'html.parser')
-            print(f"✅ 页面分析完成: {url}")
-            return soup
+        # 临时性错误（连接失败、超时、429/502/503/504）按带抖动的指数退避重试
+        self.retry_policy.record_request()
+        attempt = 0
+        while True:
+            try:
+                response, body, complete, retry_after = self.request_page(url, headers)
+                error = None
+            except RETRY_ERRORS as e:
+                response, retry_after, error = None, None, e
+            if response is not None and response.status_code not in RETRY_STATUSES:
+                break
+            # Retry-After由并发控制暂停该主机的所有请求，这里只等待抖动的退避时间
+            delay = self.retry_policy.delay(attempt)
+            if not self.should_retry(url, attempt, max(delay, retry_after or 0.0), retry_after):
+                if error is not None:
+                    raise error
+                break
+            reason = type(error).__name__ if error is not None else f"HTTP {response.status_code}"
+            self.log(f"🔁 {reason}，{delay:.1f} 秒后第 {attempt + 1} 次重试: {url}")
+            time.sleep(delay)
+            attempt += 1
+        if attempt and response.ok:
+            self.retry_policy.record_recovered()
+
+        if entry and response.status_code == 304:
+            self.cache.record_hit(entry)
+            return entry.body, entry.encoding
+
+        response.raise_for_status()
+
+        # 只有响应头明确声明charset时才采用，否则从页面内容判断
+        content_type = response.headers.get('Content-Type', '').lower()
+        encoding = response.encoding if 'charset=' in content_type else None
+
+        if not complete and not self.downloader.stop_at_head:
+            self.log(f"✂️  页面超过最大下载大小，只分析前 {len(body) / 1024 / 1024:.1f} MB: {url}")
+
+        # 截断或只读到</head>的正文不写入缓存，否则重新验证时会复用不完整的页面
+        if self.cache and complete:
+            self.cache.store(url, body, encoding,
+                             response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        return body, encoding
+
+    def request_page(self, url: str, headers: dict) -> Tuple[requests.Response, bytes, bool, Optional[float]]:
+        """发送一次页面请求，返回 (响应, 正文, 是否完整, Retry-After秒数)，响应反馈给该主机的并发控制"""
+        started = time.perf_counter()
+        with self.crawler.host_limiter.slot(url) as host_state:
+            acquired = time.perf_counter()
+            try:
+                with self.session.get(url, timeout=10, headers=headers, stream=True) as response:
+                    body, complete = b'', True
+                    if response.ok and response.status_code != 304:
+                        body, complete = self.downloader.read(response)
+            except RETRY_ERRORS:
+                host_state.failed()
+                raise
+            finished = time.perf_counter()
+            # response.elapsed 为发出请求到解析完响应头的时间（新连接时包含DNS和建立连接）
+            ttfb = response.elapsed.total_seconds()
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            host_state.observe(response.status_code, ttfb, retry_after)
+
+        if self.timings.enabled:
+            host = urlparse(url).netloc
+            self.timings.observe('fetch.wait', acquired - started, host)
+            self.timings.observe('fetch.ttfb', ttfb, host)
+            self.timings.observe('fetch.download', max(0.0, finished - acquired - ttfb), host)
+        return response, body, complete, retry_after
+
+    def should_retry(self, url: str, attempt: int, wait: float, retry_after: Optional[float]) -> bool:
+        """是否重试：重试次数和预算都没有用完，Retry-After不过长，且等待后不会超出时间预算"""
+        if retry_after is not None and retry_after > MAX_RETRY_AFTER:
+            return False
+        if self.crawler.deadline is not None and time.monotonic() + wait >= self.crawler.deadline:
+            return False
+        if not self.retry_policy.allow(attempt):
+            return False
+        self.crawler.host_limiter.host(url).record_retry()
+        return True
+
+    def parse_page(self, body: bytes, encoding: Optional[str], host: Optional[str] = None) -> PageIndex:
+        """解析页面正文，构建页面元素索引"""
+        with self.timings.time('parse', host):
+            return build_page_index(decode_html(body, encoding), self.parser, self.rules.plan,
+                                    body_text=self.duplicates is not None)
+
+    def analyze_page(self, url: str) -> Optional[PageIndex]:
+        """分析单个页面，返回页面元素索引"""
+        try:
+            self.log(f"🔍 正在分析: {url}")
+            body, encoding = self.fetch_page(url)
+            page = self.parse_page(body, encoding)
+            self.log(f"✅ 页面分析完成: {url}")
+            return page
 
         except Exception as e:
-            print(f"❌ 页面分析失败: {url} - {str(e)}")
+            self.log(f"❌ 页面分析失败: {url} - {str(e)}")
             return None
 
-    def check_title_tags(self, soup: BeautifulSoup, url: str) -> None:
-        """检查Title标签"""
-        title_tag = soup.find('title')
-
-        if not title_tag:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="critical",
-                title="缺少Title标签",
-                description=f"页面 {url} 没有Title标签",
-                recommendation="添加描述性的Title标签，包含主要关键词，长度控制在50-60字符",
-                code_solution='<title>页面标题 - 主要关键词</title>',
-                impact_score=10.0
-            ))
-            return
+    def check_page_weight(self, url: str, result: PageResult) -> None:
+        """测量页面实际加载的资源：总传输大小、未压缩/未设置缓存的资源和最大的资源"""
+        assets: List[AssetInfo] = [asset for asset in self.assets.fetch_all(result.assets) if asset.ok]
+        total_bytes = result.html_bytes + sum(asset.transfer_bytes for asset in assets)
+        uncompressed = [asset.url for asset in assets if asset.needs_compression]
+        uncacheable = [asset.url for asset in assets if not asset.cacheable]
+        heaviest = max(assets, key=lambda asset: asset.transfer_bytes, default=None)
+        heaviest_kb = round(heaviest.transfer_bytes / 1024, 1) if heaviest else 0.0
+        total_kb = round(total_bytes / 1024, 1)
+
+        if total_kb > 1600:
+            result.add_issue('page_too_heavy', size=total_kb, requests=len(assets) + 1)
+        if uncompressed:
+            result.add_issue('assets_uncompressed', count=len(uncompressed), urls=', '.join(uncompressed[:3]))
+        if uncacheable:
+            result.add_issue('assets_uncacheable', count=len(uncacheable), urls=', '.join(uncacheable[:3]))
+        if heaviest_kb > 300:
+            result.add_issue('asset_too_large', url=heaviest.url, size=heaviest_kb)
+
+        result.metrics += [
+            SEOMetric(name="页面总大小", current_value=total_kb, target_value=1600, unit="KB",
+                      status="good" if total_kb <= 1600 else "warning", page_url=url),
+            SEOMetric(name="页面资源请求数", current_value=len(assets) + 1, target_value=50, unit="个",
+                      status="good" if len(assets) + 1 <= 50 else "warning", page_url=url),
+            SEOMetric(name="未压缩的文本资源", current_value=len(uncompressed), target_value=0, unit="个",
+                      status="good" if not uncompressed else "warning", page_url=url),
+            SEOMetric(name="未设置缓存时间的资源", current_value=len(uncacheable), target_value=0, unit="个",
+                      status="good" if not uncacheable else "warning", page_url=url),
+            SEOMetric(name="最大资源大小", current_value=heaviest_kb, target_value=300, unit="KB",
+                      status="good" if heaviest_kb <= 300 else "warning", page_url=url),
+        ]
 
-        title_text = title_tag.get_text().strip()
-        title_length = len(title_text)
-
-        if title_length < 30:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="high",
-                title="Title标签过短",
-                description=f"Title标签 '{title_text}' 长度为 {title_length} 字符，少于推荐的30字符",
-                recommendation="增加Title标签长度，包含更多相关关键词",
-                code_solution=f'<title>{title_text} - 补充关键词</title>',
-                impact_score=5.0
-            ))
-        elif title_length > 60:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="medium",
-                title="Title标签过长",
-                description=f"Title标签长度为 {title_length} 字符，超过推荐的60字符",
-                recommendation="缩短Title标签，确保重要信息在搜索结果中完整显示",
-                code_solution=f'<title>{title_text[:57]}...</title>',
-                impact_score=3.0
-            ))
-
-        self.metrics.append(SEOMetric(
-            name="Title长度",
-            current_value=title_length,
-            target_value=50,
-            unit="字符",
-            status="good" if 30 <= title_length <= 60 else "warning"
-        ))
-
-    def check_meta_description(self, soup: BeautifulSoup, url: str) -> None:
-        """检查Meta Description"""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-
-        if not meta_desc or not meta_desc.get('content'):
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="high",
-                title="缺少Meta Description",
-                description=f"页面 {url} 没有Meta Description",
-                recommendation="添加Meta Description，长度控制在150-160字符，包含关键词和行动召唤",
-                code_solution='<meta name="description" content="页面描述，包含关键词和行动召唤">',
-                impact_score=8.0
-            ))
-            return
+    def compute_ruleset_version(self) -> str:
+        """规则集版本：由规则定义和问题类型默认严重程度/影响分的指纹，
+        以及规则引擎和页面索引构建逻辑的代码指纹得出"""
+        functions = [build_page_index, TraversalPlan._visitor, RuleSet.evaluate,
+                     page_fingerprint, text_hash, simhash]
+        return (f"r{self.RULESET_REVISION}-{code_fingerprint(*functions)}-{self.rules.digest}"
+                f"-{ISSUE_CATALOG.digest}")
+
+    def collect_page_seo(self, url: str) -> PageResult:
+        """抓取并检查单个页面，结果写入独立的PageResult（可在工作线程中调用）"""
+        started = time.perf_counter()
+        host = urlparse(url).netloc if self.timings.enabled else None
+        result = self.fetch_and_check_page(url, host)
+        # 资源测量依赖网络状态，不进入检查结果缓存，每次运行都重新测量
+        if self.assets and result.ok:
+            with self.timings.time('check_page_weight', host):
+                self.check_page_weight(url, result)
+        if self.timings.enabled:
+            self.timings.observe_page(url, time.perf_counter() - started, host)
+        return result
+
+    def fetch_and_check_page(self, url: str, host: Optional[str] = None) -> PageResult:
+        """下载页面，复用缓存的检查结果，或者解析并执行各项检查"""
+        result = PageResult(url=url)
+        memo_key = None
+        try:
+            self.log(f"🔍 正在分析: {url}")
+            body, encoding = self.fetch_page(url)
+
+            # 正文和规则集都没有变化时直接复用上次的检查结果
+            if self.result_memo:
+                memo_key = self.result_memo.make_key(url, body, self.ruleset_version)
+                cached = self.load_memo(url, memo_key)
+                if cached is not None:
+                    self.log(f"♻️  页面内容未变化，复用检查结果: {url}")
+                    cached.html_bytes = len(body)
+                    return cached
+
+            # 解析时只遍历一次DOM构建索引，各项检查只读取索引
+            page = self.parse_page(body, encoding, host)
+            self.log(f"✅ 页面分析完成: {url}")
+        except Exception as e:
+            self.log(f"❌ 页面分析失败: {url} - {str(e)}")
+            return result
+
+        result = self.check_page(url, page, host)
+        result.html_bytes = len(body)
+        if memo_key:
+            self.result_memo.put(memo_key, self.result_payload(result))
+        return result
+
+    def check_page(self, url: str, page: PageIndex, host: Optional[str] = None) -> PageResult:
+        """对已解析的页面执行各项检查，提取链接、资源和指纹"""
+        result = PageResult(url=url)
+        # 按检查分组计算规则（元素已在解析时收集）
+        for name in self.page_checks:
+            with self.timings.time(name, host):
+                self.rules.evaluate(page.matches, url, result.issues, result.metrics, name)
+        for metric in result.metrics:
+            metric.page_url = url
+        result.links = self.extract_internal_links(page, url)
+        result.link_targets = self.extract_link_targets(page, url)
+        result.assets = page_assets(page, url)
+        if self.duplicates:
+            with self.timings.time('fingerprint', host):
+                result.fingerprint = page_fingerprint(page)
+        result.ok = True
+        return result
+
+    @staticmethod
+    def result_payload(result: PageResult) -> dict:
+        """可序列化的检查结果（检查结果缓存和本地目录模式的工作进程使用）"""
+        return {
+            'issues': [ISSUE_CATALOG.to_row(record) for record in result.issues],
+            'metrics': [asdict(metric) for metric in result.metrics],
+            'links': result.links,
+            'link_targets': result.link_targets,
+            'assets': result.assets,
+            'fingerprint': result.fingerprint,
+        }
+
+    def load_memo(self, url: str, memo_key: str) -> Optional[PageResult]:
+        """读取缓存的检查结果，缓存不存在或引用了已删除的问题类型时返回None"""
+        cached = self.result_memo.get(memo_key)
+        if cached is None:
+            return None
+        return self.result_from_payload(url, cached)
 
-        desc_content = meta_desc.get('content', '').strip()
-        desc_length = len(desc_content)
-
-        if desc_length < 120:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="medium",
-                title="Meta Description过短",
-                description=f"Meta Description长度为 {desc_length} 字符，少于推荐的120字符",
-                recommendation="增加描述长度，更好地描述页面内容",
-                impact_score=3.0
-            ))
-        elif desc_length > 160:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="medium",
-                title="Meta Description过长",
-                description=f"Meta Description长度为 {desc_length} 字符，超过推荐的160字符",
-                recommendation="缩短描述，确保在搜索结果中完整显示",
-                impact_score=2.0
-            ))
-
-        self.metrics.append(SEOMetric(
-            name="Meta Description长度",
-            current_value=desc_length,
-            target_value=150,
-            unit="字符",
-            status="good" if 120 <= desc_length <= 160 else "warning"
-        ))
-
-    def check_heading_structure(self, soup: BeautifulSoup, url: str) -> None:
-        """检查标题结构"""
-        h1_tags = soup.find_all('h1')
-
-        if len(h1_tags) == 0:
-            self.issues.append(SEOIssue(
-                category="内容结构",
-                severity="high",
-                title="缺少H1标签",
-                description=f"页面 {url} 没有H1标签",
-                recommendation="添加唯一的H1标签，包含页面主关键词",
-                code_solution='<h1>页面主标题</h1>',
-                impact_score=9.0
-            ))
-        elif len(h1_tags) > 1:
-            self.issues.append(SEOIssue(
-                category="内容结构",
-                severity="medium",
-                title="多个H1标签",
-                description=f"页面有 {len(h1_tags)} 个H1标签",
-                recommendation="只保留一个H1标签，其他改为H2或H3",
-                impact_score=4.0
-            ))
-
-        # 检查标题层级结构
-        headings = []
-        for i in range(1, 7):
-            for heading in soup.find_all(f'h{i}'):
-                headings.append((i, heading.get_text().strip()))
-
-        # 检查是否有跳级
-        for i in range(1, len(headings)):
-            current_level = headings[i][0]
-            prev_level = headings[i-1][0]
-
-            if current_level > prev_level + 1:
-                self.issues.append(SEOIssue(
-                    category="内容结构",
-                    severity="low",
-                    title="标题层级跳级",
-                    description=f"H{prev_level} 后直接跳到 H{current_level}",
-                    recommendation="确保标题层级连续，不要跳级",
-                    impact_score=1.0
-                ))
-
-        self.metrics.append(SEOMetric(
-            name="H1标签数量",
-            current_value=len(h1_tags),
-            target_value=1,
-            unit="个",
-            status="good" if len(h1_tags) == 1 else "warning"
-        ))
-
-    def check_image_optimization(self, soup: BeautifulSoup, url: str) -> None:
-        """检查图片优化"""
-        images = soup.find_all('img')
-        images_without_alt = 0
-        images_missing_lazy = 0
-
-        for img in images:
-            # 检查alt属性
-            if not img.get('alt'):
-                images_without_alt += 1
-
-            # 检查lazy loading
-            if img.get('loading') != 'lazy':
-                images_missing_lazy += 1
-
-        if images_without_alt > 0:
-            self.issues.append(SEOIssue(
-                category="图片优化",
-                severity="high",
-                title=f"缺少Alt属性的图片",
-                description=f"有 {images_without_alt} 个图片缺少alt属性",
-                recommendation="为所有图片添加描述性的alt属性，包含相关关键词",
-                code_solution='<img src="image.jpg" alt="图片描述，包含关键词" loading="lazy">',
-                impact_score=6.0
-            ))
-
-        if images_missing_lazy > 0:
-            self.issues.append(SEOIssue(
-                category="图片优化",
-                severity="medium",
-                title="未使用懒加载",
-                description=f"有 {images_missing_lazy} 个图片未使用懒加载",
-                recommendation="为非首屏图片添加loading="lazy"属性",
-                code_solution='<img src="image.jpg" alt="描述" loading="lazy">',
-                impact_score=3.0
-            ))
-
-        alt_percentage = ((len(images) - images_without_alt) / len(images) * 100) if images else 0
-        self.metrics.append(SEOMetric(
-            name="图片Alt属性覆盖率",
-            current_value=alt_percentage,
-            target_value=100,
-            unit="%",
-            status="good" if alt_percentage >= 90 else "warning"
-        ))
-
-    def check_internal_links(self, soup: BeautifulSoup, url: str) -> None:
-        """检查内部链接"""
-        links = soup.find_all('a', href=True)
-        internal_links = 0
-        external_links = 0
-        links_without_text = 0
-
-        for link in links:
-            href = link.get('href', '')
-            text = link.get_text().strip()
-
-            if not text:
-                links_without_text += 1
+    def result_from_payload(self, url: str, cached: dict) -> Optional[PageResult]:
+        """从result_payload导出的数据恢复检查结果，引用了已删除的问题类型时返回None"""
+        try:
+            issues = [ISSUE_CATALOG.from_row(row) for row in cached['issues']]
+            assets = [(asset_url, kind) for asset_url, kind in cached.get('assets', [])]
+            fingerprint = PageFingerprint(*cached['fingerprint']) if cached.get('fingerprint') else None
+        except (KeyError, ValueError, TypeError):
+            return None
+        # 缓存时没有启用重复内容检测，重新解析计算指纹
+        if self.duplicates and fingerprint is None:
+            return None
+        return PageResult(
+            url=url,
+            issues=issues,
+            metrics=[SEOMetric(**metric) for metric in cached['metrics']],
+            links=cached.get('links', []),
+            link_targets=cached.get('link_targets', []),
+            assets=assets,
+            fingerprint=fingerprint,
+            ok=True
+        )
+
+    def extract_internal_links(self, page: PageIndex, url: str) -> List[str]:
+        """提取页面中的站内链接，解析为绝对URL"""
+        host = self.parsed_url.netloc.lower()
+        links = []
+        for link in page.links:
+            href = link.href.strip()
+            if not href or href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
                 continue
-
-            # 判断是否为内部链接
-            if href.startswith('/') or href.startswith(self.base_url):
-                internal_links += 1
-            elif href.startswith('http'):
-                external_links += 1
-
-        if links_without_text > 0:
-            self.issues.append(SEOIssue(
-                category="内部链接",
-                severity="medium",
-                title="空链接文本",
-                description=f"有 {links_without_text} 个链接没有描述性文本",
-                recommendation="为所有链接添加描述性文本",
-                code_solution='<a href="page.html">描述性链接文本</a>',
-                impact_score=3.0
-            ))
-
-        self.metrics.append(SEOMetric(
-            name="内部链接数量",
-            current_value=internal_links,
-            target_value=10,
-            unit="个",
-            status="good" if internal_links >= 5 else "warning"
-        ))
-
-    def check_meta_tags(self, soup: BeautifulSoup, url: str) -> None:
-        """检查其他Meta标签"""
-        essential_metas = ['viewport', 'robots', 'description']
-        missing_metas = []
-
-        for meta_name in essential_metas:
-            if not soup.find('meta', attrs={'name': meta_name}):
-                missing_metas.append(meta_name)
-
-        if missing_metas:
-            self.issues.append(SEOIssue(
-                category="Meta标签",
-                severity="high",
-                title=f"缺少重要的Meta标签",
-                description=f"缺少以下Meta标签: {', '.join(missing_metas)}",
-                recommendation="添加缺少的Meta标签",
-                code_solution='''
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<meta name="robots" content="index, follow">
-<meta name="description" content="页面描述">
-                ''',
-                impact_score=7.0
-            ))
-
-        # 检查Open Graph标签
-        og_tags = ['og:title', 'og:description', 'og:image', 'og:url']
-        missing_og = []
-
-        for og_tag in og_tags:
-            if not soup.find('meta', attrs={'property': og_tag}):
-                missing_og.append(og_tag)
-
-        if missing_og:
-            self.issues.append(SEOIssue(
-                category="社交媒体",
-                severity="medium",
-                title="缺少Open Graph标签",
-                description=f"缺少以下OG标签: {', '.join(missing_og)}",
-                recommendation="添加Open Graph标签以优化社交媒体分享效果",
-                code_solution='''
-<meta property="og:title" content="页面标题">
-<meta property="og:description" content="页面描述">
-<meta property="og:image" content="分享图片URL">
-<meta property="og:url" content="页面URL">
-                ''',
-                impact_score=4.0
-            ))
-
-    def check_performance_hints(self, soup: BeautifulSoup, url: str) -> None:
-        """检查性能相关优化"""
-        # 检查是否有CSS阻塞渲染
-        css_links = soup.find_all('link', attrs={'rel': 'stylesheet'})
-        blocking_css = sum(1 for link in css_links if not link.get('media') or 'print' not in link.get('media', ''))
-
-        if blocking_css > 2:
-            self.issues.append(SEOIssue(
-                category="性能优化",
-                severity="medium",
-                title="CSS阻塞渲染",
-                description=f"有 {blocking_css} 个CSS文件可能阻塞页面渲染",
-                recommendation="使用媒体查询或异步加载非关键CSS",
-                impact_score=3.0
-            ))
-
-        # 检查是否有内联CSS
-        inline_styles = soup.find_all('style')
-        if inline_styles:
-            self.issues.append(SEOIssue(
-                category="性能优化",
-                severity="low",
-                title="内联CSS样式",
-                description=f"页面有 {len(inline_styles)} 个内联样式",
-                recommendation="将CSS移至外部文件，减少HTML体积",
-                impact_score=1.0
-            ))
+            absolute = urljoin(url, href).split('#', 1)[0]
+            if urlparse(absolute).netloc.lower() == host:
+                links.append(absolute)
+        return links
+
+    def extract_link_targets(self, page: PageIndex, url: str) -> List[str]:
+        """页面中所有http(s)链接目标（包括站外链接），解析为绝对URL并去重"""
+        targets = {}
+        for link in page.links:
+            href = link.href.strip()
+            if not href or href.startswith(('#', 'mailto:', 'tel:', 'javascript:')):
+                continue
+            absolute = urljoin(url, href).split('#', 1)[0]
+            if urlparse(absolute).scheme in ('http', 'https'):
+                targets[absolute] = None
+        return list(targets)
+
+    def merge_page_result(self, result: PageResult) -> None:
+        """合并页面分析结果"""
+        if result.ok:
+            self.pages_ok += 1
+        else:
+            self.pages_failed += 1
+        self.issues.add_page(result.url, result.issues)
+        self.metrics.extend(result.metrics)
+        if self.link_checker and result.ok:
+            self.link_checker.add_page(result.url, result.link_targets)
+        if self.history and result.ok:
+            self.analyzed_pages.append(result.url)
+        if self.duplicates and result.fingerprint:
+            self.duplicates.add(self.issues.page_id(result.url), result.fingerprint)
+
+    def verify_links(self) -> None:
+        """等待链接验证完成，失效链接和重定向链报告到每个引用它的页面"""
+        for link, referrers in self.link_checker.results():
+            if link.broken:
+                record = ISSUE_CATALOG.record('link_broken', target=link.url, reason=link.reason)
+            elif link.redirect_chain:
+                record = ISSUE_CATALOG.record('link_redirect_chain', target=link.url,
+                                              hops=link.redirects, final=link.final_url)
+            else:
+                continue
+            for page_url in referrers:
+                self.issues.add(record, page_url)
+
+        stats = self.link_checker.stats
+        self.log(f"🔗 链接验证: {stats.targets} 个唯一链接 (共引用 {stats.references} 次), "
+                 f"失效 {stats.broken} 个, 多次重定向 {stats.redirect_chains} 个")
+
+    def find_duplicates(self) -> None:
+        """Title/描述完全相同、正文几乎相同的页面组，每组报告一个问题（归属到组内第一个页面）"""
+        keys = {'title': 'title_duplicate', 'description': 'meta_description_duplicate',
+                'content': 'content_near_duplicate'}
+        pages = self.issues.pages
+        for kind, group in self.duplicates.groups():
+            urls = [pages[page_id] for page_id in group]
+            shown = ', '.join(urls[:self.DUPLICATE_URLS_SHOWN])
+            if len(urls) > self.DUPLICATE_URLS_SHOWN:
+                shown += ' 等'
+            self.issues.add(ISSUE_CATALOG.record(keys[kind], count=len(urls), urls=shown), urls[0])
+
+        stats = self.duplicates.stats
+        self.log(f"🧬 重复内容: {stats.pages} 个页面, Title相同 {stats.title_groups} 组, "
+                 f"描述相同 {stats.description_groups} 组, 正文几乎相同 {stats.content_groups} 组")
 
     def analyze_page_seo(self, url: str) -> None:
         """分析单个页面的SEO"""
-        soup = self.analyze_page(url)
-        if not soup:
+        self.merge_page_result(self.collect_page_seo(url))
+
+    def crawl_site(self, seeds: Iterable[str], max_depth: int = 3, max_pages: int = 500) -> None:
+        """从种子页面出发，沿站内链接广度优先爬取并分析"""
+        frontier = Frontier(self.base_url, max_depth=max_depth, max_pages=max_pages,
+                            robots=self.robots_blocked if self.obey_robots else None, seeds=seeds)
+
+        # 爬取顺序本身不确定，按完成顺序处理结果，尽快把新链接加入队列
+        for url, result in self.crawler.run(frontier, self.collect_page_seo, ordered=False):
+            self.merge_page_result(result)
+            frontier.add_links(result.links, url)
+
+        self.crawl_stats = self.crawler.stats
+        self.frontier_stats = frontier.stats
+        stats = frontier.stats
+        self.log(f"⚡ 爬取完成: {self.crawl_stats.pages} 个页面, "
+                 f"耗时 {self.crawl_stats.elapsed:.1f} 秒, "
+                 f"{self.crawl_stats.pages_per_second:.2f} 页/秒")
+        self.log(f"   已访问 {stats.visited}, 已入队 {stats.queued}, 重复 {stats.deduplicated}, "
+                 f"站外/非HTML {stats.out_of_scope}, 超出深度 {stats.depth_limited}, 超出页数 {stats.page_limited}, "
+                 f"robots.txt禁止 {stats.robots_blocked}")
+
+    def analyze_pages(self, pages: Iterable[str]) -> None:
+        """并发分析多个页面，按页面顺序合并结果（与串行分析结果一致）
+
+        pages可以是流式的迭代器（例如网站地图），边读取边抓取。
+        """
+        for _, result in self.crawler.run(pages, self.collect_page_seo):
+            self.merge_page_result(result)
+
+        self.crawl_stats = self.crawler.stats
+        self.log(f"⚡ 抓取完成: {self.crawl_stats.pages} 个页面, "
+                 f"耗时 {self.crawl_stats.elapsed:.1f} 秒, "
+                 f"{self.crawl_stats.pages_per_second:.2f} 页/秒")
+
+    def analyze_local(self) -> None:
+        """分析本地构建目录中的所有HTML文件：按批在进程池中解析和检查，按文件路径顺序合并结果"""
+        processes = self.local_processes if self.local_processes > 0 else (os.cpu_count() or 1)
+        self.local_stats = LocalStats(processes=processes)
+        self.crawl_stats = CrawlStats(started_at=time.perf_counter())
+        executor = None
+        if processes > 1:
+            # 每个工作进程创建一个不使用缓存的Agent，检查结果以可序列化的格式返回
+            executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_local_worker,
+                                           initargs=(self.local_worker_options(),))
+
+        pages = self.local_site.iter_pages()
+        pending = deque()
+        exhausted = False
+        try:
+            while True:
+                # 同时在途的批次不超过进程数的两倍，按提交顺序合并
+                while not exhausted and len(pending) < processes * 2:
+                    if self.crawler.deadline is not None and time.monotonic() >= self.crawler.deadline:
+                        self.crawl_stats.truncated = True
+                        exhausted = True
+                        break
+                    chunk = list(islice(pages, CHUNK_PAGES))
+                    if not chunk:
+                        exhausted = True
+                        break
+                    pending.append(self.submit_local_chunk(chunk, executor))
+                if not pending:
+                    break
+                self.merge_local_chunk(*pending.popleft())
+        finally:
+            if executor:
+                executor.shutdown(wait=True, cancel_futures=True)
+
+        self.crawl_stats.finished_at = time.perf_counter()
+        stats = self.local_stats
+        self.log(f"⚡ 本地分析完成: {self.crawl_stats.pages} 个页面 ({stats.processes} 个进程), "
+                 f"耗时 {self.crawl_stats.elapsed:.1f} 秒, "
+                 f"{self.crawl_stats.pages_per_second:.2f} 页/秒")
+
+    def local_worker_options(self) -> dict:
+        """本地目录模式工作进程中Agent的参数（必须可以pickle）"""
+        return {
+            'base_url': self.base_url,
+            'parser_backend': self.parser.name,
+            'cache_dir': None,
+            'verbose': False,
+            'profile': self.timings.enabled,
+            'max_page_bytes': self.downloader.max_bytes,
+            'head_only': self.downloader.stop_at_head,
+            'find_duplicates': self.duplicates is not None,
+            'rule_files': self.rule_files,
+            'local_dir': self.local_site.root,
+        }
+
+    def submit_local_chunk(self, chunk: List[Tuple[str, str]],
+                           executor: Optional[ProcessPoolExecutor]) -> Tuple[list, Future]:
+        """先在当前进程中查找检查结果缓存，没有缓存的页面作为一批提交到进程池"""
+        entries = []  # (URL, 缓存键, 缓存的检查结果)
+        misses = []
+        for url, path in chunk:
+            memo_key, cached = (self.load_local_memo(url, path) if self.result_memo else (None, None))
+            entries.append((url, memo_key, cached))
+            if cached is None:
+                misses.append((url, path))
+
+        if executor and misses:
+            return entries, executor.submit(_check_local_pages, misses)
+        # 单进程时直接在当前进程中检查，耗时直接记录到self.timings
+        future = Future()
+        future.set_result((self.check_local_pages(misses), None))
+        return entries, future
+
+    def load_local_memo(self, url: str, path: str) -> Tuple[Optional[str], Optional[PageResult]]:
+        """读取本地文件计算缓存键，返回 (缓存键, 缓存的检查结果)"""
+        try:
+            with self.local_site.read(path, self.downloader.max_bytes, self.downloader.stop_at_head) as (body, _):
+                memo_key = self.result_memo.make_key(url, body, self.ruleset_version)
+                size = len(body)
+        except OSError:
+            # 由检查页面时报告读取失败
+            return None, None
+        cached = self.load_memo(url, memo_key)
+        if cached is not None:
+            cached.html_bytes = size
+        return memo_key, cached
+
+    def check_local_pages(self, pages: List[Tuple[str, str]]) -> List[LocalPageResult]:
+        """读取并检查一批本地页面（在工作进程或单进程模式的当前进程中执行）"""
+        results = []
+        for url, path in pages:
+            started = time.perf_counter()
+            host = urlparse(url).netloc if self.timings.enabled else None
+            try:
+                with self.local_site.read(path, self.downloader.max_bytes,
+                                          self.downloader.stop_at_head) as (body, stopped):
+                    size = len(body)
+                    page = self.parse_page(body, None, host)
+            except Exception as e:
+                results.append(LocalPageResult(None, error=str(e)))
+                continue
+            result = self.check_page(url, page, host)
+            results.append(LocalPageResult(self.result_payload(result), size, stopped))
+            if self.timings.enabled:
+                self.timings.observe_page(url, time.perf_counter() - started, host)
+        return results
+
+    def merge_local_chunk(self, entries: list, future: Future) -> None:
+        """等待一批本地页面检查完成，按文件顺序合并结果"""
+        checked, timings = future.result()
+        if timings:
+            self.timings.merge_dict(timings)
+        checked = iter(checked)
+        for url, memo_key, result in entries:
+            if result is not None:
+                self.log(f"♻️  页面内容未变化，复用检查结果: {url}")
+            else:
+                page = next(checked)
+                self.local_stats.add(page)
+                result = self.result_from_payload(url, page.payload) if page.payload else None
+                if result is None:
+                    self.log(f"❌ 页面分析失败: {url} - {page.error}")
+                    result = PageResult(url=url)
+                else:
+                    if page.stopped == 'truncated':
+                        self.log(f"✂️  页面超过最大下载大小，只分析前 {page.size / 1024 / 1024:.1f} MB: {url}")
+                    self.log(f"✅ 页面分析完成: {url}")
+                    result.html_bytes = page.size
+                    if memo_key:
+                        self.result_memo.put(memo_key, page.payload)
+            # 资源测量依赖网络状态，与抓取模式一样不进入检查结果缓存
+            if self.assets and result.ok:
+                self.check_page_weight(url, result)
+            self.crawl_stats.pages += 1
+            self.merge_page_result(result)
+
+    def sitemap_candidates(self) -> List[str]:
+        """候选网站地图地址：robots.txt中声明的本站网站地图优先"""
+        declared = [url for url in self.robots.get(self.base_url).sitemaps
+                    if urlparse(url).netloc.lower() == self.parsed_url.netloc.lower()]
+        defaults = [f"{self.base_url}/sitemap.xml", f"{self.base_url}/sitemap_index.xml"]
+        return declared + [url for url in defaults if url not in declared]
+
+    def iter_sitemap_pages(self, since: Optional[datetime] = None) -> Iterator[str]:
+        """流式读取网站地图中的本站页面URL，since不为空时只返回此后变化的页面"""
+        sitemap_url = self.sitemap_reader.found_url or self.sitemap_reader.find(self.sitemap_candidates())
+        if not sitemap_url:
             return
 
-        # 执行各项检查
-        self.check_title_tags(soup, url)
-        self.check_meta_description(soup, url)
-        self.check_heading_structure(soup, url)
-        self.check_image_optimization(soup, url)
-        self.check_internal_links(soup, url)
-        self.check_meta_tags(soup, url)
-        self.check_performance_hints(soup, url)
+        self.log(f"🗺️  从Sitemap读取页面: {sitemap_url}")
+        for entry in self.sitemap_reader.iter_entries(sitemap_url, since):
+            if urlparse(entry.loc).netloc.lower() != self.parsed_url.netloc.lower():
+                continue
+            if self.obey_robots and self.robots_blocked(entry.loc):
+                continue
+            yield entry.loc
+
+    def iter_unique_pages(self, *sources: Iterable[str]) -> Iterator[str]:
+        """合并多个页面来源，按规范化URL去重"""
+        seen = set()
+        for source in sources:
+            for url in source:
+                key = normalize_url(url)
+                if key not in seen:
+                    seen.add(key)
+                    yield url
 
     def analyze_sitemap(self) -> None:
         """分析网站地图"""
-        sitemap_urls = [
-            f"{self.base_url}/sitemap.xml",
-            f"{self.base_url}/sitemap_index.xml"
-        ]
-
-        sitemap_found = False
-        for sitemap_url in sitemap_urls:
-            try:
-                response = self.session.get(sitemap_url, timeout=10)
-                if response.status_code == 200:
-                    sitemap_found = True
-                    print(f"✅ 找到Sitemap: {sitemap_url}")
-                    break
-            except:
-                continue
-
-        if not sitemap_found:
-            self.issues.append(SEOIssue(
-                category="技术SEO",
-                severity="medium",
-                title="缺少Sitemap",
-                description="未找到sitemap.xml文件",
-                recommendation="创建并提交sitemap.xml到搜索引擎",
-                impact_score=5.0
-            ))
+        sitemap_url = self.sitemap_reader.found_url or self.sitemap_reader.find(self.sitemap_candidates())
+
+        if sitemap_url:
+            self.log(f"✅ 找到Sitemap: {sitemap_url}")
+            if self.local_stats is not None and not self.sitemap_reader.stats.sitemaps:
+                # 本地文件读取很快：统计网站地图中在目录里找不到对应HTML文件的页面
+                for entry in self.sitemap_reader.iter_entries(sitemap_url):
+                    if self.local_site.path_for(entry.loc) is None:
+                        self.local_stats.sitemap_urls_without_file += 1
+                if self.local_stats.sitemap_urls_without_file:
+                    self.log(f"   {self.local_stats.sitemap_urls_without_file} 个页面URL在目录中没有对应的HTML文件")
+            stats = self.sitemap_reader.stats
+            if stats.sitemaps:
+                self.log(f"   读取 {stats.sitemaps} 个Sitemap文件, {stats.urls} 个页面URL, "
+                         f"{stats.unchanged} 个未变化")
+        else:
+            self.issues.add(ISSUE_CATALOG.record('sitemap_missing'))
+
+    def fetch_robots_txt(self, robots_url: str) -> Optional[str]:
+        """读取robots.txt，不存在（4xx）时返回None，服务器错误时抛出异常；本地目录模式从目录中读取"""
+        if self.local_site:
+            path = self.local_site.path_for(robots_url)
+            if path is None:
+                return None
+            with open(path, encoding='utf-8', errors='replace') as f:
+                return f.read()
+
+        response = self.session.get(robots_url, timeout=10)
+        if response.status_code >= 500:
+            response.raise_for_status()
+        return response.text if response.status_code == 200 else None
+
+    def apply_robots_txt(self, origin: str, robots: RobotsTxt) -> None:
+        """主机的robots.txt第一次加载后：记录状态，遵守其中的Crawl-delay"""
+        host = urlparse(origin).netloc
+        if robots.status == 'unreachable':
+            self.log(f"⚠️  无法访问 {origin}/robots.txt，按RFC 9309视为禁止抓取该主机的所有页面")
+        if not self.obey_robots or self.local_site:
+            return
+        delay = robots.matcher(self.robots.user_agent).crawl_delay
+        if delay:
+            delay = min(delay, self.MAX_CRAWL_DELAY)
+            self.crawler.host_limiter.host(origin).set_crawl_delay(delay)
+            self.log(f"🐢 遵守 {host} 的robots.txt Crawl-delay: 每 {delay:g} 秒一个请求")
+
+    def robots_blocked(self, url: str) -> Optional[RobotsRule]:
+        """返回禁止抓取该URL的robots.txt规则，允许时返回None"""
+        rule = self.robots.check(url)
+        if rule is not None:
+            self.log(f"🚫 robots.txt禁止抓取 ({rule}): {url}")
+        return rule
 
     def analyze_robots_txt(self) -> None:
-        """分析robots.txt"""
-        robots_url = f"{self.base_url}/robots.txt"
+        """分析robots.txt：按搜索引擎爬虫适用的组检查是否禁止抓取首页"""
+        robots = self.robots.get(self.base_url)
+        if robots.status == 'missing':
+            self.issues.add(ISSUE_CATALOG.record('robots_missing'))
+            return
+        if robots.status == 'unreachable':
+            self.issues.add(ISSUE_CATALOG.record('robots_unreachable'))
+            return
 
-        try:
-            response = self.session.get(robots_url, timeout=10)
-            if response.status_code == 200:
-                print("✅ 找到robots.txt")
-
-                # 检查是否允许搜索引擎访问
-                content = response.text.lower()
-                if 'disallow: /' in content and 'allow:' not in content:
-                    self.issues.append(SEOIssue(
-                        category="技术SEO",
-                        severity="critical",
-                        title="Robots.txt阻止所有访问",
-                        description="robots.txt可能阻止搜索引擎访问网站",
-                        recommendation="检查robots.txt配置，确保允许搜索引擎访问重要页面",
-                        impact_score=10.0
-                    ))
-            else:
-                self.issues.append(SEOIssue(
-                    category="技术SEO",
-                    severity="medium",
-                    title="缺少robots.txt",
-                    description="未找到robots.txt文件",
-                    recommendation="创建robots.txt文件，指导搜索引擎爬取",
-                    code_solution='''User-agent: *
-Allow: /
-Sitemap: https://yoursite.com/sitemap.xml''',
-                    impact_score=3.0
-                ))
-        except:
-            self.issues.append(SEOIssue(
-                category="技术SEO",
-                severity="medium",
-                title="无法访问robots.txt",
-                description="无法访问robots.txt文件",
-                recommendation="确保robots.txt文件可以正常访问",
-                impact_score=2.0
-            ))
+        self.log(f"✅ 找到robots.txt: {len(robots.groups)} 个user-agent组, {len(robots.sitemaps)} 个Sitemap声明")
+        for agent in self.SEARCH_ENGINE_AGENTS:
+            rule = robots.matcher(agent).match('/')
+            if rule is not None and not rule.allow:
+                self.issues.add(ISSUE_CATALOG.record('robots_blocks_all', rule=str(rule), agent=agent))
+                break
 
     def generate_optimization_plan(self) -> None:
         """生成优化计划"""
@@ -511,117 +845,246 @@ Sitemap: https://yoursite.com/sitemap.xml''',
         print("📋 SEO优化分析报告")
         print("="*80)
 
-        # 按严重程度排序问题
-        critical_issues = [i for i in self.issues if i.severity == 'critical']
-        high_issues = [i for i in self.issues if i.severity == 'high']
-        medium_issues = [i for i in self.issues if i.severity == 'medium']
-        low_issues = [i for i in self.issues if i.severity == 'low']
-
-        total_impact = sum(i.impact_score for i in self.issues)
+        counts = self.issues.severity_counts
 
         print(f"📊 发现问题总数: {len(self.issues)} 个")
-        print(f"🚨 严重问题: {len(critical_issues)} 个")
-        print(f"⚠️  高优先级: {len(high_issues)} 个")
-        print(f"📝 中等优先级: {len(medium_issues)} 个")
-        print(f"💡 低优先级: {len(low_issues)} 个")
-        print(f"🎯 预估SEO评分提升: +{total_impact:.1f} 分")
+        print(f"🚨 严重问题: {counts['critical']} 个")
+        print(f"⚠️  高优先级: {counts['high']} 个")
+        print(f"📝 中等优先级: {counts['medium']} 个")
+        print(f"💡 低优先级: {counts['low']} 个")
+        print(f"🎯 预估SEO评分提升: +{self.issues.total_impact:.1f} 分")
+        if self.crawl_stats.pages:
+            print(f"⚡ 抓取速度: {self.crawl_stats.pages_per_second:.2f} 页/秒 "
+                  f"({self.crawl_stats.pages} 个页面, {self.crawl_stats.elapsed:.1f} 秒)")
+        stats = self.downloader.stats
+        if stats.truncated or stats.head_only:
+            print(f"✂️  提前停止下载: 截断 {stats.truncated} 个过大页面, {stats.head_only} 个页面只读取<head>, "
+                  f"少下载约 {stats.bytes_skipped / 1024:.1f} KB, 节省约 {stats.seconds_saved:.1f} 秒")
+        if self.cache:
+            stats = self.cache.stats
+            print(f"💾 HTTP缓存: 命中 {stats.hits} 次, 未命中 {stats.misses} 次, "
+                  f"节省下载 {stats.bytes_saved / 1024:.1f} KB")
+        if self.result_memo:
+            print(f"♻️  检查结果复用: {self.result_memo.stats.hits} 个页面")
+        if self.history_diff:
+            diff = self.history_diff
+            print(f"📜 与上次运行 (#{diff.old_run}) 相比: 新增 {diff.introduced} 个问题, "
+                  f"已解决 {diff.resolved} 个问题")
+        if self.link_checker:
+            stats = self.link_checker.stats
+            print(f"🔗 链接验证: {stats.targets} 个唯一链接 (共引用 {stats.references} 次), "
+                  f"失效 {stats.broken} 个, 多次重定向 {stats.redirect_chains} 个")
+        if self.duplicates:
+            stats = self.duplicates.stats
+            print(f"🧬 重复内容: Title相同 {stats.title_groups} 组, 描述相同 {stats.description_groups} 组, "
+                  f"正文几乎相同 {stats.content_groups} 组 ({stats.pages} 个页面)")
+        if self.assets:
+            stats = self.assets.stats
+            print(f"📦 资源测量: 下载 {stats.fetched} 个资源 ({stats.transfer_bytes / 1024:.1f} KB), "
+                  f"跨页面复用 {stats.shared} 次, 失败 {stats.failed} 个")
+        for stats in self.crawler.host_limiter.stats()[:self.HOSTS_SHOWN]:
+            print(f"🚦 {stats.host}: {stats.requests} 个请求, {stats.request_rate:.1f} 请求/秒, "
+                  f"重试 {stats.retries} 次, 限流 {stats.throttled} 次, 并发上限 {stats.limit:.1f} "
+                  f"(最高 {stats.peak_limit:.1f})")
+        if self.local_stats:
+            stats = self.local_stats
+            print(f"📂 本地目录: 检查 {stats.checked} 个HTML文件 ({stats.bytes_read / 1024:.1f} KB), "
+                  f"{stats.processes} 个进程, 失败 {stats.failed} 个")
+        if self.frontier_stats:
+            stats = self.frontier_stats
+            print(f"🕸️  链接爬取: 已访问 {stats.visited}, 已入队 {stats.queued}, 去重 {stats.deduplicated}")
+        if self.robots.stats.blocked:
+            stats = self.robots.stats
+            print(f"🚫 robots.txt: 检查 {stats.checked} 个URL, 禁止抓取 {stats.blocked} 个")
+        if self.discovery_stats:
+            stats = self.discovery_stats
+            print(f"🔎 页面探测: {stats.probed} 个路径, 找到 {stats.found} 个, 软404 {stats.soft_404} 个, "
+                  f"耗时 {stats.elapsed_seconds:.1f} 秒")
+        if self.skipped_unchanged:
+            print(f"⏭️  增量分析: 跳过 {self.skipped_unchanged} 个上次运行后未变化的Sitemap条目")
 
         # 显示关键指标
         print("\n📈 关键指标:")
-        for metric in self.metrics:
-            status_icon = "✅" if metric.status == "good" else "⚠️"
-            print(f"   {status_icon} {metric.name}: {metric.current_value:.1f}{metric.unit} (目标: {metric.target_value}{metric.unit})")
+        for summary in self.metrics.summaries.values():
+            if summary.count == 1:
+                status_icon = "✅" if summary.last_status == "good" else "⚠️"
+                print(f"   {status_icon} {summary.name}: {summary.total:.1f}{summary.unit} (目标: {summary.target_value}{summary.unit})")
+            else:
+                # 多个页面的同名指标只显示汇总
+                status_icon = "✅" if summary.good == summary.count else "⚠️"
+                print(f"   {status_icon} {summary.name}: 平均 {summary.average:.1f}{summary.unit}, "
+                      f"范围 {summary.minimum:.1f}-{summary.maximum:.1f}{summary.unit} "
+                      f"(目标: {summary.target_value}{summary.unit}, 达标 {summary.good}/{summary.count})")
 
         # 显示问题详情
-        if critical_issues or high_issues:
-            print(f"\n🚨 需要优先处理的问题:")
-            for issue in critical_issues + high_issues:
+        if counts['critical'] or counts['high']:
+            print("\n🚨 需要优先处理的问题:")
+            for issue in self.iter_priority_issues():
                 print(f"\n   [{issue.severity.upper()}] {issue.title}")
                 print(f"   📝 {issue.description}")
                 print(f"   💡 建议: {issue.recommendation}")
 
+        # 问题最多的页面（索引中直接取计数）
+        page_counts = self.issues.count_by('page')
+        page_counts.pop(None, None)
+        if len(page_counts) > 1:
+            print("\n📄 问题最多的页面:")
+            for page_url, count in sorted(page_counts.items(), key=lambda item: item[1], reverse=True)[:5]:
+                print(f"   {count:>4} 个问题  {page_url}")
+
         # 显示优化建议
         if self.issues:
-            print(f"\n🎯 推荐的优化策略:")
+            print("\n🎯 推荐的优化策略:")
 
             # 根据问题类型推荐优化策略
-            categories = list(set(issue.category for issue in self.issues))
-            for category in categories:
-                category_issues = [i for i in self.issues if i.category == category]
-                print(f"\n   📂 {category} ({len(category_issues)} 个问题):")
+            for category, count in self.issues.category_counts.items():
+                print(f"\n   📂 {category} ({count} 个问题):")
+
+                for title in self.issues.category_samples[category]:  # 只显示前3个
+                    print(f"      • {title}")
 
-                for issue in category_issues[:3]:  # 只显示前3个
-                    print(f"      • {issue.title}")
+    def list_issues(self, count: int, category: Optional[str] = None) -> Iterable[SEOIssue]:
+        """交互模式中显示的问题：问题很多时只显示影响分最高的LIST_LIMIT个"""
+        if count <= self.LIST_LIMIT:
+            return self.issues.filter(category=category)
+        print(f"   (共 {count} 个问题，按影响分显示前 {self.LIST_LIMIT} 个，完整列表请保存报告)")
+        return self.issues.top(self.LIST_LIMIT, category=category)
+
+    def iter_priority_issues(self) -> Iterator[SEOIssue]:
+        """先返回严重问题，再返回高优先级问题"""
+        yield from self.issues.filter(severities=['critical'])
+        yield from self.issues.filter(severities=['high'])
 
     def generate_code_solutions(self) -> str:
         """生成代码解决方案"""
         if not self.issues:
             return "恭喜！未发现SEO问题。"
 
-        solutions = []
-        solutions.append("# SEO优化代码解决方案\n")
-        solutions.append("```html\n")
-
-        # 按类别分组生成解决方案
-        categories = {}
+        # 按类别分组生成解决方案（单次遍历，同一类别中相同的代码只输出一次）
+        solutions = CodeSolutions()
         for issue in self.issues:
-            if issue.category not in categories:
-                categories[issue.category] = []
-            categories[issue.category].append(issue)
-
-        for category, issues in categories.items():
-            solutions.append(f"\n<!-- {category} 优化 -->")
-
-            # 去重代码解决方案
-            unique_solutions = set()
-            for issue in issues:
-                if issue.code_solution and issue.code_solution not in unique_solutions:
-                    unique_solutions.add(issue.code_solution)
-                    solutions.append(f"<!-- {issue.title} -->")
-                    solutions.append(issue.code_solution)
-
-        solutions.append("\n```")
-        return "\n".join(solutions)
+            solutions.add(issue)
+        return solutions.format(self.issues.categories)
 
     def save_report(self, filename: str = None) -> None:
-        """保存分析报告"""
+        """保存分析报告，格式由扩展名确定（.md / .html / .json / .csv，默认Markdown）"""
         if not filename:
             timestamp = self.analysis_timestamp.strftime("%Y%m%d_%H%M%S")
             filename = f"seo_report_{timestamp}.md"
 
+        # 问题从问题存储中流式读取，逐批写入文件
+        count = write_report(filename, self.build_report())
+        self.log(f"\n📄 报告已保存到: {filename} ({count} 个问题)")
+
+    def build_report(self) -> Report:
+        """报告内容：汇总各节在内存中生成，问题和指标在写入时从存储中流式读取"""
+        return Report(
+            site=self.base_url,
+            analyzed_at=self.analysis_timestamp.strftime('%Y-%m-%d %H:%M:%S'),
+            highest_severity=self.highest_severity(),
+            sections=self.report_sections(),
+            issues=self.issues,
+            metrics=self.metrics,
+            categories=self.issues.categories,
+            stats=self.export_stats(),
+        )
+
+    def report_sections(self) -> List[ReportSection]:
+        """报告开头的汇总、耗时分析和运行历史对比"""
         report_content = []
-        report_content.append("# SEO分析报告\n")
-        report_content.append(f"**网站**: {self.base_url}\n")
-        report_content.append(f"**分析时间**: {self.analysis_timestamp.strftime('%Y-%m-%d %H:%M:%S')}\n")
-
-        # 问题汇总
-        critical_issues = [i for i in self.issues if i.severity == 'critical']
-        high_issues = [i for i in self.issues if i.severity == 'high']
-
-        report_content.append("## 问题汇总\n")
-        report_content.append(f"- 总问题数: {len(self.issues)}\n")
-        report_content.append(f"- 严重问题: {len(critical_issues)}\n")
-        report_content.append(f"- 高优先级: {len(high_issues)}\n")
-
-        # 详细问题列表
-        report_content.append("## 详细问题\n")
-        for i, issue in enumerate(self.issues, 1):
-            report_content.append(f"### {i}. {issue.title}\n")
-            report_content.append(f"**严重程度**: {issue.severity}\n")
-            report_content.append(f"**描述**: {issue.description}\n")
-            report_content.append(f"**建议**: {issue.recommendation}\n")
-            if issue.code_solution:
-                report_content.append(f"**代码解决方案**:\n```html\n{issue.code_solution}\n```\n")
-
-        # 添加代码解决方案
-        report_content.append("## 代码解决方案\n")
-        report_content.append(self.generate_code_solutions())
-
-        # 保存文件
-        with open(filename, 'w', encoding='utf-8') as f:
-            f.write('\n'.join(report_content))
-
-        print(f"\n📄 报告已保存到: {filename}")
+        sections = [ReportSection("问题汇总", report_content)]
+        report_content.append(f"- 总问题数: {len(self.issues)}")
+        report_content.append(f"- 严重问题: {self.issues.severity_counts['critical']}")
+        report_content.append(f"- 高优先级: {self.issues.severity_counts['high']}")
+        if self.crawl_stats.pages:
+            report_content.append(f"- 抓取页面: {self.crawl_stats.pages} 个, "
+                                  f"耗时 {self.crawl_stats.elapsed:.1f} 秒, "
+                                  f"{self.crawl_stats.pages_per_second:.2f} 页/秒")
+        stats = self.downloader.stats
+        report_content.append(f"- 页面下载: {stats.pages} 个页面, {stats.bytes_downloaded / 1024:.1f} KB")
+        if stats.truncated or stats.head_only:
+            report_content.append(f"- 提前停止下载: 截断 {stats.truncated} 个过大页面, "
+                                  f"{stats.head_only} 个页面只读取<head>, "
+                                  f"少下载约 {stats.bytes_skipped / 1024:.1f} KB, 节省约 {stats.seconds_saved:.1f} 秒")
+        if self.cache:
+            stats = self.cache.stats
+            report_content.append(f"- HTTP缓存: 命中 {stats.hits} 次, 未命中 {stats.misses} 次, "
+                                  f"命中率 {stats.hit_rate:.1f}%, 节省下载 {stats.bytes_saved / 1024:.1f} KB")
+        if self.result_memo:
+            report_content.append(f"- 检查结果复用: {self.result_memo.stats.hits} 个页面 "
+                                  f"(规则集版本 {self.ruleset_version})")
+        if self.link_checker:
+            stats = self.link_checker.stats
+            report_content.append(f"- 链接验证: {stats.targets} 个唯一链接 (共引用 {stats.references} 次), "
+                                  f"HEAD请求 {stats.head_requests} 次, GET回退 {stats.get_fallbacks} 次, "
+                                  f"失效 {stats.broken} 个, 多次重定向 {stats.redirect_chains} 个")
+        if self.duplicates:
+            stats = self.duplicates.stats
+            report_content.append(f"- 重复内容: {stats.pages} 个页面, Title相同 {stats.title_groups} 组, "
+                                  f"描述相同 {stats.description_groups} 组, "
+                                  f"正文几乎相同 {stats.content_groups} 组 (比较 {stats.comparisons} 对指纹)")
+        if self.assets:
+            stats = self.assets.stats
+            report_content.append(f"- 资源测量: 下载 {stats.fetched} 个资源 ({stats.transfer_bytes / 1024:.1f} KB), "
+                                  f"跨页面复用 {stats.shared} 次, 失败 {stats.failed} 个")
+        retries = self.retry_policy.stats
+        if retries.retries or retries.budget_exhausted:
+            report_content.append(f"- 重试: {retries.retries} 次 (重试后成功 {retries.recovered} 个), "
+                                  f"因重试预算用完放弃 {retries.budget_exhausted} 次")
+        for stats in self.crawler.host_limiter.stats()[:self.HOSTS_SHOWN]:
+            report_content.append(f"- 请求速率 {stats.host}: {stats.requests} 个请求, "
+                                  f"{stats.request_rate:.1f} 请求/秒, 重试 {stats.retries} 次, "
+                                  f"限流 {stats.throttled} 次, 连接失败 {stats.errors} 次, "
+                                  f"TTFB上升降速 {stats.slowdowns} 次, 并发上限 {stats.limit:.1f} "
+                                  f"(最高 {stats.peak_limit:.1f})")
+        if self.local_stats:
+            stats = self.local_stats
+            report_content.append(f"- 本地目录: {self.local_site.root}, 检查 {stats.checked} 个HTML文件 "
+                                  f"({stats.bytes_read / 1024:.1f} KB), {stats.processes} 个进程, "
+                                  f"失败 {stats.failed} 个, 网站地图中没有对应文件的URL "
+                                  f"{stats.sitemap_urls_without_file} 个")
+        if self.frontier_stats:
+            stats = self.frontier_stats
+            report_content.append(f"- 链接爬取: 已访问 {stats.visited}, 已入队 {stats.queued}, "
+                                  f"去重 {stats.deduplicated}, 站外/非HTML {stats.out_of_scope}, "
+                                  f"robots.txt禁止 {stats.robots_blocked}")
+        if self.robots.stats.checked:
+            stats = self.robots.stats
+            report_content.append(f"- robots.txt: {stats.hosts} 个主机, 检查 {stats.checked} 个URL, "
+                                  f"禁止抓取 {stats.blocked} 个")
+            for blocked in self.robots.blocked_rules()[:self.ROBOTS_RULES_SHOWN]:
+                report_content.append(f"  - {blocked['host']} `{blocked['rule']}`: 禁止 {blocked['blocked']} 个URL")
+        if self.discovery_stats:
+            stats = self.discovery_stats
+            report_content.append(f"- 页面探测: {stats.probed} 个路径, 找到 {stats.found} 个, "
+                                  f"不存在 {stats.not_found} 个, 软404 {stats.soft_404} 个, "
+                                  f"重定向到首页/站外 {stats.redirected_away} 个, 重复 {stats.duplicates} 个, "
+                                  f"失败 {stats.errors} 个, 超时未完成 {stats.timed_out} 个, "
+                                  f"耗时 {stats.elapsed_seconds:.1f} 秒 (最慢 {stats.slowest_seconds:.1f} 秒)")
+        if self.skipped_unchanged:
+            report_content.append(f"- 增量分析: 跳过 {self.skipped_unchanged} 个上次运行后未变化的Sitemap条目")
+
+        # 分阶段耗时、最慢页面和最慢检查
+        if self.timings.enabled and self.timings.histograms:
+            sections.append(ReportSection("耗时分析", self.timings.format_tables(self.page_checks)))
+
+        # 与上次运行对比（运行历史）
+        if self.history_diff:
+            diff = self.history_diff
+            report_content = []
+            sections.append(ReportSection("与上次运行对比", report_content))
+            report_content.append(f"- 对比运行: #{diff.old_run} → #{diff.new_run}")
+            report_content.append(f"- 新增问题: {diff.introduced}, 已解决问题: {diff.resolved}")
+            report_content.append(f"- 新增页面: {diff.pages_added}, 不再分析的页面: {diff.pages_removed}")
+            for label, found in (("新增", self.history.introduced(diff.old_run, diff.new_run, 20)),
+                                 ("已解决", self.history.resolved(diff.old_run, diff.new_run, 20))):
+                if found:
+                    report_content.extend(["", f"**{label}的问题（按影响分前20个）**:", ""])
+                for issue in found:
+                    report_content.append(f"- [{issue.severity}] {issue.title} - {issue.page_url}: "
+                                          f"{issue.description}")
+
+        return sections
 
     def interactive_optimization(self) -> None:
         """交互式优化流程"""
@@ -634,7 +1097,7 @@ Sitemap: https://yoursite.com/sitemap.xml''',
             return
 
         # 询问用户要优化的问题类型
-        categories = list(set(issue.category for issue in self.issues))
+        categories = self.issues.categories
         category_options = ["全部问题"] + categories + ["生成完整报告", "退出"]
 
         choice_idx = self.get_user_choice("请选择要优化的问题类型:", category_options)
@@ -645,22 +1108,23 @@ Sitemap: https://yoursite.com/sitemap.xml''',
             self.save_report()
             return
         elif choice_idx == 0:  # 全部问题
-            selected_issues = self.issues
+            selected_category = None
+            selected_count = len(self.issues)
         else:  # 特定类别
             selected_category = categories[choice_idx - 1]
-            selected_issues = [i for i in self.issues if i.category == selected_category]
+            selected_count = self.issues.category_counts[selected_category]
 
         # 显示选中的问题
-        print(f"\n📋 选中了 {len(selected_issues)} 个问题:")
-        for i, issue in enumerate(selected_issues, 1):
+        print(f"\n📋 选中了 {selected_count} 个问题:")
+        for i, issue in enumerate(self.list_issues(selected_count, category=selected_category), 1):
             print(f"   {i}. {issue.title} ({issue.severity})")
 
         # 确认是否生成代码解决方案
-        if self.get_user_confirmation(f"\n为这 {len(selected_issues)} 个问题生成代码解决方案?"):
+        if self.get_user_confirmation(f"\n为这 {selected_count} 个问题生成代码解决方案?"):
             print("\n💻 正在生成代码解决方案...")
 
             solutions = []
-            for issue in selected_issues:
+            for issue in self.issues.filter(category=selected_category):
                 if issue.code_solution:
                     solutions.append(f"<!-- {issue.title} -->")
                     solutions.append(issue.code_solution)
@@ -682,41 +1146,216 @@ Sitemap: https://yoursite.com/sitemap.xml''',
             else:
                 print("⚠️  选中的问题没有代码解决方案")
 
+    def discover_common_pages(self) -> Iterator[str]:
+        """并发探测常见页面，按完成顺序返回存在的页面（边探测边送入抓取队列）"""
+        paths = self.discover_paths
+        if self.obey_robots:
+            paths = [path for path in paths if not self.robots_blocked(self.base_url + path)]
+        discovery = PageDiscovery(self.session, self.base_url, self.crawler.max_workers,
+                                  host_limiter=self.crawler.host_limiter, deadline=self.discover_deadline,
+                                  timings=self.timings)
+        self.discovery_stats = discovery.stats
+        self.log(f"🔎 探测 {len(paths)} 个常见页面 (最多 {self.discover_deadline:g} 秒)")
+        for url in discovery.iter_found(paths):
+            self.log(f"   找到页面: {url}")
+            yield url
+
+        stats = discovery.stats
+        self.log(f"🔎 页面探测完成: 找到 {stats.found} 个, 不存在 {stats.not_found} 个, 软404 {stats.soft_404} 个, "
+                 f"重定向到首页/站外 {stats.redirected_away} 个, 超时未完成 {stats.timed_out} 个, "
+                 f"耗时 {stats.elapsed_seconds:.1f} 秒")
+
+    def analyze_site(self, pages: List[str] = None, discover: bool = False, use_sitemap: bool = False,
+                     incremental: bool = False, crawl: bool = False,
+                     max_depth: int = 3, max_pages: int = 500,
+                     time_budget: Optional[float] = None) -> None:
+        """非交互地运行完整分析：页面分析 + 技术SEO检查
+
+        discover: 探测常见页面；use_sitemap: 从网站地图流式读取页面；
+        incremental: 只分析网站地图中上次运行后变化的页面；crawl: 沿站内链接爬取；
+        time_budget: 页面抓取的时间预算（秒），到期后停止抓取新页面。
+        """
+        # 先加载robots.txt：网站地图声明和Crawl-delay在抓取页面之前生效
+        with self.timings.time('robots', self.parsed_url.netloc):
+            self.robots.get(self.base_url)
+
+        pages = list(pages) if pages else [self.base_url]
+
+        # 常见页面探测和网站地图都是流式的，找到的页面直接送入抓取队列
+        sources: List[Iterable[str]] = [pages]
+        if discover and not self.local_site:
+            sources.append(self.discover_common_pages())
+        if use_sitemap:
+            since = self.run_state.last_run(self.base_url) if (incremental and self.run_state) else None
+            sources.append(self.iter_sitemap_pages(since))
+
+        self.log("\n🔍 开始分析页面...")
+
+        # 并发分析所有页面（每个主机的并发数受限，避免请求过快）
+        run_started = datetime.now(timezone.utc)
+        self.crawler.deadline = time.monotonic() + time_budget if time_budget else None
+        try:
+            if self.local_site:
+                # 本地构建目录：分析目录中的所有HTML文件，不需要探测、爬取或从网站地图读取页面
+                self.analyze_local()
+            elif crawl:
+                self.crawl_site(self.iter_unique_pages(*sources), max_depth=max_depth, max_pages=max_pages)
+            else:
+                self.analyze_pages(self.iter_unique_pages(*sources))
+        finally:
+            self.crawler.deadline = None
+        if self.crawl_stats.truncated:
+            self.log(f"⏱️  超出时间预算 ({time_budget} 秒)，已停止抓取新页面")
+        elif self.run_state:
+            # 被截断的运行没有覆盖全部变化的页面，不更新上次运行时间
+            self.run_state.mark_run(self.base_url, run_started)
+        self.skipped_unchanged = self.sitemap_reader.stats.unchanged
+
+        # 链接验证在抓取页面时已经开始，这里等待剩余的验证完成
+        if self.link_checker:
+            with self.timings.time('links', self.parsed_url.netloc):
+                self.verify_links()
+
+        # 跨页面的重复内容检测，只用到每个页面的指纹
+        if self.duplicates:
+            with self.timings.time('duplicates', self.parsed_url.netloc):
+                self.find_duplicates()
+
+        error = self.analysis_error()
+        if error:
+            self.log(f"❌ {error}")
+
+        # 技术SEO检查
+        self.log("\n🔧 检查技术SEO...")
+        host = self.parsed_url.netloc
+        with self.timings.time('robots', host):
+            self.analyze_robots_txt()
+        with self.timings.time('sitemap', host):
+            self.analyze_sitemap()
+
+        if self.history:
+            with self.timings.time('history', host):
+                self.record_history(run_started)
+
+    def record_history(self, run_started: datetime) -> None:
+        """把本次运行写入运行历史，并与同一网站的上一次运行对比"""
+        self.history_run = self.history.record_run(
+            self.base_url, run_started, self.issues, self.metrics, self.analyzed_pages,
+            mode='head' if self.downloader.stop_at_head else 'full',
+            ruleset=self.ruleset_version, truncated=self.crawl_stats.truncated)
+        previous = self.history.previous_run(self.history_run)
+        if previous is not None:
+            self.history_diff = self.history.diff(previous, self.history_run)
+            self.log(f"📜 与上次运行 (#{previous}) 相比: 新增 {self.history_diff.introduced} 个问题, "
+                     f"已解决 {self.history_diff.resolved} 个问题")
+
+    def highest_severity(self) -> Optional[str]:
+        """发现的问题中最高的严重程度"""
+        found = self.issues.severity_counts
+        for severity in reversed(self.SEVERITY_ORDER):
+            if found[severity]:
+                return severity
+        return None
+
+    def analysis_error(self) -> Optional[str]:
+        """没有成功分析任何页面且网站无法访问时的错误描述，批量模式把这样的网站计为分析失败"""
+        if self.pages_ok:
+            return None
+        if self.pages_failed:
+            return f"没有成功分析任何页面 ({self.pages_failed} 个页面抓取或解析失败)"
+        if self.obey_robots and self.robots.get(self.base_url).status == 'unreachable':
+            # 爬取模式下robots.txt无法访问时禁止抓取全部页面，一个页面都不会请求
+            return "没有成功分析任何页面 (robots.txt无法访问，所有页面都禁止抓取)"
+        return None
+
+    def export_summary(self) -> dict:
+        """导出分析结果摘要（可序列化为JSON）；分析失败时包含error
+
+        不包含问题和指标：输出时从 self.issues / self.metrics 中流式读取，不在内存中生成列表。
+        """
+        summary = {
+            'site': self.base_url,
+            'analyzed_at': self.analysis_timestamp.isoformat(timespec='seconds'),
+            'highest_severity': self.highest_severity(),
+            'stats': self.export_stats(),
+        }
+        error = self.analysis_error()
+        if error:
+            summary['error'] = error
+        return summary
+
+    def export_stats(self) -> dict:
+        """运行统计（可序列化为JSON）"""
+        stats = {
+            'pages': self.crawl_stats.pages,
+            'failed_pages': self.pages_failed,
+            'elapsed_seconds': round(self.crawl_stats.elapsed, 3),
+            'pages_per_second': round(self.crawl_stats.pages_per_second, 3),
+            'truncated': self.crawl_stats.truncated,
+            'download': asdict(self.downloader.stats),
+        }
+        if self.cache:
+            stats['http_cache'] = asdict(self.cache.stats)
+        if self.result_memo:
+            stats['result_memo'] = asdict(self.result_memo.stats)
+        if self.assets:
+            stats['assets'] = asdict(self.assets.stats)
+        if self.link_checker:
+            stats['links'] = asdict(self.link_checker.stats)
+        if self.duplicates:
+            stats['duplicates'] = asdict(self.duplicates.stats)
+        if self.history_run is not None:
+            stats['history'] = {'run_id': self.history_run,
+                                **(asdict(self.history_diff) if self.history_diff else {})}
+        if self.frontier_stats:
+            stats['frontier'] = asdict(self.frontier_stats)
+        if self.local_stats:
+            stats['local'] = asdict(self.local_stats)
+        if self.discovery_stats:
+            stats['discovery'] = asdict(self.discovery_stats)
+        if self.robots.stats.checked:
+            stats['robots'] = {**asdict(self.robots.stats), 'rules': self.robots.blocked_rules()}
+        hosts = self.crawler.host_limiter.stats()
+        if hosts:
+            stats['hosts'] = [host.to_dict() for host in hosts]
+            stats['retries'] = asdict(self.retry_policy.stats)
+        if self.skipped_unchanged:
+            stats['skipped_unchanged'] = self.skipped_unchanged
+        if self.timings.enabled:
+            stats['timings'] = self.timings.to_dict()
+        return stats
+
     def run_analysis(self, pages: List[str] = None) -> None:
         """运行完整的SEO分析"""
         self.print_header()
 
-        if not pages:
-            pages = [self.base_url]
-
-        # 询问是否分析多个页面
-        if self.get_user_confirmation("是否要分析多个页面? (将分析首页和常见页面)"):
-            # 常见页面模式
-            common_patterns = [
-                "/about", "/contact", "/products", "/services",
-                "/blog", "/news", "/help", "/faq"
-            ]
-
-            for pattern in common_patterns:
-                test_url = self.base_url + pattern
-                try:
-                    response = self.session.head(test_url, timeout=5)
-                    if response.status_code == 200:
-                        pages.append(test_url)
-                except:
-                    continue
-
-        print(f"\n🔍 开始分析 {len(pages)} 个页面...")
-
-        # 分析每个页面
-        for page in pages:
-            self.analyze_page_seo(page)
-            time.sleep(1)  # 避免请求过快
-
-        # 技术SEO检查
-        print("\n🔧 检查技术SEO...")
-        self.analyze_robots_txt()
-        self.analyze_sitemap()
+        # 询问分析范围
+        discover = self.get_user_confirmation("是否要分析多个页面? (将分析首页和常见页面)")
+        use_sitemap = self.get_user_confirmation("是否从网站地图(sitemap.xml)读取页面列表?", default=False)
+        incremental = False
+        since = self.run_state.last_run(self.base_url) if self.run_state else None
+        if use_sitemap and since:
+            incremental = self.get_user_confirmation(
+                f"只分析上次运行({since.strftime('%Y-%m-%d %H:%M')} UTC)之后变化的页面?")
+        crawl = self.get_user_confirmation("是否沿站内链接爬取整个网站? (最多3层, 500个页面)", default=False)
+        self.timings.enabled = self.get_user_confirmation("是否记录各阶段耗时? (写入保存的报告)", default=False)
+        if self.assets is None and self.get_user_confirmation(
+                "是否下载页面的CSS/JS/字体/图片，测量实际页面大小?", default=False):
+            self.assets = AssetFetcher(self.session, self.crawler.max_workers,
+                                       host_limiter=self.crawler.host_limiter)
+        if self.history is None and self.cache_dir and self.get_user_confirmation(
+                "是否记录到运行历史，并与上次运行对比新增/已解决的问题?"):
+            self.history = RunHistory(self.cache_dir)
+        if self.link_checker is None and self.get_user_confirmation(
+                "是否验证所有链接是否有效? (每个唯一链接只请求一次)", default=False):
+            self.link_checker = LinkChecker(self.session, self.crawler.max_workers,
+                                            host_limiter=self.crawler.host_limiter)
+        if self.duplicates is None and self.get_user_confirmation(
+                "是否检测Title/描述相同和正文几乎相同的页面?"):
+            self.duplicates = DuplicateDetector()
+
+        self.analyze_site(pages, discover=discover, use_sitemap=use_sitemap,
+                          incremental=incremental, crawl=crawl)
 
         # 生成分析报告
         self.generate_optimization_plan()
@@ -738,7 +1377,7 @@ Sitemap: https://yoursite.com/sitemap.xml''',
 
             if choice_idx == 0:  # 查看详细问题
                 print("\n📋 详细问题列表:")
-                for i, issue in enumerate(self.issues, 1):
+                for i, issue in enumerate(self.list_issues(len(self.issues)), 1):
                     print(f"\n{i}. [{issue.severity.upper()}] {issue.title}")
                     print(f"   📝 {issue.description}")
                     print(f"   💡 {issue.recommendation}")
@@ -755,6 +1394,9 @@ Sitemap: https://yoursite.com/sitemap.xml''',
                 print("\n🔄 重新开始分析...")
                 self.issues.clear()
                 self.metrics.clear()
+                self.pages_ok = self.pages_failed = 0
+                if self.duplicates:
+                    self.duplicates = DuplicateDetector()
                 self.run_analysis(pages)
                 return
 
@@ -762,8 +1404,30 @@ Sitemap: https://yoursite.com/sitemap.xml''',
                 print("\n👋 感谢使用Claude SEO Agent!")
                 break
 
+# 本地目录模式的工作进程：每个进程在启动时创建一个Agent，之后每批页面都复用它
+_local_agent: Optional[SEOOptimizerAgent] = None
+
+
+def _init_local_worker(options: dict) -> None:
+    global _local_agent
+    _local_agent = SEOOptimizerAgent(**options)
+
+
+def _check_local_pages(pages: List[Tuple[str, str]]) -> Tuple[List[LocalPageResult], Optional[dict]]:
+    """在工作进程中检查一批本地页面，返回 (页面结果, 这一批的耗时统计)"""
+    agent = _local_agent
+    agent.timings = PhaseTimings(enabled=agent.timings.enabled)
+    results = agent.check_local_pages(pages)
+    return results, (agent.timings.to_dict() if agent.timings.enabled else None)
+
+
 def main():
     """主函数"""
+    # 带命令行参数时进入非交互的批量模式
+    if len(sys.argv) > 1:
+        from seo_cli import main as batch_main
+        sys.exit(batch_main(sys.argv[1:]))
+
     print("🤖 Claude SEO Agent - AI驱动的SEO分析和优化助手")
     print("="*80)
 
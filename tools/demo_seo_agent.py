@@ -11,7 +11,7 @@ import os
 # 添加当前目录到Python路径
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-from claude_seo_agent import SEOOptimizerAgent, SEOIssue
+from claude_seo_agent import SEOOptimizerAgent, SEOIssue, SEOMetric
 
 def demo_analysis():
     """演示SEO分析功能"""
@@ -63,15 +63,15 @@ def demo_analysis():
         ]
 
         # 添加演示问题
-        agent.issues = demo_issues
+        agent.issues.extend(demo_issues)
 
         # 添加演示指标
-        agent.metrics = [
-            agent.SEMetric("页面加载速度", 2.2, 2.0, "秒", "warning"),
-            agent.SEMetric("Meta Description长度", 145, 155, "字符", "good"),
-            agent.SEMetric("图片优化覆盖率", 75, 90, "%", "warning"),
-            agent.SEMetric("内部链接数量", 12, 10, "个", "good")
-        ]
+        agent.metrics.extend([
+            SEOMetric("页面加载速度", 2.2, 2.0, "秒", "warning"),
+            SEOMetric("Meta Description长度", 145, 155, "字符", "good"),
+            SEOMetric("图片优化覆盖率", 75, 90, "%", "warning"),
+            SEOMetric("内部链接数量", 12, 10, "个", "good")
+        ])
 
         # 生成分析报告
         agent.generate_optimization_plan()
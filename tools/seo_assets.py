@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 页面资源测量
+
+并发下载页面引用的CSS、JS、字体和图片，记录每个资源的传输大小、压缩方式、
+缓存头和响应时间。同一次运行中多个页面共享的资源只下载一次，
+样式表中引用的字体也会一起下载。
+"""
+
+import re
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from email.utils import parsedate_to_datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+
+from seo_crawler import HostLimiter, parse_retry_after
+
+# 值得压缩的文本资源类型
+TEXT_KINDS = {'css', 'js'}
+COMPRESSED_ENCODINGS = {'gzip', 'br', 'deflate', 'zstd'}
+# 小于这个大小的文本资源不压缩也无所谓
+COMPRESSION_MIN_BYTES = 1024
+# 资源正文按块读取后丢弃，只统计字节数；样式表保留前2MB用于查找引用的字体
+ASSET_CHUNK_BYTES = 64 * 1024
+MAX_CSS_BYTES = 2 * 1024 * 1024
+
+FONT_EXTENSIONS = ('.woff2', '.woff', '.ttf', '.otf', '.eot')
+_CSS_URL = re.compile(r'url\(\s*[\'"]?([^\'")]+)[\'"]?\s*\)', re.I)
+_MAX_AGE = re.compile(r'(?:s-)?max-age\s*=\s*(\d+)', re.I)
+
+
+@dataclass
+class AssetInfo:
+    """一个资源的测量结果"""
+    url: str
+    kind: str  # css, js, font, image
+    status: int = 0
+    transfer_bytes: int = 0  # 网络传输的字节数（压缩后）
+    content_type: str = ''
+    content_encoding: str = ''
+    cache_control: str = ''
+    cache_lifetime: Optional[int] = None  # 缓存时间（秒），None表示没有声明
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    font_urls: List[str] = field(default_factory=list, repr=False)  # 样式表中引用的字体
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and 200 <= self.status < 300
+
+    @property
+    def compressed(self) -> bool:
+        return self.content_encoding in COMPRESSED_ENCODINGS
+
+    @property
+    def needs_compression(self) -> bool:
+        """文本资源没有压缩"""
+        return (self.ok and self.kind in TEXT_KINDS and not self.compressed
+                and self.transfer_bytes >= COMPRESSION_MIN_BYTES)
+
+    @property
+    def cacheable(self) -> bool:
+        """声明了正的缓存时间"""
+        return bool(self.cache_lifetime)
+
+
+@dataclass
+class AssetStats:
+    """资源下载统计"""
+    requested: int = 0  # 页面引用的资源次数
+    fetched: int = 0  # 实际下载的资源数
+    shared: int = 0  # 多个页面共享、直接复用结果的次数
+    failed: int = 0
+    transfer_bytes: int = 0
+
+
+def cache_lifetime(headers) -> Optional[int]:
+    """从Cache-Control/Expires计算缓存时间（秒），no-store/no-cache为0"""
+    cache_control = headers.get('Cache-Control', '').lower()
+    if 'no-store' in cache_control or 'no-cache' in cache_control:
+        return 0
+    match = _MAX_AGE.search(cache_control)
+    if match:
+        return int(match.group(1))
+    expires = headers.get('Expires')
+    if expires:
+        try:
+            expires_at = parsedate_to_datetime(expires)
+            date = parsedate_to_datetime(headers['Date']) if headers.get('Date') else None
+        except (TypeError, ValueError, IndexError):
+            return 0
+        if date is None:
+            return max(0, int(expires_at.timestamp() - time.time()))
+        return max(0, int((expires_at - date).total_seconds()))
+    return None
+
+
+def page_assets(page, page_url: str) -> List[Tuple[str, str]]:
+    """页面引用的资源 [(绝对URL, 类型)]，按类型和文档顺序排列并去重"""
+    refs = ([(sheet.href, 'css') for sheet in page.stylesheets]
+            + [(src, 'js') for src in page.scripts]
+            + [(href, 'font') for href in page.fonts]
+            + [(image.src, 'image') for image in page.images])
+    assets = []
+    seen = set()
+    for href, kind in refs:
+        href = href.strip()
+        if not href or href.startswith(('data:', 'javascript:', '#')):
+            continue
+        url = urljoin(page_url, href).split('#', 1)[0]
+        if urlparse(url).scheme in ('http', 'https') and url not in seen:
+            seen.add(url)
+            assets.append((url, kind))
+    return assets
+
+
+class AssetFetcher:
+    """并发下载资源，同一个URL在一次运行中只下载一次"""
+
+    def __init__(self, session: requests.Session, max_workers: int = 8,
+                 host_limiter: Optional[HostLimiter] = None, timeout: int = 10):
+        self.session = session
+        self.timeout = timeout
+        self.host_limiter = host_limiter or HostLimiter(max_workers)
+        self.stats = AssetStats()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='asset')
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, url: str, kind: str) -> Future:
+        """提交资源下载，已经提交过的URL直接返回同一个Future"""
+        with self._lock:
+            self.stats.requested += 1
+            future = self._futures.get(url)
+            if future is not None:
+                self.stats.shared += 1
+                return future
+            future = self._futures[url] = self._executor.submit(self._fetch, url, kind)
+            return future
+
+    def fetch_all(self, assets: Iterable[Tuple[str, str]]) -> List[AssetInfo]:
+        """下载页面的所有资源（包括样式表中引用的字体），返回测量结果"""
+        futures = [self.submit(url, kind) for url, kind in assets]
+        results = [future.result() for future in futures]
+        seen = {info.url for info in results}
+
+        # 样式表中的字体在样式表下载完成后才知道
+        fonts = [(url, 'font') for info in results if info.kind == 'css'
+                 for url in info.font_urls if url not in seen]
+        fonts = list(dict.fromkeys(fonts))
+        return results + [self.submit(url, kind).result() for url, kind in fonts]
+
+    def _fetch(self, url: str, kind: str) -> AssetInfo:
+        info = AssetInfo(url=url, kind=kind)
+        started = time.perf_counter()
+        try:
+            with self.host_limiter.slot(url) as host_state:
+                with self.session.get(url, timeout=self.timeout, stream=True) as response:
+                    info.status = response.status_code
+                    keep = MAX_CSS_BYTES if kind == 'css' and info.ok else 0
+                    kept = []
+                    decoded_bytes = 0
+                    for chunk in response.iter_content(ASSET_CHUNK_BYTES):
+                        decoded_bytes += len(chunk)
+                        if keep > 0:
+                            kept.append(chunk[:keep])
+                            keep -= len(chunk)
+                    # raw.tell() 为从网络读取的字节数（解压之前）
+                    info.transfer_bytes = response.raw.tell() or decoded_bytes
+                    headers = response.headers
+                host_state.observe(response.status_code, response.elapsed.total_seconds(),
+                                   parse_retry_after(headers.get('Retry-After')))
+            info.content_type = headers.get('Content-Type', '').split(';', 1)[0].strip().lower()
+            info.content_encoding = headers.get('Content-Encoding', '').strip().lower()
+            info.cache_control = headers.get('Cache-Control', '')
+            info.cache_lifetime = cache_lifetime(headers)
+            if kind == 'css' and info.ok:
+                info.font_urls = [urljoin(url, ref.strip()) for ref in _CSS_URL.findall(
+                    b''.join(kept).decode('utf-8', 'replace')) if ref.lower().split('?', 1)[0].endswith(FONT_EXTENSIONS)]
+        except requests.RequestException as e:
+            info.error = str(e)
+        info.elapsed = time.perf_counter() - started
+
+        with self._lock:
+            self.stats.fetched += 1
+            self.stats.transfer_bytes += info.transfer_bytes
+            if not info.ok:
+                self.stats.failed += 1
+        return info
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 基准测试
+
+生成可复现的合成网站（页面数、页面大小、标题/图片/链接密度、网站地图大小可配置），
+由本地多线程HTTP服务器提供（可配置响应延迟），在其上运行各个场景：
+
+    parse   只解析（构建页面索引，同时按内置规则收集元素）
+    checks  每项页面检查的规则计算单独计时（页面已解析）
+    page    单个页面端到端（下载 + 解析 + 检查），依次执行
+    crawl   整站爬取（并发抓取 + 分析）
+
+输出每个场景的页面/秒、p50/p95延迟和进程峰值内存，可以保存为基线并与基线比较。
+
+用法:
+    python seo_benchmark.py run                                  # 默认参数运行所有场景
+    python seo_benchmark.py run --pages 500 --latency 0.05 -s crawl
+    python seo_benchmark.py run --save-baseline bench.json       # 保存基线
+    python seo_benchmark.py run --baseline bench.json            # 与基线比较，变慢超过容差时退出码为1
+    python seo_benchmark.py serve --port 8000                    # 只启动合成网站服务器
+    python seo_benchmark.py issues [-n 100000]                   # 每个问题占用的内存和存储字节数
+"""
+
+import argparse
+import json
+import random
+import resource
+import sys
+import threading
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import IO, Callable, Dict, Iterator, List, Optional, Tuple
+
+from seo_catalog import ISSUE_CATALOG, PAGE_RULES
+from seo_dom import available_backends, build_page_index, decode_html, get_backend
+from seo_rules import RuleSet
+from seo_issues import IssueRecord, SEOIssue
+
+SCENARIOS = ['parse', 'checks', 'page', 'crawl']
+
+
+# 合成网站
+
+@dataclass
+class SiteSpec:
+    """合成网站参数"""
+    pages: int = 200
+    page_kb: int = 20  # 每个页面的大致大小
+    headings: int = 8  # 每个页面的标题数
+    images: int = 10  # 每个页面的图片数
+    links: int = 30  # 每个页面的站内链接数
+    sitemap_urls: Optional[int] = None  # 网站地图中的URL数，默认等于页面数
+    seed: int = 42
+
+
+def page_path(index: int) -> str:
+    return '/' if index == 0 else f'/page/{index}'
+
+
+def generate_page(index: int, spec: SiteSpec, rng: random.Random) -> bytes:
+    """生成一个页面，各项检查都有一定比例会报告问题"""
+    parts = ['<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">']
+    title_length = rng.choice([8, 40, 45, 52, 75])
+    parts.append(f'<title>{("页面" + str(index) + " 合成标题 ") * 10}'[:title_length + 7] + '</title>')
+    if rng.random() < 0.7:
+        description = '这是一个用于基准测试的合成页面描述。' * rng.choice([3, 6, 9])
+        parts.append(f'<meta name="description" content="{description}">')
+    if rng.random() < 0.8:
+        parts.append('<meta name="viewport" content="width=device-width, initial-scale=1.0">')
+    if rng.random() < 0.5:
+        parts.append('<meta name="robots" content="index, follow">')
+    for prop in ('og:title', 'og:description', 'og:image', 'og:url'):
+        if rng.random() < 0.6:
+            parts.append(f'<meta property="{prop}" content="{prop} {index}">')
+    for sheet in range(rng.randint(1, 4)):
+        media = ' media="print"' if rng.random() < 0.2 else ''
+        parts.append(f'<link rel="stylesheet" href="/static/style{sheet}.css"{media}>')
+    if rng.random() < 0.3:
+        parts.append('<style>body { margin: 0; }</style>')
+    parts.append('</head>\n<body>')
+
+    h1_count = rng.choice([0, 1, 1, 1, 2])
+    for _ in range(h1_count):
+        parts.append(f'<h1>页面 {index} 主标题</h1>')
+    level = 1
+    for heading in range(spec.headings):
+        level = max(2, min(6, level + rng.choice([-1, 0, 1, 1, 2])))
+        parts.append(f'<h{level}>小节 {heading}</h{level}>')
+
+    for image in range(spec.images):
+        alt = f' alt="图片 {image}"' if rng.random() < 0.8 else ''
+        loading = ' loading="lazy"' if rng.random() < 0.6 else ''
+        parts.append(f'<img src="/img/{index}-{image}.jpg"{alt}{loading}>')
+
+    # 保证所有页面都能从首页爬取到：每个页面都链接到下一个页面
+    targets = [(index + 1) % spec.pages] + [rng.randrange(spec.pages) for _ in range(spec.links - 1)]
+    for target in targets:
+        text = f'链接到页面 {target}' if rng.random() < 0.95 else ''
+        parts.append(f'<a href="{page_path(target)}">{text}</a>')
+    parts.append('<a href="https://external.example.org/">外部链接</a>')
+
+    # 用正文段落填充到指定大小
+    body = '\n'.join(parts)
+    paragraph = '<p>' + '合成网站的正文内容，用于基准测试解析和检查的性能。' * 8 + '</p>\n'
+    filler = max(0, spec.page_kb * 1024 - len(body.encode('utf-8')))
+    repeat = filler // len(paragraph.encode('utf-8')) + 1 if filler else 0
+    return (body + '\n' + paragraph * repeat + '</body>\n</html>\n').encode('utf-8')
+
+
+def generate_sitemap(base_url: str, spec: SiteSpec) -> bytes:
+    count = spec.sitemap_urls if spec.sitemap_urls is not None else spec.pages
+    lines = ['<?xml version="1.0" encoding="UTF-8"?>',
+             '<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">']
+    for index in range(count):
+        lines.append(f'<url><loc>{base_url}{page_path(index % spec.pages)}'
+                     f'{"" if index < spec.pages else f"?v={index}"}</loc>'
+                     f'<lastmod>2024-01-01T00:00:00+00:00</lastmod></url>')
+    lines.append('</urlset>')
+    return '\n'.join(lines).encode('utf-8')
+
+
+class SyntheticSite:
+    """内存中的合成网站：路径 -> 页面内容"""
+
+    def __init__(self, spec: SiteSpec):
+        self.spec = spec
+        rng = random.Random(spec.seed)
+        self.pages: Dict[str, bytes] = {page_path(i): generate_page(i, spec, rng) for i in range(spec.pages)}
+        self.base_url = ''
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(len(body) for body in self.pages.values())
+
+    def urls(self) -> List[str]:
+        return [self.base_url + path for path in self.pages]
+
+    def files(self) -> Dict[str, Tuple[bytes, str]]:
+        """服务器提供的所有文件：路径 -> (内容, Content-Type)"""
+        files = {path: (body, 'text/html; charset=utf-8') for path, body in self.pages.items()}
+        files['/sitemap.xml'] = (generate_sitemap(self.base_url, self.spec), 'application/xml')
+        files['/robots.txt'] = (f'User-agent: *\nAllow: /\nSitemap: {self.base_url}/sitemap.xml\n'.encode(),
+                                'text/plain')
+        return files
+
+
+# 本地HTTP服务器
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # 响应头和正文分两次写出，不关闭Nagle算法时保持连接的请求会多等待一个延迟ACK
+    disable_nagle_algorithm = True
+
+    def _respond(self, send_body: bool) -> None:
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        found = server.files.get(self.path.split('?', 1)[0])
+        if found is None:
+            body, content_type, status = b'not found', 'text/plain', 404
+        else:
+            (body, content_type), status = found, 200
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if send_body:
+            self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        self._respond(True)
+
+    def do_HEAD(self) -> None:
+        self._respond(False)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+
+class _SiteHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address) -> None:
+        # 场景结束或服务器关闭时客户端断开保持的连接，不输出traceback
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+
+class SiteServer:
+    """在后台线程中用多线程HTTP服务器提供合成网站，每个请求先等待latency秒"""
+
+    def __init__(self, site: SyntheticSite, latency: float = 0.0, port: int = 0):
+        self.httpd = _SiteHTTPServer(('127.0.0.1', port), _Handler)
+        self.httpd.latency = latency
+        site.base_url = f'http://127.0.0.1:{self.httpd.server_address[1]}'
+        self.httpd.files = site.files()
+        self.base_url = site.base_url
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    def __enter__(self) -> 'SiteServer':
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+# 场景
+
+@dataclass
+class ScenarioResult:
+    """一个场景的测量结果"""
+    name: str
+    pages: int
+    seconds: float
+    latencies: List[float] = field(default_factory=list, repr=False)
+    peak_rss_mb: float = 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'pages': self.pages,
+            'seconds': round(self.seconds, 4),
+            'pages_per_second': round(self.pages_per_second, 2),
+            'p50_ms': round(percentile(self.latencies, 50) * 1000, 3),
+            'p95_ms': round(percentile(self.latencies, 95) * 1000, 3),
+            'peak_rss_mb': round(self.peak_rss_mb, 1),
+        }
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """最近秩法百分位数"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered) + 0.5) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """进程峰值内存（MB）"""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux单位为KB，macOS为字节
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def timed(name: str, items: List, run: Callable, repeat: int) -> ScenarioResult:
+    """对每个item调用run并计时，重复repeat轮"""
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(repeat):
+        for item in items:
+            begin = time.perf_counter()
+            run(item)
+            latencies.append(time.perf_counter() - begin)
+    elapsed = time.perf_counter() - started
+    return ScenarioResult(name, len(items) * repeat, elapsed, latencies, peak_rss_mb())
+
+
+def make_agent(base_url: str, args: argparse.Namespace):
+    from claude_seo_agent import SEOOptimizerAgent
+    return SEOOptimizerAgent(base_url, max_workers=args.workers, per_host_limit=args.per_host,
+                             parser_backend=args.parser, cache_dir=None, verbose=False)
+
+
+def run_parse(site: SyntheticSite, args: argparse.Namespace) -> List[ScenarioResult]:
+    """只解析：每个解析器后端分别测量（包括内置规则的元素收集）"""
+    documents = [decode_html(body, 'utf-8') for body in site.pages.values()]
+    backends = [args.parser] if args.parser else available_backends()
+    plan = RuleSet(PAGE_RULES, ISSUE_CATALOG, site.base_url or 'http://127.0.0.1').plan
+    results = []
+    for name in backends:
+        backend = get_backend(name)
+        results.append(timed(f'parse[{name}]', documents,
+                             lambda html: build_page_index(html, backend, plan), args.repeat))
+    return results
+
+
+def run_checks(site: SyntheticSite, args: argparse.Namespace) -> List[ScenarioResult]:
+    """每项页面检查的规则计算单独计时"""
+    agent = make_agent(site.base_url or 'http://127.0.0.1', args)
+    try:
+        pages = [(url, agent.parse_page(body, 'utf-8')) for url, body in zip(site.urls(), site.pages.values())]
+        results = []
+        for name in agent.page_checks:
+            results.append(timed(f'checks[{name}]', pages,
+                                 lambda item: agent.rules.evaluate(item[1].matches, item[0], [], [], name),
+                                 args.repeat))
+        return results
+    finally:
+        agent.close()
+
+
+def run_page(site: SyntheticSite, args: argparse.Namespace) -> List[ScenarioResult]:
+    """单个页面端到端（下载 + 解析 + 检查），依次执行"""
+    agent = make_agent(site.base_url, args)
+    try:
+        urls = site.urls()[:args.page_sample]
+        return [timed('page', urls, agent.collect_page_seo, args.repeat)]
+    finally:
+        agent.close()
+
+
+def run_crawl(site: SyntheticSite, args: argparse.Namespace) -> List[ScenarioResult]:
+    """整站爬取：从首页出发沿站内链接并发抓取和分析"""
+    results = []
+    for _ in range(args.repeat):
+        agent = make_agent(site.base_url, args)
+        try:
+            started = time.perf_counter()
+            agent.analyze_site(crawl=True, max_depth=args.max_depth, max_pages=site.spec.pages)
+            elapsed = time.perf_counter() - started
+            # 引擎不记录单页耗时，延迟列为每轮平均每页耗时
+            results.append(ScenarioResult('crawl', agent.crawl_stats.pages, elapsed,
+                                          [elapsed / max(1, agent.crawl_stats.pages)], peak_rss_mb()))
+        finally:
+            agent.close()
+    merged = ScenarioResult('crawl', sum(r.pages for r in results), sum(r.seconds for r in results),
+                            [latency for r in results for latency in r.latencies], peak_rss_mb())
+    return [merged]
+
+
+SCENARIO_RUNNERS = {
+    'parse': run_parse,
+    'checks': run_checks,
+    'page': run_page,
+    'crawl': run_crawl,
+}
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """生成合成网站，启动服务器，依次运行选中的场景"""
+    spec = SiteSpec(pages=args.pages, page_kb=args.page_kb, headings=args.headings, images=args.images,
+                    links=args.links, sitemap_urls=args.sitemap_urls, seed=args.seed)
+    site = SyntheticSite(spec)
+    results: Dict[str, dict] = {}
+    with SiteServer(site, latency=args.latency):
+        for scenario in args.scenarios:
+            for result in SCENARIO_RUNNERS[scenario](site, args):
+                results[result.name] = result.to_dict()
+                if not args.json:
+                    print_result(result.name, results[result.name])
+    return {
+        'spec': asdict(spec),
+        'latency': args.latency,
+        'workers': args.workers,
+        'python': sys.version.split()[0],
+        'site_mb': round(site.total_bytes / (1024 * 1024), 2),
+        'results': results,
+    }
+
+
+# 输出和基线比较
+
+def print_result(name: str, result: dict) -> None:
+    print(f"   {name:<40}{result['pages_per_second']:>12.1f}{result['p50_ms']:>10.2f}"
+          f"{result['p95_ms']:>10.2f}{result['peak_rss_mb']:>10.1f}")
+
+
+def print_header(spec: SiteSpec, args: argparse.Namespace) -> None:
+    print(f"⏱️  合成网站: {spec.pages} 个页面 × 约{spec.page_kb} KB, 延迟 {args.latency * 1000:.0f} ms, "
+          f"{args.workers} 个抓取线程, 重复 {args.repeat} 轮")
+    print(f"   {'场景':<38}{'页面/秒':>9}{'p50(ms)':>10}{'p95(ms)':>10}{'RSS(MB)':>10}")
+
+
+def compare_baseline(report: dict, baseline: dict, tolerance: float, out: Optional[IO[str]] = None) -> List[str]:
+    """与基线比较，比较表输出到out（默认stdout），返回变慢超过容差的场景"""
+    out = out or sys.stdout
+    regressions = []
+    print(f"\n📊 与基线比较 (容差 {tolerance:.0%}):", file=out)
+    for name, result in report['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if not base or not base['pages_per_second']:
+            print(f"   {name:<40} (基线中没有此场景)", file=out)
+            continue
+        change = result['pages_per_second'] / base['pages_per_second'] - 1
+        p95_change = result['p95_ms'] / base['p95_ms'] - 1 if base['p95_ms'] else 0.0
+        slower = change < -tolerance
+        if slower:
+            regressions.append(name)
+        icon = '❌' if slower else ('🚀' if change > tolerance else '✅')
+        print(f"   {icon} {name:<38}{base['pages_per_second']:>10.1f} → {result['pages_per_second']:<10.1f}"
+              f"{change:>+8.1%}  p95 {p95_change:+.1%}", file=out)
+    if report.get('spec') != baseline.get('spec') or report.get('latency') != baseline.get('latency'):
+        print("   ⚠️  合成网站参数与基线不同，结果不能直接比较", file=out)
+    return regressions
+
+
+# 问题存储
+
+# 页面检查最常报告的问题类型和参数，按页面编号生成不同的参数值
+SAMPLE_ISSUES = [
+    ('meta_description_missing', lambda i: {'url': f'https://example.com/page/{i}'}),
+    ('title_too_short', lambda i: {'title': f'Page {i}', 'length': len(f'Page {i}')}),
+    ('image_alt_missing', lambda i: {'count': i % 7 + 1}),
+    ('meta_tags_missing', lambda i: {'missing': 'robots, description'}),
+    ('og_tags_missing', lambda i: {'missing': 'og:title, og:description, og:image, og:url'}),
+    ('heading_level_skip', lambda i: {'previous': 1, 'current': 3}),
+]
+
+
+def sample_records(count: int) -> Iterator[Tuple[IssueRecord, str]]:
+    """生成 (记录, 页面URL)，每个页面报告SAMPLE_ISSUES中的所有问题"""
+    for i in range(count):
+        page = i // len(SAMPLE_ISSUES)
+        key, params = SAMPLE_ISSUES[i % len(SAMPLE_ISSUES)]
+        yield ISSUE_CATALOG.record(key, **params(page)), f'https://example.com/page/{page}'
+
+
+def measure(build: Callable[[], list]) -> Tuple[int, list]:
+    """构建对象列表，返回 (新分配的字节数, 列表)"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    items = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return after - before, items
+
+
+def bench_issues(count: int) -> dict:
+    """比较完整SEOIssue和紧凑记录的内存占用和JSONL存储大小"""
+    pairs = list(sample_records(count))
+
+    # 检查直接生成SEOIssue：类型文本共享，描述和代码方案每次重新生成
+    views, issues = measure(lambda: [ISSUE_CATALOG.render(record, url) for record, url in pairs])
+    # 从JSON读回（检查结果缓存、报告文件）：所有字符串都是独立的副本
+    lines = [json.dumps(asdict(issue), ensure_ascii=False) for issue in issues]
+    loaded, _ = measure(lambda: [SEOIssue(**json.loads(line)) for line in lines])
+    del issues
+
+    # 紧凑记录：只保存类型编号、页面编号、严重程度、影响分和参数
+    compact, records = measure(lambda: [record for record, _ in sample_records(count)])
+    rows = [json.dumps([r.type_id, r.page_id, r.severity, r.impact_score, r.params], ensure_ascii=False)
+            for r in records]
+
+    return {
+        'issues': count,
+        'memory_bytes_per_issue': {
+            'seo_issue': round(views / count, 1),
+            'seo_issue_from_json': round(loaded / count, 1),
+            'issue_record': round(compact / count, 1),
+        },
+        'jsonl_bytes_per_issue': {
+            'seo_issue': round(sum(len(line.encode()) + 1 for line in lines) / count, 1),
+            'issue_record': round(sum(len(row.encode()) + 1 for row in rows) / count, 1),
+        },
+    }
+
+
+def print_issues(result: dict) -> None:
+    memory = result['memory_bytes_per_issue']
+    jsonl = result['jsonl_bytes_per_issue']
+    print(f"📦 {result['issues']} 个问题，每个问题占用的字节数:")
+    print(f"   {'':<24}{'内存':>10}{'JSONL':>10}")
+    print(f"   {'SEOIssue':<24}{memory['seo_issue']:>10}{jsonl['seo_issue']:>10}")
+    print(f"   {'SEOIssue (从JSON读回)':<22}{memory['seo_issue_from_json']:>10}{'':>10}")
+    print(f"   {'IssueRecord':<24}{memory['issue_record']:>10}{jsonl['issue_record']:>10}")
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog='seo_benchmark.py', description='SEO Agent 基准测试')
+    parser.add_argument('--json', action='store_true', help='以JSON格式输出结果')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_site_options(command: argparse.ArgumentParser) -> None:
+        site = command.add_argument_group('合成网站')
+        site.add_argument('--pages', type=int, default=200, help='页面数 (默认: 200)')
+        site.add_argument('--page-kb', type=int, default=20, help='每个页面的大致大小，KB (默认: 20)')
+        site.add_argument('--headings', type=int, default=8, help='每个页面的标题数 (默认: 8)')
+        site.add_argument('--images', type=int, default=10, help='每个页面的图片数 (默认: 10)')
+        site.add_argument('--links', type=int, default=30, help='每个页面的站内链接数 (默认: 30)')
+        site.add_argument('--sitemap-urls', type=int, help='网站地图中的URL数 (默认: 等于页面数)')
+        site.add_argument('--seed', type=int, default=42, help='随机种子 (默认: 42)')
+        site.add_argument('--latency', type=float, default=0.0, help='服务器每个请求的延迟，秒 (默认: 0)')
+
+    run = commands.add_parser('run', help='运行基准测试场景')
+    add_site_options(run)
+    run.add_argument('-s', '--scenario', dest='scenarios', action='append', choices=SCENARIOS,
+                     help='要运行的场景，可以重复指定 (默认: 全部)')
+    run.add_argument('--repeat', type=int, default=1, help='每个场景重复的轮数 (默认: 1)')
+    run.add_argument('--workers', type=int, default=8, help='并发抓取线程数 (默认: 8)')
+    run.add_argument('--per-host', type=int, default=8, help='每个主机的并发请求数 (默认: 8)')
+    run.add_argument('--max-depth', type=int, default=10, help='整站爬取的深度上限 (默认: 10)')
+    run.add_argument('--page-sample', type=int, default=50, help='单页面场景测量的页面数 (默认: 50)')
+    run.add_argument('--parser', choices=available_backends(), help='解析器后端 (默认: parse场景测量所有后端)')
+    run.add_argument('--save-baseline', metavar='FILE', help='把结果保存为基线')
+    run.add_argument('--baseline', metavar='FILE', help='与基线比较')
+    run.add_argument('--tolerance', type=float, default=0.1, help='页面/秒下降超过此比例视为变慢 (默认: 0.1)')
+
+    serve = commands.add_parser('serve', help='只启动合成网站服务器')
+    add_site_options(serve)
+    serve.add_argument('--port', type=int, default=8000, help='端口 (默认: 8000)')
+
+    issues = commands.add_parser('issues', help='每个问题占用的内存和存储字节数')
+    issues.add_argument('-n', '--count', type=int, default=100_000, help='问题数 (默认: 100000)')
+    return parser
+
+
+def main(argv: List[str] = None) -> int:
+    args = build_arg_parser().parse_args(argv)
+
+    if args.command == 'issues':
+        result = bench_issues(args.count)
+        if args.json:
+            print(json.dumps(result, ensure_ascii=False, indent=2))
+        else:
+            print_issues(result)
+        return 0
+
+    if args.command == 'serve':
+        site = SyntheticSite(SiteSpec(pages=args.pages, page_kb=args.page_kb, headings=args.headings,
+                                      images=args.images, links=args.links, sitemap_urls=args.sitemap_urls,
+                                      seed=args.seed))
+        with SiteServer(site, latency=args.latency, port=args.port) as server:
+            print(f"🌐 合成网站: {server.base_url} ({len(site.pages)} 个页面)，按Ctrl+C停止")
+            try:
+                server.thread.join()
+            except KeyboardInterrupt:
+                pass
+        return 0
+
+    args.scenarios = args.scenarios or SCENARIOS
+    if not args.json:
+        print_header(SiteSpec(pages=args.pages, page_kb=args.page_kb), args)
+    report = run_benchmark(args)
+
+    if args.save_baseline:
+        with open(args.save_baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        if not args.json:
+            print(f"\n💾 基线已保存到: {args.save_baseline}")
+
+    regressions = []
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        # --json时stdout只输出JSON文档：比较表输出到stderr，变慢的场景写入文档
+        regressions = compare_baseline(report, baseline, args.tolerance,
+                                       out=sys.stderr if args.json else sys.stdout)
+    if args.json:
+        if args.baseline:
+            report = {**report, 'regressions': regressions}
+        print(json.dumps(report, ensure_ascii=False, indent=2))
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
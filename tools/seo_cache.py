@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 持久化HTTP缓存
+
+按规范化URL缓存响应正文、ETag、Last-Modified和内容哈希，
+重新分析时发送 If-None-Match / If-Modified-Since 条件请求，
+未变化的页面返回304即可复用缓存正文，无需重新下载。
+缓存总大小有上限，超出时按最近最少使用（LRU）淘汰。
+
+另外按“正文哈希 + 规则集版本”缓存每个页面的检查结果，
+内容未变化的页面可以完全跳过解析和检查；并记录每个网站上次运行的时间，
+供网站地图按lastmod增量分析。
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import types
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Callable, Dict, Optional
+
+from seo_crawler import normalize_url
+
+DEFAULT_CACHE_DIR = '.seo_cache'
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+
+@dataclass
+class CachedResponse:
+    """缓存的响应"""
+    url: str
+    body: bytes
+    encoding: Optional[str]
+    etag: Optional[str]
+    last_modified: Optional[str]
+    content_hash: str
+
+
+@dataclass
+class CacheStats:
+    """缓存命中统计"""
+    hits: int = 0
+    misses: int = 0
+    bytes_saved: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """命中率（%）"""
+        total = self.hits + self.misses
+        return self.hits / total * 100 if total else 0.0
+
+
+def content_hash(body: bytes) -> str:
+    """响应正文的内容哈希"""
+    return hashlib.sha256(body).hexdigest()
+
+
+class HttpCache:
+    """基于SQLite的HTTP响应缓存（线程安全）"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'http_cache.sqlite')
+        self.max_bytes = max_bytes
+        self.stats = CacheStats()
+        self._lock = threading.Lock()
+
+        # 多个进程（seo_fleet）共享缓存目录，等待写锁而不是立即失败
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS responses (
+                url TEXT PRIMARY KEY,
+                body BLOB NOT NULL,
+                encoding TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_responses_access ON responses(last_access)')
+        self._db.commit()
+        self._total_bytes = self._db.execute('SELECT COALESCE(SUM(size), 0) FROM responses').fetchone()[0]
+
+    def get(self, url: str) -> Optional[CachedResponse]:
+        """读取缓存条目"""
+        key = normalize_url(url)
+        with self._lock:
+            row = self._db.execute(
+                'SELECT body, encoding, etag, last_modified, content_hash FROM responses WHERE url = ?',
+                (key,)
+            ).fetchone()
+        if not row:
+            return None
+        return CachedResponse(key, row[0], row[1], row[2], row[3], row[4])
+
+    def conditional_headers(self, entry: Optional[CachedResponse]) -> Dict[str, str]:
+        """根据缓存条目生成条件请求头"""
+        headers = {}
+        if entry:
+            if entry.etag:
+                headers['If-None-Match'] = entry.etag
+            if entry.last_modified:
+                headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def record_hit(self, entry: CachedResponse) -> None:
+        """记录304命中，并刷新LRU访问时间"""
+        with self._lock:
+            self.stats.hits += 1
+            self.stats.bytes_saved += len(entry.body)
+            self._db.execute('UPDATE responses SET last_access = ? WHERE url = ?', (time.time(), entry.url))
+            self._db.commit()
+
+    def store(self, url: str, body: bytes, encoding: Optional[str],
+              etag: Optional[str], last_modified: Optional[str]) -> CachedResponse:
+        """记录未命中并保存新的响应"""
+        entry = CachedResponse(normalize_url(url), body, encoding, etag, last_modified, content_hash(body))
+        with self._lock:
+            self.stats.misses += 1
+            # 没有验证器的响应无法条件请求，不值得占用缓存空间
+            if not (etag or last_modified) or len(body) > self.max_bytes:
+                return entry
+
+            old = self._db.execute('SELECT size FROM responses WHERE url = ?', (entry.url,)).fetchone()
+            if old:
+                self._total_bytes -= old[0]
+            self._db.execute(
+                'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                (entry.url, body, encoding, etag, last_modified, entry.content_hash, len(body), time.time())
+            )
+            self._total_bytes += len(body)
+            self._evict()
+            self._db.commit()
+        return entry
+
+    def _evict(self) -> None:
+        """淘汰最久未使用的条目，直到总大小不超过上限（调用方持有锁）"""
+        while self._total_bytes > self.max_bytes:
+            rows = self._db.execute(
+                'SELECT url, size FROM responses ORDER BY last_access LIMIT 64'
+            ).fetchall()
+            if not rows:
+                break
+            for url, size in rows:
+                self._db.execute('DELETE FROM responses WHERE url = ?', (url,))
+                self._total_bytes -= size
+                if self._total_bytes <= self.max_bytes:
+                    break
+
+    def close(self) -> None:
+        """关闭缓存数据库"""
+        with self._lock:
+            self._db.close()
+
+
+def code_fingerprint(*functions: Callable) -> str:
+    """根据函数的字节码和常量计算指纹，检查逻辑或阈值变化时指纹随之变化"""
+    digest = hashlib.sha256()
+
+    def feed(code: types.CodeType) -> None:
+        digest.update(code.co_code)
+        digest.update(repr(code.co_names).encode())
+        for const in code.co_consts:
+            if isinstance(const, types.CodeType):
+                feed(const)
+            else:
+                digest.update(repr(const).encode())
+
+    for function in functions:
+        feed(getattr(function, '__func__', function).__code__)
+    return digest.hexdigest()[:16]
+
+
+@dataclass
+class MemoStats:
+    """检查结果缓存统计"""
+    hits: int = 0
+    misses: int = 0
+
+
+class ResultMemo:
+    """页面检查结果缓存（SQLite，线程安全）"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_entries: int = 200_000):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'result_memo.sqlite')
+        self.max_entries = max_entries
+        self.stats = MemoStats()
+        self._lock = threading.Lock()
+
+        # 多个进程（seo_fleet）共享缓存目录，等待写锁而不是立即失败
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS results (
+                key TEXT PRIMARY KEY,
+                payload TEXT NOT NULL,
+                last_access REAL NOT NULL
+            )
+        ''')
+        self._db.execute('CREATE INDEX IF NOT EXISTS idx_results_access ON results(last_access)')
+        self._db.commit()
+        self._entries = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    @staticmethod
+    def make_key(url: str, body: bytes, ruleset_version: str) -> str:
+        """缓存键：规则集版本 + 正文哈希 + 页面URL
+
+        检查结果的描述中包含页面URL，所以URL也是键的一部分。
+        """
+        return f"{ruleset_version}:{content_hash(body)}:{normalize_url(url)}"
+
+    def get(self, key: str) -> Optional[dict]:
+        """读取缓存的检查结果"""
+        with self._lock:
+            row = self._db.execute('SELECT payload FROM results WHERE key = ?', (key,)).fetchone()
+            if not row:
+                self.stats.misses += 1
+                return None
+            self.stats.hits += 1
+            self._db.execute('UPDATE results SET last_access = ? WHERE key = ?', (time.time(), key))
+            self._db.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, payload: dict) -> None:
+        """保存检查结果"""
+        data = json.dumps(payload, ensure_ascii=False)
+        with self._lock:
+            existed = self._db.execute('SELECT 1 FROM results WHERE key = ?', (key,)).fetchone()
+            self._db.execute('INSERT OR REPLACE INTO results VALUES (?, ?, ?)', (key, data, time.time()))
+            if not existed:
+                self._entries += 1
+            if self._entries > self.max_entries:
+                # 淘汰最久未使用的条目
+                overflow = self._entries - self.max_entries
+                self._db.execute(
+                    'DELETE FROM results WHERE key IN '
+                    '(SELECT key FROM results ORDER BY last_access LIMIT ?)', (overflow,)
+                )
+                self._entries -= overflow
+            self._db.commit()
+
+    def close(self) -> None:
+        """关闭缓存数据库"""
+        with self._lock:
+            self._db.close()
+
+
+class RunState:
+    """记录每个网站上次运行的时间（SQLite，线程和进程安全），用于增量分析"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'run_state.sqlite')
+        self._lock = threading.Lock()
+
+        # seo_fleet的多个进程同时记录各自网站的运行时间，每次只写一行，不会互相覆盖
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('''
+            CREATE TABLE IF NOT EXISTS runs (
+                site TEXT PRIMARY KEY,
+                started_at TEXT NOT NULL
+            )
+        ''')
+        self._db.commit()
+
+    def last_run(self, site: str) -> Optional[datetime]:
+        """网站上次运行的开始时间（UTC）"""
+        with self._lock:
+            row = self._db.execute('SELECT started_at FROM runs WHERE site = ?',
+                                   (normalize_url(site),)).fetchone()
+        return datetime.fromisoformat(row[0]) if row else None
+
+    def mark_run(self, site: str, started_at: datetime) -> None:
+        """记录本次运行的开始时间"""
+        with self._lock:
+            self._db.execute('INSERT OR REPLACE INTO runs VALUES (?, ?)',
+                             (normalize_url(site), started_at.astimezone(timezone.utc).isoformat()))
+            self._db.commit()
+
+    def close(self) -> None:
+        """关闭数据库"""
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,392 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 问题类型目录和内置页面规则
+
+各项检查可能报告的问题类型。每个类型的类别、标题、建议和代码方案只在这里定义一次，
+检查时只记录类型key和描述/代码方案模板需要的参数（见seo_issues.IssueCatalog）。
+修改这里的文本不会让检查结果缓存失效：缓存中保存的是类型key和参数，报告时才渲染文本。
+
+PAGE_RULES是内置的页面检查，由规则引擎（seo_rules）编译为一次DOM遍历执行；
+自定义规则文件使用相同的字段。修改规则会让检查结果缓存失效。
+"""
+
+from seo_issues import IssueCatalog, IssueType
+from seo_rules import Rule
+
+ISSUE_TYPES = [
+    # Title标签
+    IssueType(
+        key='title_missing',
+        category="Meta标签",
+        severity="critical",
+        title="缺少Title标签",
+        description="页面 {url} 没有Title标签",
+        recommendation="添加描述性的Title标签，包含主要关键词，长度控制在50-60字符",
+        code_solution='<title>页面标题 - 主要关键词</title>',
+        impact_score=10.0,
+    ),
+    IssueType(
+        key='title_too_short',
+        category="Meta标签",
+        severity="high",
+        title="Title标签过短",
+        description="Title标签 '{title}' 长度为 {length} 字符，少于推荐的30字符",
+        recommendation="增加Title标签长度，包含更多相关关键词",
+        code_solution='<title>{title} - 补充关键词</title>',
+        impact_score=5.0,
+    ),
+    IssueType(
+        key='title_too_long',
+        category="Meta标签",
+        severity="medium",
+        title="Title标签过长",
+        description="Title标签长度为 {length} 字符，超过推荐的60字符",
+        recommendation="缩短Title标签，确保重要信息在搜索结果中完整显示",
+        code_solution='<title>{truncated}...</title>',
+        impact_score=3.0,
+    ),
+
+    # Meta Description
+    IssueType(
+        key='meta_description_missing',
+        category="Meta标签",
+        severity="high",
+        title="缺少Meta Description",
+        description="页面 {url} 没有Meta Description",
+        recommendation="添加Meta Description，长度控制在150-160字符，包含关键词和行动召唤",
+        code_solution='<meta name="description" content="页面描述，包含关键词和行动召唤">',
+        impact_score=8.0,
+    ),
+    IssueType(
+        key='meta_description_too_short',
+        category="Meta标签",
+        severity="medium",
+        title="Meta Description过短",
+        description="Meta Description长度为 {length} 字符，少于推荐的120字符",
+        recommendation="增加描述长度，更好地描述页面内容",
+        impact_score=3.0,
+    ),
+    IssueType(
+        key='meta_description_too_long',
+        category="Meta标签",
+        severity="medium",
+        title="Meta Description过长",
+        description="Meta Description长度为 {length} 字符，超过推荐的160字符",
+        recommendation="缩短描述，确保在搜索结果中完整显示",
+        impact_score=2.0,
+    ),
+
+    # 标题结构
+    IssueType(
+        key='h1_missing',
+        category="内容结构",
+        severity="high",
+        title="缺少H1标签",
+        description="页面 {url} 没有H1标签",
+        recommendation="添加唯一的H1标签，包含页面主关键词",
+        code_solution='<h1>页面主标题</h1>',
+        impact_score=9.0,
+    ),
+    IssueType(
+        key='h1_multiple',
+        category="内容结构",
+        severity="medium",
+        title="多个H1标签",
+        description="页面有 {count} 个H1标签",
+        recommendation="只保留一个H1标签，其他改为H2或H3",
+        impact_score=4.0,
+    ),
+    IssueType(
+        key='heading_level_skip',
+        category="内容结构",
+        severity="low",
+        title="标题层级跳级",
+        description="H{previous} 后直接跳到 H{current}",
+        recommendation="确保标题层级连续，不要跳级",
+        impact_score=1.0,
+    ),
+
+    # 图片
+    IssueType(
+        key='image_alt_missing',
+        category="图片优化",
+        severity="high",
+        title="缺少Alt属性的图片",
+        description="有 {count} 个图片缺少alt属性",
+        recommendation="为所有图片添加描述性的alt属性，包含相关关键词",
+        code_solution='<img src="image.jpg" alt="图片描述，包含关键词" loading="lazy">',
+        impact_score=6.0,
+    ),
+    IssueType(
+        key='image_lazy_missing',
+        category="图片优化",
+        severity="medium",
+        title="未使用懒加载",
+        description="有 {count} 个图片未使用懒加载",
+        recommendation='为非首屏图片添加loading="lazy"属性',
+        code_solution='<img src="image.jpg" alt="描述" loading="lazy">',
+        impact_score=3.0,
+    ),
+
+    # 链接
+    IssueType(
+        key='link_text_empty',
+        category="内部链接",
+        severity="medium",
+        title="空链接文本",
+        description="有 {count} 个链接没有描述性文本",
+        recommendation="为所有链接添加描述性文本",
+        code_solution='<a href="page.html">描述性链接文本</a>',
+        impact_score=3.0,
+    ),
+
+    # 链接有效性（--check-links），每个引用页面各报告一次
+    IssueType(
+        key='link_broken',
+        category="链接有效性",
+        severity="high",
+        title="失效链接",
+        description="链接 {target} 无法访问 ({reason})",
+        recommendation="修复或移除失效链接，已移动的页面改为链接到新地址",
+        impact_score=5.0,
+    ),
+    IssueType(
+        key='link_redirect_chain',
+        category="链接有效性",
+        severity="low",
+        title="链接经过多次重定向",
+        description="链接 {target} 经过 {hops} 次重定向才到达 {final}",
+        recommendation="把链接直接改为最终地址，减少重定向带来的延迟和抓取预算浪费",
+        impact_score=1.0,
+    ),
+
+    # 重复内容（--duplicates），每组报告一次，归属到组内第一个页面
+    IssueType(
+        key='title_duplicate',
+        category="重复内容",
+        severity="medium",
+        title="多个页面使用相同的Title",
+        description="{count} 个页面的Title完全相同: {urls}",
+        recommendation="为每个页面编写独特的Title，突出页面各自的主题",
+        impact_score=4.0,
+    ),
+    IssueType(
+        key='meta_description_duplicate',
+        category="重复内容",
+        severity="low",
+        title="多个页面使用相同的Meta Description",
+        description="{count} 个页面的Meta Description完全相同: {urls}",
+        recommendation="为每个页面编写独特的描述，概括页面自身的内容",
+        impact_score=2.0,
+    ),
+    IssueType(
+        key='content_near_duplicate',
+        category="重复内容",
+        severity="high",
+        title="页面内容几乎相同",
+        description="{count} 个页面的正文几乎相同: {urls}",
+        recommendation="合并重复的页面，或者在重复页面上用canonical指向主页面，避免搜索引擎在重复页面之间分散排名",
+        code_solution='<link rel="canonical" href="主页面URL">',
+        impact_score=6.0,
+    ),
+
+    # 其他Meta标签
+    IssueType(
+        key='meta_tags_missing',
+        category="Meta标签",
+        severity="high",
+        title="缺少重要的Meta标签",
+        description="缺少以下Meta标签: {missing}",
+        recommendation="添加缺少的Meta标签",
+        code_solution='''
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<meta name="robots" content="index, follow">
+<meta name="description" content="页面描述">
+                ''',
+        impact_score=7.0,
+    ),
+    IssueType(
+        key='og_tags_missing',
+        category="社交媒体",
+        severity="medium",
+        title="缺少Open Graph标签",
+        description="缺少以下OG标签: {missing}",
+        recommendation="添加Open Graph标签以优化社交媒体分享效果",
+        code_solution='''
+<meta property="og:title" content="页面标题">
+<meta property="og:description" content="页面描述">
+<meta property="og:image" content="分享图片URL">
+<meta property="og:url" content="页面URL">
+                ''',
+        impact_score=4.0,
+    ),
+
+    # 性能
+    IssueType(
+        key='css_render_blocking',
+        category="性能优化",
+        severity="medium",
+        title="CSS阻塞渲染",
+        description="有 {count} 个CSS文件可能阻塞页面渲染",
+        recommendation="使用媒体查询或异步加载非关键CSS",
+        impact_score=3.0,
+    ),
+    IssueType(
+        key='inline_styles',
+        category="性能优化",
+        severity="low",
+        title="内联CSS样式",
+        description="页面有 {count} 个内联样式",
+        recommendation="将CSS移至外部文件，减少HTML体积",
+        impact_score=1.0,
+    ),
+
+    # 页面资源测量（--measure-assets）
+    IssueType(
+        key='page_too_heavy',
+        category="性能优化",
+        severity="high",
+        title="页面总大小过大",
+        description="页面及其资源共传输 {size} KB（{requests} 个请求），超过推荐的1600 KB",
+        recommendation="压缩图片、移除未使用的CSS/JS，按需加载非首屏资源",
+        impact_score=6.0,
+    ),
+    IssueType(
+        key='assets_uncompressed',
+        category="性能优化",
+        severity="medium",
+        title="文本资源未压缩",
+        description="有 {count} 个CSS/JS文件未使用gzip或brotli压缩: {urls}",
+        recommendation="在服务器或CDN上开启gzip/brotli压缩",
+        code_solution='''# nginx
+gzip on;
+gzip_types text/css application/javascript;''',
+        impact_score=4.0,
+    ),
+    IssueType(
+        key='assets_uncacheable',
+        category="性能优化",
+        severity="low",
+        title="资源未设置缓存时间",
+        description="有 {count} 个资源没有设置Cache-Control缓存时间: {urls}",
+        recommendation="为带版本号的静态资源设置较长的缓存时间",
+        code_solution='Cache-Control: public, max-age=31536000, immutable',
+        impact_score=2.0,
+    ),
+    IssueType(
+        key='asset_too_large',
+        category="性能优化",
+        severity="medium",
+        title="资源文件过大",
+        description="最大的资源 {url} 传输大小为 {size} KB，超过推荐的300 KB",
+        recommendation="压缩或拆分过大的资源，图片使用WebP/AVIF格式并按显示尺寸提供",
+        impact_score=3.0,
+    ),
+
+    # 技术SEO（站点级）
+    IssueType(
+        key='sitemap_missing',
+        category="技术SEO",
+        severity="medium",
+        title="缺少Sitemap",
+        description="未找到sitemap.xml文件",
+        recommendation="创建并提交sitemap.xml到搜索引擎",
+        impact_score=5.0,
+    ),
+    IssueType(
+        key='robots_blocks_all',
+        category="技术SEO",
+        severity="critical",
+        title="Robots.txt阻止所有访问",
+        description="robots.txt的规则 {rule} 禁止 {agent} 抓取网站首页",
+        recommendation="检查robots.txt配置，确保允许搜索引擎访问重要页面",
+        impact_score=10.0,
+    ),
+    IssueType(
+        key='robots_missing',
+        category="技术SEO",
+        severity="medium",
+        title="缺少robots.txt",
+        description="未找到robots.txt文件",
+        recommendation="创建robots.txt文件，指导搜索引擎爬取",
+        code_solution='''User-agent: *
+Allow: /
+Sitemap: https://yoursite.com/sitemap.xml''',
+        impact_score=3.0,
+    ),
+    IssueType(
+        key='robots_unreachable',
+        category="技术SEO",
+        severity="medium",
+        title="无法访问robots.txt",
+        description="无法访问robots.txt文件",
+        recommendation="确保robots.txt文件可以正常访问",
+        impact_score=2.0,
+    ),
+]
+
+ISSUE_CATALOG = IssueCatalog(ISSUE_TYPES)
+
+# 内置页面规则，按检查分组；同一检查内的问题按这里的顺序报告
+PAGE_RULES = [
+    # Title标签
+    Rule(check='check_title_tags', select='title', value='text.strip()',
+         key='title_missing', when='first is None'),
+    Rule(check='check_title_tags', select='title', value='text.strip()',
+         key='title_too_short', when='first is not None and len(first) < 30',
+         params={'title': 'first', 'length': 'len(first)'}),
+    Rule(check='check_title_tags', select='title', value='text.strip()',
+         key='title_too_long', when='first is not None and len(first) > 60',
+         params={'length': 'len(first)', 'truncated': 'first[:57]'}),
+    Rule(check='check_title_tags', select='title', value='text.strip()',
+         metric='Title长度', when='first is not None', current='len(first)',
+         target=50, unit='字符', good='30 <= current <= 60'),
+
+    # Meta Description（同名meta只取第一个）
+    Rule(check='check_meta_description', select='meta[name=description]', value='content',
+         key='meta_description_missing', when='not first'),
+    Rule(check='check_meta_description', select='meta[name=description]', value='content',
+         key='meta_description_too_short', when='first and len(first.strip()) < 120',
+         params={'length': 'len(first.strip())'}),
+    Rule(check='check_meta_description', select='meta[name=description]', value='content',
+         key='meta_description_too_long', when='first and len(first.strip()) > 160',
+         params={'length': 'len(first.strip())'}),
+    Rule(check='check_meta_description', select='meta[name=description]', value='content',
+         metric='Meta Description长度', when='first', current='len(first.strip())',
+         target=150, unit='字符', good='120 <= current <= 160'),
+
+    # 标题结构
+    Rule(check='check_heading_structure', select='h1', key='h1_missing', when='count == 0'),
+    Rule(check='check_heading_structure', select='h1', key='h1_multiple', when='count > 1'),
+    Rule(check='check_heading_structure', select='h1, h2, h3, h4, h5, h6', value='level',
+         key='heading_level_skip', for_each='zip(values, values[1:])', when='item[1] > item[0] + 1',
+         params={'previous': 'item[0]', 'current': 'item[1]'}),
+    Rule(check='check_heading_structure', select='h1', metric='H1标签数量',
+         target=1, unit='个', good='current == 1'),
+
+    # 图片
+    Rule(check='check_image_optimization', select='img', where='not alt', key='image_alt_missing'),
+    Rule(check='check_image_optimization', select='img', where="loading != 'lazy'", key='image_lazy_missing'),
+    Rule(check='check_image_optimization', select='img', where='not alt', metric='图片Alt属性覆盖率',
+         current='(total - count) / total * 100 if total else 0',
+         target=100, unit='%', good='current >= 90'),
+
+    # 链接（无文本的链接不计入站内链接）
+    Rule(check='check_internal_links', select='a[href]', where='not text.strip()', key='link_text_empty'),
+    Rule(check='check_internal_links', select='a[href]',
+         where="text.strip() and (href.startswith('/') or href.startswith(base_url))",
+         metric='内部链接数量', target=10, unit='个', good='current >= 5'),
+
+    # 其他Meta标签
+    Rule(check='check_meta_tags', select='meta[name]', value='name',
+         key='meta_tags_missing', when="missing(['viewport', 'robots', 'description'], values)",
+         params={'missing': "', '.join(missing(['viewport', 'robots', 'description'], values))"}),
+    Rule(check='check_meta_tags', select='meta[property]', value='property',
+         key='og_tags_missing', when="missing(['og:title', 'og:description', 'og:image', 'og:url'], values)",
+         params={'missing': "', '.join(missing(['og:title', 'og:description', 'og:image', 'og:url'], values))"}),
+
+    # 性能（media不含print的样式表会阻塞渲染）
+    Rule(check='check_performance_hints', select='link[rel~=stylesheet]', where="not media or 'print' not in media",
+         key='css_render_blocking', when='count > 2'),
+    Rule(check='check_performance_hints', select='style', key='inline_styles'),
+]
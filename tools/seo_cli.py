@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 批量命令行
+
+非交互地分析一个或多个网站，把问题和指标以JSON/JSONL格式输出到stdout或文件，
+可以直接在cron或任务调度器中运行。默认所有网站在同一个进程中依次分析并共享连接池；
+--processes 大于1时把网站分配到进程池中并行分析（见seo_fleet.py）。
+
+每个网站的问题和指标从问题存储中逐批读取，写入临时目录中该网站的结果文件，
+主进程按完成顺序把结果文件复制到输出；工作进程只返回摘要，问题列表不在内存中生成，也不跨进程传递。
+
+退出码为发现的最高严重程度：
+0 无问题, 1 low, 2 medium, 3 high, 4 critical, 5 所有网站都无法分析
+"""
+
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+from typing import IO, Iterable, Iterator, List, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from seo_cache import DEFAULT_CACHE_DIR
+from seo_crawler import DEFAULT_MAX_PAGE_BYTES
+from seo_discovery import DISCOVERY_DEADLINE, load_wordlist
+from seo_dom import available_backends
+from seo_fleet import FleetSummary, run_fleet
+from seo_report import WRITE_BUFFER, WRITERS, JsonReportWriter, chunked, report_filename
+from seo_timing import PhaseTimings
+
+EXIT_CODES = {None: 0, 'low': 1, 'medium': 2, 'high': 3, 'critical': 4}
+EXIT_ALL_FAILED = 5
+
+# 每个进程共享一个会话（连接池），在第一次分析时创建
+_session: Optional[requests.Session] = None
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    """命令行参数"""
+    parser = argparse.ArgumentParser(
+        prog='claude_seo_agent.py',
+        description='Claude SEO Agent 批量分析模式（非交互）',
+        epilog='退出码: 0 无问题, 1 low, 2 medium, 3 high, 4 critical, 5 所有网站都无法分析',
+    )
+
+    source = parser.add_argument_group('输入')
+    source.add_argument('urls', nargs='*', metavar='URL', help='要分析的网站')
+    source.add_argument('-i', '--url-file', help='网站列表文件，每行一个URL（# 开头为注释，- 表示stdin）')
+    source.add_argument('--local-dir', metavar='DIR',
+                        help='直接从本地构建目录（例如 dist/）读取HTML文件并映射为URL下的页面，不需要启动服务器；'
+                             'robots.txt和网站地图也从目录读取，页面在进程池中检查（进程数见 --processes）')
+
+    crawl = parser.add_argument_group('抓取选项')
+    crawl.add_argument('--discover', action='store_true', help='并发探测常见页面 (/about, /contact, ...)')
+    crawl.add_argument('--discover-wordlist', metavar='FILE',
+                       help='探测的路径列表文件，每行一个路径（# 开头为注释），指定时自动启用 --discover')
+    crawl.add_argument('--discover-deadline', type=float, default=DISCOVERY_DEADLINE, metavar='SECONDS',
+                       help='常见页面探测的总时间限制，到期后放弃未完成的探测 (默认: %(default)g 秒)')
+    crawl.add_argument('--sitemap', action='store_true', help='从网站地图读取页面')
+    crawl.add_argument('--incremental', action='store_true', help='只分析网站地图中上次运行后变化的页面')
+    crawl.add_argument('--crawl', action='store_true', help='沿站内链接广度优先爬取')
+    crawl.add_argument('--max-depth', type=int, default=3, help='爬取深度上限 (默认: 3)')
+    crawl.add_argument('--max-pages', type=int, default=500, help='每个网站的页面数上限 (默认: 500)')
+    crawl.add_argument('--workers', type=int, default=8, help='并发抓取线程数 (默认: 8)')
+    crawl.add_argument('--per-host', type=int, default=2,
+                       help='每个主机的初始并发请求数，服务器被限流或变慢时自动降低 (默认: 2)')
+    crawl.add_argument('--max-per-host', type=int,
+                       help='服务器响应正常时每个主机的并发请求数最多提高到这个值，'
+                            '与 --per-host 相同时不提高 (默认: 与 --workers 相同)')
+    crawl.add_argument('--retries', type=int, default=2,
+                       help='连接失败、超时和429/502/503/504时的最大重试次数，带抖动的指数退避，'
+                            '重试总量不超过请求数的10%% (默认: 2)')
+    crawl.add_argument('--ignore-robots', action='store_true',
+                       help='不遵守robots.txt：爬取和网站地图中被禁止的URL也抓取，忽略Crawl-delay '
+                            '(默认遵守，明确指定的页面始终分析)')
+    crawl.add_argument('--parser', choices=available_backends(), help='HTML解析器后端 (默认: 已安装的最快后端)')
+    crawl.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'缓存目录 (默认: {DEFAULT_CACHE_DIR})')
+    crawl.add_argument('--no-cache', action='store_true', help='不使用HTTP缓存和检查结果缓存')
+    crawl.add_argument('--max-page-size', type=float, default=DEFAULT_MAX_PAGE_BYTES / 1024 / 1024, metavar='MB',
+                       help='页面正文最大下载大小，超过时截断 (默认: %(default)g MB)')
+    crawl.add_argument('--head-only', action='store_true',
+                       help='读到</head>就停止下载，只执行Title/Description/Meta标签/样式表检查（不能发现新链接）')
+    crawl.add_argument('--history', action='store_true',
+                       help='把每次运行写入缓存目录中的运行历史数据库，输出与上次运行对比的新增/已解决问题数')
+    crawl.add_argument('--duplicates', action='store_true',
+                       help='检测Title/Meta Description完全相同和正文几乎相同的页面（SimHash + LSH分段）')
+    crawl.add_argument('--rules', action='append', metavar='FILE',
+                       help='加载自定义页面规则文件（JSON，安装PyYAML时也可以是YAML），可多次指定')
+    crawl.add_argument('--check-links', action='store_true',
+                       help='验证所有页面中的链接（包括站外链接），报告失效链接和多次重定向')
+    crawl.add_argument('--measure-assets', action='store_true',
+                       help='下载页面引用的CSS/JS/字体/图片，报告页面总大小、未压缩/未缓存的资源和最大的资源')
+
+    fleet = parser.add_argument_group('多网站')
+    fleet.add_argument('-p', '--processes', type=int,
+                       help='并行分析网站的进程数，0 表示CPU核心数 (默认: 1)；'
+                            '使用 --local-dir 时为检查页面的进程数 (默认: CPU核心数)')
+    fleet.add_argument('--site-budget', type=float,
+                       help='每个网站的抓取时间预算（秒），到期后停止抓取新页面')
+
+    profile = parser.add_argument_group('性能分析')
+    profile.add_argument('--profile', action='store_true',
+                         help='记录各阶段耗时（下载/解析/各项检查），结果中的stats.timings包含直方图')
+    profile.add_argument('--metrics-out', metavar='FILE',
+                         help='运行结束时把所有网站的阶段耗时直方图写入文件（隐含 --profile）')
+    profile.add_argument('--metrics-format', choices=['prometheus', 'json'],
+                         help='耗时直方图格式 (默认: 文件扩展名为.json时为json，否则为prometheus)')
+
+    output = parser.add_argument_group('输出')
+    output.add_argument('-f', '--format', choices=['json', 'jsonl'], default='json',
+                        help='json: 每个网站一个文档组成的数组; jsonl: 每个问题/指标一行 (默认: json)')
+    output.add_argument('-o', '--output', default='-', help='输出文件 (默认: stdout)')
+    output.add_argument('--report-dir', metavar='DIR',
+                        help='另外为每个网站写一份报告到这个目录（文件名为主机名+路径+URL哈希），问题流式写入，适合大型网站')
+    output.add_argument('--report-format', choices=list(WRITERS), default='html',
+                        help='--report-dir 的报告格式 (默认: html)')
+    output.add_argument('-q', '--quiet', action='store_true', help='不输出分析进度（进度默认输出到stderr）')
+    return parser
+
+
+def read_sites(urls: List[str], url_file: Optional[str]) -> Iterator[str]:
+    """合并命令行和文件中的网站列表，补全协议前缀"""
+    lines = list(urls)
+    if url_file:
+        handle = sys.stdin if url_file == '-' else open(url_file, encoding='utf-8')
+        with handle:
+            lines.extend(handle)
+
+    for line in lines:
+        url = line.strip()
+        if not url or url.startswith('#'):
+            continue
+        if not url.startswith(('http://', 'https://')):
+            url = 'https://' + url
+        yield url
+
+
+def write_site_results(out: IO[str], fmt: str, summary: dict, issues: Iterable, metrics: Iterable) -> int:
+    """流式写出一个网站的结果（问题和指标逐批读取并编码），返回问题数
+
+    json: 一个文档 {site, analyzed_at, highest_severity, stats, [error], issues, metrics}；
+    jsonl: 每个问题/指标一行，最后一行为网站摘要（type=site）。
+    """
+    if fmt == 'json':
+        return JsonReportWriter(out).write_document(summary, issues, metrics)
+
+    site = summary['site']
+    count = 0
+    for chunk in chunked(issues):
+        out.write(''.join(json.dumps({'type': 'issue', 'site': site, **vars(issue)}, ensure_ascii=False) + '\n'
+                          for issue in chunk))
+        count += len(chunk)
+    for chunk in chunked(metrics):
+        out.write(''.join(json.dumps({'type': 'metric', 'site': site, **vars(metric)}, ensure_ascii=False) + '\n'
+                          for metric in chunk))
+    out.write(json.dumps({'type': 'site', 'issue_count': count, **summary}, ensure_ascii=False) + '\n')
+    return count
+
+
+def write_site(out: IO[str], fmt: str, result: dict, first: bool) -> None:
+    """输出一个网站的分析结果：复制工作进程写好的结果文件，没有结果文件（分析出错）时只输出摘要"""
+    if fmt == 'json':
+        out.write('\n' if first else ',\n')
+    path = result.pop('output', None)
+    if path is None:
+        write_site_results(out, fmt, result, (), ())
+        return
+    try:
+        with open(path, encoding='utf-8') as f:
+            shutil.copyfileobj(f, out, WRITE_BUFFER)
+    finally:
+        os.remove(path)
+
+
+def write_metrics(path: str, fmt: Optional[str], timings: PhaseTimings) -> None:
+    """写出所有网站合并后的阶段耗时直方图"""
+    fmt = fmt or ('json' if path.endswith('.json') else 'prometheus')
+    with open(path, 'w', encoding='utf-8') as f:
+        if fmt == 'json':
+            json.dump(timings.to_dict(), f, ensure_ascii=False, indent=2)
+        else:
+            f.write(timings.to_prometheus())
+
+
+def get_session(workers: int) -> requests.Session:
+    """当前进程共享的会话"""
+    global _session
+    if _session is None:
+        _session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=workers, pool_maxsize=workers)
+        _session.mount('http://', adapter)
+        _session.mount('https://', adapter)
+    return _session
+
+
+def analyze_site(url: str, args: argparse.Namespace) -> dict:
+    """分析单个网站，把结果写入args.spool_dir中的文件，返回摘要和文件路径（可在工作进程中执行）"""
+    from claude_seo_agent import SEOOptimizerAgent
+
+    agent = SEOOptimizerAgent(
+        url,
+        max_workers=args.workers,
+        per_host_limit=args.per_host,
+        max_per_host=args.max_per_host,
+        max_retries=args.retries,
+        obey_robots=not args.ignore_robots,
+        discover_paths=args.discover_paths,
+        discover_deadline=args.discover_deadline,
+        parser_backend=args.parser,
+        cache_dir=None if args.no_cache else args.cache_dir,
+        session=get_session(args.workers),
+        verbose=not args.quiet,
+        log_stream=sys.stderr,
+        profile=args.profile or bool(args.metrics_out),
+        measure_assets=args.measure_assets,
+        check_links=args.check_links,
+        max_page_bytes=int(args.max_page_size * 1024 * 1024) or None,
+        head_only=args.head_only,
+        record_history=args.history and not args.no_cache,
+        find_duplicates=args.duplicates,
+        rule_files=args.rules,
+        local_dir=args.local_dir,
+        local_processes=args.processes or 0,
+    )
+    try:
+        agent.analyze_site(discover=args.discover or bool(args.discover_paths), use_sitemap=args.sitemap or args.incremental,
+                           incremental=args.incremental, crawl=args.crawl,
+                           max_depth=args.max_depth, max_pages=args.max_pages,
+                           time_budget=args.site_budget)
+        if args.report_dir:
+            agent.save_report(os.path.join(args.report_dir, report_filename(url, args.report_format)))
+        summary = agent.export_summary()
+        fd, path = tempfile.mkstemp(suffix='.' + args.format, dir=args.spool_dir)
+        try:
+            with open(fd, 'w', encoding='utf-8', buffering=WRITE_BUFFER) as f:
+                count = write_site_results(f, args.format, summary, agent.issues, agent.metrics)
+        except BaseException:
+            os.remove(path)
+            raise
+        return {**summary, 'issue_count': count, 'output': path}
+    finally:
+        agent.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """批量分析入口，返回退出码"""
+    parser = build_arg_parser()
+    args = parser.parse_args(argv)
+    sites = list(read_sites(args.urls, args.url_file))
+    if not sites:
+        parser.error('请提供至少一个网站URL（参数或 --url-file）')
+    if args.local_dir:
+        if len(sites) > 1:
+            parser.error('--local-dir 只能对应一个网站URL')
+        if not os.path.isdir(args.local_dir):
+            parser.error(f'目录不存在: {args.local_dir}')
+    if args.rules:
+        # 在开始分析之前检查规则文件，避免每个网站都报同样的错误
+        from seo_catalog import ISSUE_CATALOG, PAGE_RULES
+        from seo_rules import RuleError, RuleSet, load_rule_file
+        try:
+            RuleSet(PAGE_RULES + [rule for path in args.rules for rule in load_rule_file(path, ISSUE_CATALOG)],
+                    ISSUE_CATALOG)
+        except (OSError, RuleError) as e:
+            parser.error(f'规则文件无效: {e}')
+
+    if args.report_dir:
+        os.makedirs(args.report_dir, exist_ok=True)
+    args.discover_paths = None
+    if args.discover_wordlist:
+        try:
+            args.discover_paths = load_wordlist(args.discover_wordlist)
+        except OSError as e:
+            parser.error(f'无法读取路径列表文件: {e}')
+        if not args.discover_paths:
+            parser.error(f'路径列表文件为空: {args.discover_wordlist}')
+
+    if args.local_dir or args.processes is None:
+        # --local-dir 只有一个网站，进程池用于检查页面
+        processes = 1
+    else:
+        processes = args.processes if args.processes > 0 else (os.cpu_count() or 1)
+    summary = FleetSummary(processes=processes)
+
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    timings = PhaseTimings(enabled=True)
+    worst = None
+    # 每个网站的结果文件，复制到输出后删除
+    args.spool_dir = tempfile.mkdtemp(prefix='seo-results-')
+    try:
+        if args.format == 'json':
+            out.write('[')
+        # 结果按完成顺序逐个写出，不在内存中累积
+        for index, result in enumerate(run_fleet(sites, analyze_site, args, processes, summary)):
+            if result.get('error'):
+                print(f"❌ 网站分析失败: {result['site']} - {result['error']}", file=sys.stderr)
+
+            if 'timings' in result.get('stats', {}):
+                timings.merge_dict(result['stats']['timings'])
+
+            # 分析失败的网站只计入失败数，其中的问题（例如无法访问robots.txt）不决定退出码
+            severity = None if result.get('error') else result['highest_severity']
+            if EXIT_CODES[severity] > EXIT_CODES[worst]:
+                worst = severity
+            write_site(out, args.format, result, first=index == 0)
+            out.flush()
+        if args.format == 'json':
+            out.write('\n]\n')
+        elif len(sites) > 1:
+            out.write(json.dumps({'type': 'fleet', **summary.to_dict()}, ensure_ascii=False) + '\n')
+    finally:
+        if out is not sys.stdout:
+            out.close()
+        shutil.rmtree(args.spool_dir, ignore_errors=True)
+
+    if len(sites) > 1 and not args.quiet:
+        print(summary.format_table(), file=sys.stderr)
+    if args.metrics_out:
+        write_metrics(args.metrics_out, args.metrics_format, timings)
+
+    if summary.failed == len(sites):
+        return EXIT_ALL_FAILED
+    return EXIT_CODES[worst]
+
+
+if __name__ == '__main__':
+    sys.exit(main())
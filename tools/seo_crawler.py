@@ -0,0 +1,653 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 抓取引擎
+
+提供有界并发的页面抓取：
+1. 全局并发上限（线程池大小）
+2. 每个主机的自适应并发上限（AIMD：响应正常时逐步提高，被限流或TTFB上升时减半，遵守Retry-After）
+3. 页面解析和检查在工作线程中执行，与其他页面的下载重叠进行
+4. 临时性错误按带抖动的指数退避重试，重试总量受预算限制
+
+页面正文流式下载：超过最大大小时截断，只需要<head>时读到</head>就停止。
+
+以及沿站内链接广度优先爬取时使用的待抓取队列：
+URL规范化（片段、结尾斜杠、跟踪参数）+ 布隆过滤器去重，
+百万级URL的网站也只占用几MB内存。
+"""
+
+import hashlib
+import math
+import os
+import random
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qsl, urlencode, urlparse, urlunparse
+
+import requests
+
+T = TypeVar('T')
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+# 页面正文默认最大下载大小
+DEFAULT_MAX_PAGE_BYTES = 5 * 1024 * 1024
+DOWNLOAD_CHUNK_BYTES = 64 * 1024
+_HEAD_END = re.compile(rb'</head\s*>', re.I)
+
+# 自适应并发：这些状态码表示服务器要求降低请求速率
+THROTTLE_STATUSES = {429, 503}
+# 可以重试的状态码和异常（临时性错误）
+RETRY_STATUSES = {429, 502, 503, 504}
+RETRY_ERRORS = (requests.ConnectionError, requests.Timeout, requests.exceptions.ChunkedEncodingError)
+# 被限流或变慢时并发上限乘以这个系数
+BACKOFF_FACTOR = 0.5
+# Retry-After最多等待的秒数，更长时不再重试
+MAX_RETRY_AFTER = 60.0
+# TTFB基线和近期值的指数平均权重；近期值超过基线的LATENCY_TOLERANCE倍且至少多LATENCY_SLACK秒时视为变慢
+BASELINE_WEIGHT = 0.05
+RECENT_WEIGHT = 0.3
+LATENCY_TOLERANCE = 2.0
+LATENCY_SLACK = 0.05
+LATENCY_WARMUP = 5
+
+# 不影响页面内容的跟踪参数
+TRACKING_PARAMS = {'gclid', 'fbclid', 'msclkid', 'yclid', 'dclid', 'mc_cid', 'mc_eid', '_ga', '_gl'}
+TRACKING_PREFIXES = ('utm_',)
+
+# 爬取时跳过的非HTML资源
+NON_HTML_EXTENSIONS = {
+    '.jpg', '.jpeg', '.png', '.gif', '.webp', '.svg', '.ico', '.bmp', '.avif',
+    '.css', '.js', '.json', '.xml', '.txt', '.pdf', '.zip', '.gz', '.rar',
+    '.mp3', '.mp4', '.webm', '.avi', '.mov', '.woff', '.woff2', '.ttf', '.eot',
+}
+
+
+def _is_tracking_param(name: str) -> bool:
+    name = name.lower()
+    return name in TRACKING_PARAMS or name.startswith(TRACKING_PREFIXES)
+
+
+def normalize_url(url: str) -> str:
+    """规范化URL，用作去重和缓存的键
+
+    协议和主机小写、去掉默认端口和片段、去掉跟踪参数并对查询参数排序、
+    去掉路径结尾的斜杠（根路径保留为 /）。
+    """
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if ':' in host:
+        host = f"[{host}]"  # IPv6
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+
+    path = parsed.path or '/'
+    if len(path) > 1 and path.endswith('/'):
+        path = path.rstrip('/') or '/'
+
+    query = parsed.query
+    if query:
+        params = [(k, v) for k, v in parse_qsl(query, keep_blank_values=True) if not _is_tracking_param(k)]
+        query = urlencode(sorted(params))
+
+    return urlunparse((scheme, host, path, parsed.params, query, ''))
+
+
+@dataclass
+class CrawlStats:
+    """抓取统计"""
+    pages: int = 0
+    started_at: float = 0.0
+    finished_at: float = 0.0
+    truncated: bool = False  # 是否因超出时间预算而提前停止
+
+    @property
+    def elapsed(self) -> float:
+        """抓取耗时（秒）"""
+        end = self.finished_at or time.perf_counter()
+        return max(0.0, end - self.started_at) if self.started_at else 0.0
+
+    @property
+    def pages_per_second(self) -> float:
+        """抓取速度（页/秒）"""
+        return self.pages / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """解析Retry-After响应头（秒数或HTTP日期），返回需要等待的秒数"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max(0.0, (moment - datetime.now(timezone.utc)).total_seconds())
+
+
+@dataclass
+class HostStats:
+    """单个主机的请求统计"""
+    host: str
+    requests: int = 0
+    retries: int = 0
+    throttled: int = 0  # 429/503响应
+    errors: int = 0  # 连接失败和超时
+    slowdowns: int = 0  # 因TTFB明显上升而降低并发的次数
+    limit: float = 0.0  # 当前并发上限
+    peak_limit: float = 0.0
+    crawl_delay: float = 0.0  # robots.txt的Crawl-delay（两个请求开始之间的最小间隔，秒）
+    first_request: float = 0.0
+    last_request: float = 0.0
+
+    @property
+    def request_rate(self) -> float:
+        """有效请求速率（请求/秒，从第一个请求到最后一个请求）"""
+        elapsed = self.last_request - self.first_request
+        return self.requests / elapsed if elapsed > 0 else 0.0
+
+    def to_dict(self) -> dict:
+        """可序列化的统计（请求时刻换算为持续时间）"""
+        data = asdict(self)
+        del data['first_request'], data['last_request']
+        data.update(limit=round(self.limit, 2), peak_limit=round(self.peak_limit, 2),
+                    active_seconds=round(self.last_request - self.first_request, 3),
+                    request_rate=round(self.request_rate, 3))
+        return data
+
+
+class HostState:
+    """单个主机的并发窗口（AIMD）、暂停时刻和TTFB基线"""
+
+    def __init__(self, host: str, limit: int, max_limit: int):
+        self.max_limit = max_limit
+        self.limit = float(limit)
+        self.in_flight = 0
+        self.paused_until = 0.0  # time.monotonic，Retry-After期间不发送新请求
+        self.min_interval = 0.0  # Crawl-delay：两个请求开始之间的最小间隔
+        self.next_request = 0.0  # time.monotonic，下一个请求最早的开始时刻
+        self.baseline: Optional[float] = None  # TTFB的慢速指数平均
+        self.recent: Optional[float] = None  # TTFB的快速指数平均
+        self.samples = 0
+        self.last_decrease = 0.0
+        self.stats = HostStats(host, limit=self.limit, peak_limit=self.limit)
+        self._condition = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._condition:
+            while True:
+                wait = max(self.paused_until, self.next_request) - time.monotonic()
+                if wait <= 0 and self.in_flight < int(self.limit):
+                    break
+                self._condition.wait(wait if wait > 0 else None)
+            self.in_flight += 1
+            if self.min_interval:
+                self.next_request = time.monotonic() + self.min_interval
+            now = time.perf_counter()
+            self.stats.requests += 1
+            self.stats.first_request = self.stats.first_request or now
+            self.stats.last_request = now
+
+    def release(self) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            self._condition.notify_all()
+
+    def observe(self, status: int, ttfb: float, retry_after: Optional[float] = None) -> None:
+        """根据响应调整并发上限：被限流或变慢时减半，否则每完成一个窗口的请求加1"""
+        with self._condition:
+            now = time.monotonic()
+            if status in THROTTLE_STATUSES:
+                self.stats.throttled += 1
+                if retry_after:
+                    self.paused_until = max(self.paused_until, now + min(retry_after, MAX_RETRY_AFTER))
+                self._decrease(now)
+                return
+
+            self.samples += 1
+            if self.baseline is None:
+                self.baseline = self.recent = ttfb
+            else:
+                self.baseline += BASELINE_WEIGHT * (ttfb - self.baseline)
+                self.recent += RECENT_WEIGHT * (ttfb - self.recent)
+            if (self.samples > LATENCY_WARMUP and self.recent > self.baseline * LATENCY_TOLERANCE
+                    and self.recent - self.baseline > LATENCY_SLACK):
+                if self._decrease(now):
+                    self.stats.slowdowns += 1
+            elif self.limit < self.max_limit:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+                self.stats.limit = self.limit
+                self.stats.peak_limit = max(self.stats.peak_limit, self.limit)
+                self._condition.notify_all()
+
+    def set_crawl_delay(self, delay: float) -> None:
+        """两个请求开始之间至少间隔delay秒"""
+        with self._condition:
+            self.min_interval = self.stats.crawl_delay = delay
+
+    def record_retry(self) -> None:
+        with self._condition:
+            self.stats.retries += 1
+
+    def failed(self) -> None:
+        """连接失败或超时"""
+        with self._condition:
+            self.stats.errors += 1
+            self._decrease(time.monotonic())
+
+    def _decrease(self, now: float) -> bool:
+        # 同时在途的请求往往一起收到限流响应，一个TTFB周期内只减一次
+        if now - self.last_decrease < (self.recent or 0.0):
+            return False
+        self.limit = max(1.0, self.limit * BACKOFF_FACTOR)
+        self.stats.limit = self.limit
+        self.last_decrease = now
+        return True
+
+
+class HostLimiter:
+    """每个主机的自适应并发上限（AIMD）
+
+    每个主机从per_host_limit开始：响应正常且TTFB稳定时，每完成一个窗口的请求上限加1（不超过max_per_host）；
+    收到429/503、连接失败或TTFB明显高于基线时上限减半（不低于1）；Retry-After期间暂停向该主机发送请求。
+    max_per_host默认等于per_host_limit，即只在服务器吃力时降低并发。
+    """
+
+    def __init__(self, per_host_limit: int = 2, max_per_host: Optional[int] = None):
+        self.per_host_limit = max(1, per_host_limit)
+        self.max_per_host = max(self.per_host_limit, max_per_host or 0)
+        self._lock = threading.Lock()
+        self._hosts: Dict[str, HostState] = {}
+
+    def host(self, url: str) -> HostState:
+        """URL所属主机的状态"""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            state = self._hosts.get(host)
+            if state is None:
+                state = self._hosts[host] = HostState(host, self.per_host_limit, self.max_per_host)
+            return state
+
+    @contextmanager
+    def slot(self, url: str) -> Iterator[HostState]:
+        """占用目标主机的一个请求槽位，响应可以通过 observe/failed 反馈给并发控制"""
+        state = self.host(url)
+        state.acquire()
+        try:
+            yield state
+        finally:
+            state.release()
+
+    def stats(self) -> List[HostStats]:
+        """按请求数从多到少排列的主机统计"""
+        with self._lock:
+            hosts = list(self._hosts.values())
+        return sorted((state.stats for state in hosts), key=lambda stats: stats.requests, reverse=True)
+
+
+@dataclass
+class RetryStats:
+    """重试统计"""
+    retries: int = 0
+    recovered: int = 0  # 重试后成功的请求
+    budget_exhausted: int = 0  # 因重试预算用完而放弃的重试
+
+
+class RetryPolicy:
+    """带抖动的指数退避重试，总重试次数受预算限制
+
+    预算是一个令牌桶：每个首次请求存入 budget_ratio 个令牌（最多 budget_reserve 个），每次重试取出一个，
+    所以持续失败时重试请求最多占首次请求的 budget_ratio，不会在服务器故障时成倍放大请求量。
+    """
+
+    def __init__(self, max_retries: int = 2, base_delay: float = 0.5, max_delay: float = 10.0,
+                 budget_ratio: float = 0.1, budget_reserve: float = 10.0):
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.budget_ratio = budget_ratio
+        self.budget_reserve = budget_reserve
+        self.stats = RetryStats()
+        self._tokens = budget_reserve
+        self._lock = threading.Lock()
+
+    def record_request(self) -> None:
+        """记录一个首次请求，为重试预算存入令牌"""
+        with self._lock:
+            self._tokens = min(self.budget_reserve, self._tokens + self.budget_ratio)
+
+    def allow(self, attempt: int) -> bool:
+        """第attempt次重试（从0开始）是否允许，允许时取出一个令牌"""
+        if attempt >= self.max_retries:
+            return False
+        with self._lock:
+            if self._tokens < 1:
+                self.stats.budget_exhausted += 1
+                return False
+            self._tokens -= 1
+            self.stats.retries += 1
+            return True
+
+    def record_recovered(self) -> None:
+        with self._lock:
+            self.stats.recovered += 1
+
+    def delay(self, attempt: int) -> float:
+        """第attempt次重试之前等待的秒数（完全抖动：0到指数退避上限之间的随机值）"""
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+@dataclass
+class DownloadStats:
+    """页面下载统计"""
+    pages: int = 0
+    bytes_downloaded: int = 0  # 网络传输的字节数
+    truncated: int = 0  # 超过最大大小被截断的页面
+    head_only: int = 0  # 读到</head>后停止的页面
+    bytes_skipped: int = 0  # 提前停止而没有下载的字节（只统计声明了Content-Length的响应）
+    seconds_saved: float = 0.0  # 按已下载部分的速度估算节省的下载时间
+
+
+def limit_body(body: bytes, max_bytes: Optional[int] = None,
+               stop_at_head: bool = False) -> Tuple[bytes, Optional[str]]:
+    """对已经完整读取的正文（例如本地文件）应用与PageDownloader相同的限制
+
+    返回 (正文, 停止原因)：停止原因为 head（到</head>为止）、truncated（超过最大大小）或None。
+    """
+    limit = min(len(body), max_bytes) if max_bytes else len(body)
+    if stop_at_head:
+        match = _HEAD_END.search(body, 0, limit)
+        if match:
+            return body[:match.end()], 'head'
+    if limit < len(body):
+        return body[:limit], 'truncated'
+    return body, None
+
+
+class PageDownloader:
+    """流式读取页面正文，限制最大大小，可以在</head>之后停止"""
+
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MAX_PAGE_BYTES, stop_at_head: bool = False):
+        self.max_bytes = max_bytes
+        self.stop_at_head = stop_at_head
+        self.stats = DownloadStats()
+        self._lock = threading.Lock()
+
+    def read(self, response: requests.Response) -> Tuple[bytes, bool]:
+        """读取 stream=True 的响应正文，返回 (正文, 是否完整)"""
+        started = time.perf_counter()
+        data = bytearray()
+        size = 0
+        stopped = None
+        for chunk in response.iter_content(DOWNLOAD_CHUNK_BYTES):
+            scanned = size  # 之前的部分已经查找过</head>
+            data += chunk
+            size += len(chunk)
+            if self.stop_at_head:
+                # 只查找新读取的部分（回退8个字节，</head>可能跨两个块）
+                match = _HEAD_END.search(data, max(0, scanned - 8))
+                if match:
+                    del data[match.end():]
+                    stopped = 'head'
+                    break
+            if self.max_bytes and size >= self.max_bytes:
+                del data[self.max_bytes:]
+                stopped = 'truncated'
+                break
+        elapsed = time.perf_counter() - started
+        body = bytes(data)
+
+        # raw.tell() 为从网络读取的字节数（解压之前）
+        transferred = response.raw.tell() if response.raw is not None else 0
+        transferred = transferred or size
+        with self._lock:
+            self.stats.pages += 1
+            self.stats.bytes_downloaded += transferred
+            if stopped == 'head':
+                self.stats.head_only += 1
+            elif stopped == 'truncated':
+                self.stats.truncated += 1
+            if stopped:
+                declared = response.headers.get('Content-Length', '')
+                if declared.isdigit() and int(declared) > transferred:
+                    skipped = int(declared) - transferred
+                    self.stats.bytes_skipped += skipped
+                    if transferred:
+                        self.stats.seconds_saved += elapsed / transferred * skipped
+        return body, stopped is None
+
+
+class CrawlEngine:
+    """有界并发抓取引擎"""
+
+    def __init__(self, max_workers: int = 8, per_host_limit: int = 2, max_per_host: Optional[int] = None):
+        self.max_workers = max(1, max_workers)
+        self.host_limiter = HostLimiter(per_host_limit, max_per_host)
+        self.stats = CrawlStats()
+        # 时间预算截止时刻（time.monotonic），到期后不再提交新任务，在途任务照常完成
+        self.deadline: Optional[float] = None
+
+    def run(self, urls: Iterable[str], worker: Callable[[str], T],
+            ordered: bool = True) -> Iterator[Tuple[str, T]]:
+        """并发执行 worker(url) 并逐个返回 (url, 结果)
+
+        urls 按需读取，同时在途（以及已完成但等待按序返回）的任务不超过线程数的两倍；
+        迭代器在运行过程中可以继续增长（例如爬虫的待抓取队列）。
+        ordered=True 时按提交顺序返回结果，与串行执行的顺序一致。
+        """
+        source = iter(urls)
+        window = self.max_workers * 2
+        pending = {}
+        finished: Dict[int, Tuple[str, T]] = {}
+        next_seq = 0
+        next_emit = 0
+
+        self.stats = CrawlStats(started_at=time.perf_counter())
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            while True:
+                # 补充任务，保持线程池忙碌；按序返回时等待输出的结果也计入窗口，
+                # 否则一个慢任务会让已完成的结果无限堆积
+                while len(pending) + len(finished) < window:
+                    if self.deadline is not None and time.monotonic() >= self.deadline:
+                        self.stats.truncated = True
+                        break
+                    try:
+                        url = next(source)
+                    except StopIteration:
+                        break
+                    pending[executor.submit(worker, url)] = (next_seq, url)
+                    next_seq += 1
+
+                if not pending:
+                    break
+
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    seq, url = pending.pop(future)
+                    self.stats.pages += 1
+                    if ordered:
+                        finished[seq] = (url, future.result())
+                    else:
+                        yield url, future.result()
+
+                while next_emit in finished:
+                    yield finished.pop(next_emit)
+                    next_emit += 1
+
+        self.stats.finished_at = time.perf_counter()
+
+
+class BloomFilter:
+    """可扩展的布隆过滤器
+
+    每个URL只占约3.6字节（误判率1e-6），超出容量时追加一层两倍大小的过滤器。
+    误判只会让极少数URL被当作已见过而跳过，不会重复抓取。
+    """
+
+    def __init__(self, capacity: int = 100_000, error_rate: float = 1e-6):
+        self.error_rate = error_rate
+        self.count = 0
+        self._layers: List[Tuple[bytearray, int, int, int]] = []  # (位数组, 位数, 哈希数, 容量)
+        self._add_layer(capacity)
+
+    def _add_layer(self, capacity: int) -> None:
+        bits = max(64, int(-capacity * math.log(self.error_rate) / (math.log(2) ** 2)))
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        self._layers.append((bytearray((bits + 7) // 8), bits, hashes, capacity))
+
+    @staticmethod
+    def _hashes(key: str) -> Tuple[int, int]:
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).digest()
+        return int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little')
+
+    @staticmethod
+    def _positions(h1: int, h2: int, bits: int, hashes: int) -> Iterator[int]:
+        # 增强双重哈希，避免h2与位数有公因子时位置重复
+        x, y = h1 % bits, h2 % bits
+        for i in range(hashes):
+            yield x
+            x = (x + y) % bits
+            y = (y + i) % bits
+
+    def __contains__(self, key: str) -> bool:
+        h1, h2 = self._hashes(key)
+        for array, bits, hashes, _ in self._layers:
+            if all(array[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(h1, h2, bits, hashes)):
+                return True
+        return False
+
+    def add(self, key: str) -> bool:
+        """添加key，返回是否为新元素"""
+        if key in self:
+            return False
+        array, bits, hashes, capacity = self._layers[-1]
+        if self.count >= sum(layer[3] for layer in self._layers):
+            self._add_layer(capacity * 2)
+            array, bits, hashes, capacity = self._layers[-1]
+        h1, h2 = self._hashes(key)
+        for pos in self._positions(h1, h2, bits, hashes):
+            array[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+        return True
+
+    @property
+    def nbytes(self) -> int:
+        """占用的位数组字节数"""
+        return sum(len(layer[0]) for layer in self._layers)
+
+
+@dataclass
+class FrontierStats:
+    """待抓取队列统计"""
+    visited: int = 0
+    queued: int = 0
+    deduplicated: int = 0
+    out_of_scope: int = 0
+    depth_limited: int = 0
+    page_limited: int = 0
+    robots_blocked: int = 0  # robots.txt禁止抓取的URL
+
+
+class Frontier:
+    """广度优先爬取的待抓取队列
+
+    可以直接作为CrawlEngine.run的url来源：队列暂时为空时停止迭代，
+    有新链接加入后引擎会再次读取。
+    种子（深度0）按需从seeds读取，优先于队列中的链接，访问顺序与先加入全部种子相同，
+    但抓取不必等待种子来源（常见页面探测、网站地图）全部读完，时间预算到期后也不再读取。
+    robots: 返回禁止抓取该URL的robots.txt规则（允许时返回None），每个URL去重后只检查一次。
+    """
+
+    def __init__(self, base_url: str, max_depth: int = 3, max_pages: int = 500,
+                 seen_capacity: int = 100_000, robots: Optional[Callable[[str], object]] = None,
+                 seeds: Iterable[str] = ()):
+        parsed = urlparse(base_url)
+        self.scheme_host = (parsed.scheme.lower(), parsed.netloc.lower())
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.robots = robots
+        self.stats = FrontierStats()
+        self._queue = deque()
+        self._seeds: Optional[Iterator[str]] = iter(seeds)
+        self._seen = BloomFilter(seen_capacity)
+        # 只记录已出队、结果尚未处理的页面深度，数量不超过在途任务数
+        self._in_flight: Dict[str, int] = {}
+
+    def in_scope(self, url: str) -> bool:
+        """是否为本站的HTML页面"""
+        parsed = urlparse(url)
+        if parsed.scheme.lower() not in ('http', 'https'):
+            return False
+        if parsed.netloc.lower() != self.scheme_host[1]:
+            return False
+        extension = os.path.splitext(parsed.path)[1].lower()
+        return extension not in NON_HTML_EXTENSIONS
+
+    def add(self, url: str, depth: int = 0) -> bool:
+        """加入待抓取URL，返回是否真正入队"""
+        if not self.in_scope(url):
+            self.stats.out_of_scope += 1
+            return False
+        if depth > self.max_depth:
+            self.stats.depth_limited += 1
+            return False
+        if not self._seen.add(normalize_url(url)):
+            self.stats.deduplicated += 1
+            return False
+        if self.robots is not None and self.robots(url) is not None:
+            self.stats.robots_blocked += 1
+            return False
+        if self.stats.queued >= self.max_pages:
+            self.stats.page_limited += 1
+            return False
+
+        self.stats.queued += 1
+        self._queue.append((url.split('#', 1)[0], depth))
+        return True
+
+    def add_links(self, links: Iterable[str], parent_url: str) -> None:
+        """加入页面中发现的链接，深度为父页面深度 + 1"""
+        depth = self._in_flight.pop(parent_url, 0) + 1
+        for link in links:
+            self.add(link, depth)
+
+    def __iter__(self) -> 'Frontier':
+        return self
+
+    def _next_seed(self) -> Optional[Tuple[str, int]]:
+        """读取种子直到有一个真正入队，种子读完或已达到页数上限时返回None"""
+        while self._seeds is not None and self.stats.queued < self.max_pages:
+            seed = next(self._seeds, None)
+            if seed is None:
+                break
+            if self.add(seed, 0):
+                return self._queue.pop()
+        self._seeds = None
+        return None
+
+    def __next__(self) -> str:
+        entry = self._next_seed() if self._seeds is not None else None
+        if entry is None:
+            if not self._queue:
+                raise StopIteration
+            entry = self._queue.popleft()
+        url, depth = entry
+        self._in_flight[url] = depth
+        self.stats.visited += 1
+        return url
+
+    def __len__(self) -> int:
+        return len(self._queue)
@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 常见页面探测
+
+按路径列表（内置常见页面或 --discover-wordlist 指定的文件）并发探测页面是否存在：
+1. 所有探测在共享的连接池上并发执行，受每个主机的并发上限限制，整个探测有总时间限制，
+   到期后未完成的探测放弃，不会因为一个慢主机拖住分析
+2. 跟随重定向：重定向到站外或首页的路径不算找到，多个路径重定向到同一页面时只返回一次
+3. 软404：先请求一个随机的不存在路径，服务器对它也返回200时，
+   与它的最终地址或Title+正文长度相同的响应视为软404
+4. 找到的页面在探测完成时立即返回，直接进入抓取队列，不等待其他探测
+"""
+
+import re
+import secrets
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+from urllib.parse import urlparse
+
+import requests
+
+from seo_crawler import HostLimiter, normalize_url, parse_retry_after
+from seo_timing import PhaseTimings
+
+# 内置的常见页面
+COMMON_PAGE_PATHS = [
+    "/about", "/contact", "/products", "/services",
+    "/blog", "/news", "/help", "/faq"
+]
+# 单个探测请求的超时（秒）
+PROBE_TIMEOUT = 3.0
+# 整个探测的总时间限制（秒）
+DISCOVERY_DEADLINE = 10.0
+# 判断软404时读取的正文字节数
+PROBE_BODY_BYTES = 64 * 1024
+# 正文长度相差不超过这个比例时视为同一个页面（页面中可能包含请求路径）
+SOFT_404_LENGTH_TOLERANCE = 0.1
+
+_TITLE = re.compile(rb'<title[^>]*>(.*?)</title', re.I | re.S)
+
+
+class ProbeResponse(NamedTuple):
+    """探测请求的响应摘要"""
+    status: int
+    final_url: str
+    title: bytes
+    length: int
+
+
+@dataclass
+class DiscoveryStats:
+    """页面探测统计"""
+    probed: int = 0
+    found: int = 0
+    not_found: int = 0  # 4xx/5xx
+    redirected_away: int = 0  # 重定向到站外或首页
+    duplicates: int = 0  # 与已找到的页面相同（重定向到同一页面）
+    soft_404: int = 0
+    errors: int = 0
+    timed_out: int = 0  # 总时间到期时未完成的探测
+    elapsed_seconds: float = 0.0
+    slowest_seconds: float = 0.0
+
+
+def load_wordlist(path: str) -> List[str]:
+    """读取路径列表文件：每行一个路径（# 开头为注释），去重并补全开头的 /"""
+    paths = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            line = line if line.startswith('/') else '/' + line
+            if line not in paths:
+                paths.append(line)
+    return paths
+
+
+class PageDiscovery:
+    """并发探测网站中的常见页面"""
+
+    def __init__(self, session: requests.Session, base_url: str, max_workers: int = 8,
+                 host_limiter: Optional[HostLimiter] = None, timeout: float = PROBE_TIMEOUT,
+                 deadline: float = DISCOVERY_DEADLINE, timings: Optional[PhaseTimings] = None):
+        self.session = session
+        self.base_url = base_url.rstrip('/')
+        self.host = urlparse(self.base_url).netloc.lower()
+        self.max_workers = max(1, max_workers)
+        self.host_limiter = host_limiter or HostLimiter(max_workers)
+        self.timeout = timeout
+        self.deadline = deadline
+        self.timings = timings or PhaseTimings()
+        self.stats = DiscoveryStats()
+        self._lock = threading.Lock()
+
+    def iter_found(self, paths: Iterable[str]) -> Iterator[str]:
+        """按完成顺序返回存在的页面URL（重定向后的最终地址）"""
+        started = time.monotonic()
+        urls = [self.base_url + path for path in paths]
+        home = normalize_url(self.base_url)
+        seen = {home}
+        executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='probe')
+        try:
+            # 随机路径作为软404基线，与其他探测同时发出
+            baseline_future = executor.submit(self._probe, f"{self.base_url}/{secrets.token_hex(8)}-not-found")
+            pending = {executor.submit(self._probe, url): url for url in urls}
+            self.stats.probed = len(pending)
+            baseline: Optional[ProbeResponse] = None
+            baseline_done = False
+            waiting = set(pending) | {baseline_future}
+            held = []  # 基线完成之前已完成的探测
+
+            expired = False
+            while waiting and not expired:
+                remaining = started + self.deadline - time.monotonic()
+                if remaining <= 0:
+                    # 到期后不再等待，但仍然取出已经完成的探测（调用方处理得慢时可能积累了多个）
+                    expired = True
+                    done, waiting = wait(waiting, timeout=0)
+                else:
+                    done, waiting = wait(waiting, timeout=remaining, return_when=FIRST_COMPLETED)
+                if baseline_future in done:
+                    baseline = baseline_future.result()
+                    baseline_done = True
+                    done = set(done) - {baseline_future}
+                held.extend(done)
+                if not baseline_done:
+                    continue
+                for future in held:
+                    url = self._classify(future, baseline, home)
+                    if url is None:
+                        continue
+                    key = normalize_url(url)
+                    if key in seen:
+                        self.stats.duplicates += 1
+                        continue
+                    seen.add(key)
+                    self.stats.found += 1
+                    yield url
+                held = []
+
+            # 只统计到期时仍未完成的探测；基线没有完成时，已完成但无法判断软404的探测也算超时
+            self.stats.timed_out = len(waiting - {baseline_future}) + len(held)
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+            self.stats.elapsed_seconds = round(time.monotonic() - started, 3)
+
+    def _classify(self, future: Future, baseline: Optional[ProbeResponse], home: str) -> Optional[str]:
+        """探测结果对应的页面URL，不存在时返回None"""
+        response = future.result()
+        if response is None:
+            self.stats.errors += 1
+            return None
+        if response.status != 200:
+            self.stats.not_found += 1
+            return None
+        if (normalize_url(response.final_url) == home
+                or urlparse(response.final_url).netloc.lower() != self.host):
+            self.stats.redirected_away += 1
+            return None
+        if baseline is not None and baseline.status == 200 and self._same_page(response, baseline):
+            self.stats.soft_404 += 1
+            return None
+        return response.final_url
+
+    @staticmethod
+    def _same_page(response: ProbeResponse, baseline: ProbeResponse) -> bool:
+        """与随机路径的响应是同一个页面（软404）"""
+        if normalize_url(response.final_url) == normalize_url(baseline.final_url):
+            return True
+        longer = max(response.length, baseline.length) or 1
+        return (response.title == baseline.title
+                and abs(response.length - baseline.length) / longer <= SOFT_404_LENGTH_TOLERANCE)
+
+    def _probe(self, url: str) -> Optional[ProbeResponse]:
+        """GET请求并只读取正文开头（用于比较软404），失败时返回None"""
+        started = time.perf_counter()
+        host = None
+        try:
+            with self.host_limiter.slot(url) as host_state:
+                host = host_state.stats.host
+                with self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True) as response:
+                    body = b''
+                    if response.status_code == 200:
+                        for chunk in response.iter_content(16 * 1024):
+                            body += chunk
+                            if len(body) >= PROBE_BODY_BYTES:
+                                break
+                host_state.observe(response.status_code, response.elapsed.total_seconds(),
+                                   parse_retry_after(response.headers.get('Retry-After')))
+            title = _TITLE.search(body)
+            return ProbeResponse(response.status_code, response.url,
+                                 b' '.join(title.group(1).split()) if title else b'', len(body))
+        except requests.RequestException:
+            return None
+        finally:
+            seconds = time.perf_counter() - started
+            self.timings.observe('probe', seconds, host)
+            with self._lock:
+                self.stats.slowest_seconds = round(max(self.stats.slowest_seconds, seconds), 3)
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 页面索引
+
+对页面DOM只遍历一次，收集所有检查需要的元素：
+meta标签（按name/property）、按文档顺序排列的标题、图片、链接、
+样式表链接、外部脚本、预加载字体、<style>块、Title和<body>文本。
+同一次遍历中，元素还会交给规则引擎的遍历计划（见seo_rules），页面规则只读取收集的结果。
+
+页面可以由不同的解析器后端构建（html.parser / lxml / selectolax），
+后端通过一个很小的适配器接口提供元素遍历、属性和文本读取，
+默认使用已安装的最快后端。各后端按浏览器的方式处理以下元素，保证检查结果一致：
+<template>的内容不属于文档（不遍历其中的元素），<body>文本不包含<script>/<style>的内容。
+"""
+
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from bs4 import BeautifulSoup
+
+try:
+    import lxml.html
+    import lxml.etree
+except ImportError:  # 可选依赖
+    lxml = None
+
+try:
+    from selectolax.lexbor import LexborHTMLParser as SelectolaxParser
+except ImportError:  # 可选依赖，旧版selectolax只有modest后端
+    try:
+        from selectolax.parser import HTMLParser as SelectolaxParser
+    except ImportError:
+        SelectolaxParser = None
+
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+# 不计入<body>文本的元素（浏览器不显示其内容）
+HIDDEN_TEXT_TAGS = ('script', 'style')
+
+_TEMPLATE = re.compile(r'<template\b', re.I)
+
+
+class ImageRef(NamedTuple):
+    """图片元素"""
+    src: str
+    alt: str
+    loading: str
+
+
+class LinkRef(NamedTuple):
+    """带href的链接元素"""
+    href: str
+    text: str
+
+
+class StylesheetRef(NamedTuple):
+    """样式表链接"""
+    href: str
+    media: str
+
+
+@dataclass
+class PageIndex:
+    """页面元素索引"""
+    title: Optional[str] = None
+    meta_names: Dict[str, str] = field(default_factory=dict)
+    meta_properties: Dict[str, str] = field(default_factory=dict)
+    headings: List[tuple] = field(default_factory=list)  # (级别, 文本)，按文档顺序
+    images: List[ImageRef] = field(default_factory=list)
+    links: List[LinkRef] = field(default_factory=list)
+    stylesheets: List[StylesheetRef] = field(default_factory=list)
+    scripts: List[str] = field(default_factory=list)  # 外部脚本的src
+    fonts: List[str] = field(default_factory=list)  # <link rel="preload" as="font"> 的href
+    style_blocks: int = 0
+    body_text: str = ''  # <body>内的可见文本（文本节点以空格分隔），只在重复内容检测需要时提取
+    matches: Optional[list] = None  # 规则引擎遍历计划收集的结果
+
+    @property
+    def h1_count(self) -> int:
+        """H1标签数量"""
+        return sum(1 for level, _ in self.headings if level == 1)
+
+
+_META_CHARSET = re.compile(rb'<meta[^>]+charset=["\']?([-\w.:]+)', re.I)
+
+
+def decode_html(content: bytes, encoding: Optional[str] = None) -> str:
+    """把响应内容解码为文本，所有后端共享同一份解码结果
+
+    优先使用HTTP头声明的编码，其次是页面开头的<meta charset>，最后是UTF-8。
+    content也可以是memoryview（例如内存映射的本地文件），解码时不额外复制。
+    """
+    if not encoding:
+        match = _META_CHARSET.search(content[:2048])
+        encoding = match.group(1).decode('ascii') if match else 'utf-8'
+    try:
+        return str(content, encoding, 'replace')
+    except LookupError:
+        return str(content, 'utf-8', 'replace')
+
+
+class ParserBackend(ABC):
+    """解析器后端适配器：遍历元素、读取属性和文本"""
+    name = ''
+
+    @abstractmethod
+    def parse(self, html: str):
+        """解析HTML文本，返回文档根节点"""
+
+    @abstractmethod
+    def elements(self, root) -> Iterator[Tuple[str, object]]:
+        """按文档顺序返回 (小写标签名, 节点)"""
+
+    @abstractmethod
+    def attr(self, node, name: str) -> Optional[str]:
+        """读取属性值，属性不存在时返回None，无值属性返回空字符串"""
+
+    @abstractmethod
+    def text(self, node) -> str:
+        """节点内的全部文本"""
+
+    @abstractmethod
+    def visible_text(self, node) -> str:
+        """节点内浏览器会显示的文本（不含<script>/<style>），文本节点之间以空格分隔
+
+        分隔符避免 <li>a</li><li>b</li> 合并成一个词。
+        部分后端会从文档树中删除这些元素，只能在遍历结束后调用。
+        """
+
+
+class HtmlParserBackend(ParserBackend):
+    """BeautifulSoup + 标准库html.parser（无额外依赖，最慢）"""
+    name = 'html.parser'
+
+    def parse(self, html: str):
+        # 重复属性保留第一个，与浏览器（以及lxml/selectolax）的行为一致
+        soup = BeautifulSoup(html, 'html.parser', on_duplicate_attribute='ignore')
+        if _TEMPLATE.search(html):
+            # <template>的内容不属于文档，与浏览器（以及selectolax）一致
+            for template in soup.find_all('template'):
+                template.clear()
+        return soup
+
+    def elements(self, root):
+        for tag in root.find_all(True):
+            yield tag.name, tag
+
+    def attr(self, node, name):
+        value = node.get(name)
+        if isinstance(value, list):
+            # 多值属性（如rel、class）合并为空格分隔的字符串
+            return ' '.join(value)
+        return value
+
+    def text(self, node):
+        return node.get_text()
+
+    def visible_text(self, node):
+        # get_text默认不包含<script>/<style>/<template>中的字符串
+        return node.get_text(' ')
+
+
+class LxmlBackend(ParserBackend):
+    """lxml（libxml2）"""
+    name = 'lxml'
+
+    def parse(self, html: str):
+        if not html.strip():
+            return None
+        root = lxml.html.document_fromstring(html)
+        if _TEMPLATE.search(html):
+            # libxml2不认识<template>，把其内容当作普通元素，这里清空
+            for template in list(root.iter('template')):
+                template.text = None
+                del template[:]
+        return root
+
+    def elements(self, root):
+        if root is None:
+            return
+        for node in root.iter():
+            tag = node.tag
+            # 跳过注释和处理指令
+            if isinstance(tag, str):
+                yield tag.lower(), node
+
+    def attr(self, node, name):
+        return node.get(name)
+
+    def text(self, node):
+        return node.text_content()
+
+    def visible_text(self, node):
+        lxml.etree.strip_elements(node, *HIDDEN_TEXT_TAGS, with_tail=False)
+        return ' '.join(node.itertext())
+
+
+class SelectolaxBackend(ParserBackend):
+    """selectolax（lexbor/modest，C实现，最快）"""
+    name = 'selectolax'
+
+    def parse(self, html: str):
+        return SelectolaxParser(html)
+
+    def elements(self, root):
+        if root.root is None:
+            return
+        for node in root.root.traverse(include_text=False):
+            yield node.tag, node
+
+    def attr(self, node, name):
+        attributes = node.attributes
+        if name not in attributes:
+            return None
+        return attributes[name] or ''
+
+    def text(self, node):
+        return node.text(deep=True)
+
+    def visible_text(self, node):
+        node.strip_tags(list(HIDDEN_TEXT_TAGS))
+        return node.text(deep=True, separator=' ')
+
+
+def available_backends() -> List[str]:
+    """已安装的解析器后端，按速度从快到慢排列"""
+    names = []
+    if SelectolaxParser is not None:
+        names.append(SelectolaxBackend.name)
+    if lxml is not None:
+        names.append(LxmlBackend.name)
+    names.append(HtmlParserBackend.name)
+    return names
+
+
+def get_backend(name: Optional[str] = None) -> ParserBackend:
+    """按名称获取解析器后端，未指定时使用已安装的最快后端"""
+    backends = {
+        SelectolaxBackend.name: SelectolaxBackend,
+        LxmlBackend.name: LxmlBackend,
+        HtmlParserBackend.name: HtmlParserBackend,
+    }
+    installed = available_backends()
+    if name is None:
+        name = installed[0]
+    if name not in backends:
+        raise ValueError(f"未知的解析器后端: {name} (可选: {', '.join(backends)})")
+    if name not in installed:
+        raise ValueError(f"解析器后端 {name} 未安装")
+    return backends[name]()
+
+
+def build_page_index(html: str, backend: Optional[ParserBackend] = None, plan=None,
+                     body_text: bool = True) -> PageIndex:
+    """解析页面并遍历一次DOM，构建页面索引；plan为规则引擎的遍历计划（seo_rules.TraversalPlan）
+
+    body_text为False时不提取<body>文本（只有重复内容检测使用，提取整个正文的开销与解析相当）。
+    """
+    backend = backend or get_backend()
+    attr = backend.attr
+    text = backend.text
+    index = PageIndex()
+    body = None
+    visitors = plan.visitors if plan is not None else {}
+    if plan is not None:
+        index.matches = plan.new_state()
+
+    for name, node in backend.elements(backend.parse(html)):
+        visit = visitors.get(name)
+        if visit is not None:
+            visit(node, attr, text, index.matches)
+
+        if name == 'meta':
+            # 同名meta只记录第一个，与soup.find的行为一致
+            content = attr(node, 'content') or ''
+            meta_name = attr(node, 'name')
+            if meta_name is not None:
+                index.meta_names.setdefault(meta_name, content)
+            meta_property = attr(node, 'property')
+            if meta_property is not None:
+                index.meta_properties.setdefault(meta_property, content)
+
+        elif name in HEADING_LEVELS:
+            index.headings.append((HEADING_LEVELS[name], text(node).strip()))
+
+        elif name == 'img':
+            index.images.append(ImageRef(attr(node, 'src') or '', attr(node, 'alt') or '',
+                                         attr(node, 'loading') or ''))
+
+        elif name == 'a':
+            href = attr(node, 'href')
+            if href is not None:
+                index.links.append(LinkRef(href, text(node).strip()))
+
+        elif name == 'link':
+            rel = (attr(node, 'rel') or '').split()
+            if 'stylesheet' in rel:
+                index.stylesheets.append(StylesheetRef(attr(node, 'href') or '', attr(node, 'media') or ''))
+            elif 'preload' in rel and (attr(node, 'as') or '').lower() == 'font' and attr(node, 'href'):
+                index.fonts.append(attr(node, 'href'))
+
+        elif name == 'script':
+            src = attr(node, 'src')
+            if src:
+                index.scripts.append(src)
+
+        elif name == 'style':
+            index.style_blocks += 1
+
+        elif name == 'body':
+            if body is None:
+                body = node
+
+        elif name == 'title':
+            if index.title is None:
+                index.title = text(node).strip()
+
+    if body_text and body is not None:
+        index.body_text = backend.visible_text(body)
+    return index
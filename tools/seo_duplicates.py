@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 重复内容检测
+
+跨页面检查：Title或Meta Description完全相同的页面，以及正文几乎相同的页面。
+每个页面只保存三个64位指纹（Title哈希、描述哈希、正文SimHash），不保存文本，
+100万个页面的指纹约占28MB，查找重复时临时再占用约100MB。
+
+完全重复：按哈希值排序，相邻的相同值为一组，O(n log n)。
+近似重复：正文按3词片段计算64位SimHash，片段重合度高的页面指纹的海明距离很小。
+指纹分成5段，海明距离不超过3的两个指纹至少有两段完全相同（鸽巢原理）。
+对每一种两段组合（共10种）按这两段的值排序，只比较值相同的相邻页面（LSH分段），
+两段共约26位，随机页面几乎不会落在同一组，总耗时约为O(n log n)，不需要两两比较所有页面。
+"""
+
+import hashlib
+import re
+from array import array
+from itertools import combinations
+from dataclasses import dataclass
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+# 正文少于这么多词时不计算SimHash（过短的页面容易误判为重复）
+MIN_CONTENT_TOKENS = 50
+# 海明距离不超过这个值视为近似重复（64位指纹中约95%的位相同）
+NEAR_DUPLICATE_DISTANCE = 3
+# LSH分段数：至少有 SIMHASH_BANDS - NEAR_DUPLICATE_DISTANCE 段完全相同，按其中2段分组
+SIMHASH_BANDS = 5
+_BAND_MASKS = [((1 << 13) - 1) << (13 * band) for band in range(SIMHASH_BANDS)]  # 13+13+13+13+12位
+_BAND_KEYS = [first | second for first, second in combinations(_BAND_MASKS, 2)]
+# 分组内的页面很多且互不相似时（例如共用模板的页面），每组最多保留的代表页面数
+MAX_BUCKET_LEADERS = 64
+
+# 中日韩文字每个字作为一个词，其他文字按字母数字连续串切分
+_TOKEN = re.compile(r'[\u3040-\u30ff\u3400-\u9fff\uac00-\ud7af]|[^\W_]+')
+_MASK_64 = (1 << 64) - 1
+_MIX_1 = 0x9E3779B97F4A7C15
+_MIX_2 = 0xC2B2AE3D27D4EB4F
+# 按位统计：第b位为1的字节映射为1，否则为0
+_BIT_TABLES = [bytes((value >> bit) & 1 for value in range(256)) for bit in range(8)]
+
+
+class PageFingerprint(NamedTuple):
+    """页面指纹，0表示没有（缺少Title/描述，或正文过短）"""
+    title: int
+    description: int
+    content: int
+
+
+@dataclass
+class DuplicateStats:
+    """重复内容检测统计"""
+    pages: int = 0
+    title_groups: int = 0
+    description_groups: int = 0
+    content_groups: int = 0
+    comparisons: int = 0  # 近似重复检测中比较的指纹对数
+
+
+def _hash64(text: str) -> int:
+    return int.from_bytes(hashlib.blake2b(text.encode('utf-8'), digest_size=8).digest(), 'big')
+
+
+def text_hash(text: Optional[str]) -> int:
+    """忽略大小写和空白差异的64位哈希，空文本为0"""
+    text = ' '.join((text or '').split()).casefold()
+    if not text:
+        return 0
+    return _hash64(text) or 1
+
+
+def simhash(text: str) -> int:
+    """正文的64位SimHash（3词片段），词数太少时为0"""
+    tokens = _TOKEN.findall(text.casefold())
+    if len(tokens) < MIN_CONTENT_TOKENS:
+        return 0
+    # 每个不同的词只哈希一次，片段哈希由三个词的哈希组合得到（与位置有关）
+    token_hashes = {token: _hash64(token) for token in set(tokens)}
+    hashes = list(map(token_hashes.__getitem__, tokens))
+    shingles = set(zip(hashes, hashes[1:], hashes[2:]))
+    data = array('Q', [(first * _MIX_1 ^ second * _MIX_2 ^ third) & _MASK_64
+                       for first, second, third in shingles]).tobytes()
+
+    # 每一位取多数：按字节位置切片，用translate+count在C中统计该位为1的片段数
+    half = len(shingles) / 2
+    value = 0
+    for position in range(8):
+        column = data[position::8]
+        for bit in range(8):
+            if column.translate(_BIT_TABLES[bit]).count(1) > half:
+                value |= 1 << (position * 8 + bit)
+    return value or 1
+
+
+def page_fingerprint(page) -> PageFingerprint:
+    """从页面索引计算指纹"""
+    return PageFingerprint(
+        title=text_hash(page.title),
+        description=text_hash(page.meta_names.get('description')),
+        content=simhash(page.body_text),
+    )
+
+
+class DuplicateDetector:
+    """收集页面指纹，分析结束后找出重复的页面组
+
+    页面用调用方的编号表示（例如IssueStore的页面编号），这里不保存URL。
+    """
+
+    def __init__(self):
+        self.stats = DuplicateStats()
+        self._pages = array('i')
+        self._columns = {'title': array('Q'), 'description': array('Q'), 'content': array('Q')}
+
+    def add(self, page_id: int, fingerprint: PageFingerprint) -> None:
+        self._pages.append(page_id)
+        for name, column in self._columns.items():
+            column.append(getattr(fingerprint, name))
+        self.stats.pages += 1
+
+    def exact_groups(self, name: str) -> List[List[int]]:
+        """Title或描述完全相同的页面组（页面编号，按添加顺序）"""
+        column = self._columns[name]
+        order = sorted((row for row in range(len(column)) if column[row]), key=column.__getitem__)
+        groups = []
+        start = 0
+        for end in range(1, len(order) + 1):
+            if end == len(order) or column[order[end]] != column[order[start]]:
+                if end - start > 1:
+                    groups.append(sorted(order[start:end]))
+                start = end
+        groups.sort()
+        setattr(self.stats, f'{name}_groups', len(groups))
+        return [[self._pages[row] for row in rows] for rows in groups]
+
+    def near_duplicate_groups(self) -> List[List[int]]:
+        """正文几乎相同的页面组（页面编号，按添加顺序）"""
+        signatures = self._columns['content']
+        rows = [row for row in range(len(signatures)) if signatures[row]]
+        parent = array('i', range(len(signatures)))
+        comparisons = 0
+
+        def find(row: int) -> int:
+            while parent[row] != row:
+                parent[row] = parent[parent[row]]
+                row = parent[row]
+            return row
+
+        # 每一种两段组合：按这两段的值排序，值相同的页面与组内已有的代表页面比较，相似则合并
+        for mask in _BAND_KEYS:
+            order = sorted(rows, key=lambda row: signatures[row] & mask)
+            leaders: List[int] = []
+            bucket = None
+            for row in order:
+                signature = signatures[row]
+                if signature & mask != bucket:
+                    bucket = signature & mask
+                    leaders = [row]
+                    continue
+                for leader in leaders:
+                    comparisons += 1
+                    if bin(signature ^ signatures[leader]).count('1') <= NEAR_DUPLICATE_DISTANCE:
+                        root, other = find(row), find(leader)
+                        if root != other:
+                            parent[max(root, other)] = min(root, other)
+                        break
+                else:
+                    if len(leaders) < MAX_BUCKET_LEADERS:
+                        leaders.append(row)
+
+        # 每组的根是组内最小的行号，只为不是根的行建立分组
+        groups: Dict[int, List[int]] = {}
+        for row in rows:
+            root = find(row)
+            if root != row:
+                groups.setdefault(root, [root]).append(row)
+        found = sorted(groups.values())
+        self.stats.content_groups = len(found)
+        self.stats.comparisons = comparisons
+        return [[self._pages[row] for row in group] for group in found]
+
+    def groups(self) -> Iterator[Tuple[str, List[int]]]:
+        """所有重复组：(类型, 页面编号列表)，类型为 title / description / content"""
+        for name in ('title', 'description'):
+            for group in self.exact_groups(name):
+                yield name, group
+        for group in self.near_duplicate_groups():
+            yield 'content', group
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 多网站批量运行
+
+把网站分配到进程池中分析：CPU密集的解析和检查用满所有CPU核心，
+每个工作进程内部仍然并发抓取页面。结果按完成顺序逐个返回，
+由调用方汇总输出；最后生成包含每个网站耗时的汇总。
+"""
+
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class SiteTiming:
+    """单个网站的运行情况"""
+    site: str
+    elapsed: float
+    pages: int = 0
+    issues: int = 0
+    highest_severity: Optional[str] = None
+    truncated: bool = False
+    error: Optional[str] = None
+
+
+@dataclass
+class FleetSummary:
+    """批量运行汇总"""
+    processes: int
+    started_at: float = field(default_factory=time.perf_counter)
+    finished_at: float = 0.0
+    sites: List[SiteTiming] = field(default_factory=list)
+
+    @property
+    def elapsed(self) -> float:
+        """总耗时（秒）"""
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def total_pages(self) -> int:
+        return sum(site.pages for site in self.sites)
+
+    @property
+    def failed(self) -> int:
+        return sum(1 for site in self.sites if site.error)
+
+    def to_dict(self) -> dict:
+        """导出为可序列化的汇总"""
+        return {
+            'processes': self.processes,
+            'sites': len(self.sites),
+            'failed': self.failed,
+            'truncated': sum(1 for site in self.sites if site.truncated),
+            'total_pages': self.total_pages,
+            'elapsed_seconds': round(self.elapsed, 3),
+            'pages_per_second': round(self.total_pages / self.elapsed, 3) if self.elapsed > 0 else 0.0,
+            'site_timings': [
+                {'site': site.site, 'elapsed_seconds': round(site.elapsed, 3), 'pages': site.pages,
+                 'issues': site.issues, 'highest_severity': site.highest_severity,
+                 'truncated': site.truncated, 'error': site.error}
+                for site in self.sites
+            ],
+        }
+
+    def format_table(self, limit: int = 20) -> str:
+        """按耗时从长到短输出网站耗时表"""
+        lines = [
+            f"🚀 批量分析完成: {len(self.sites)} 个网站 ({self.failed} 个失败), "
+            f"{self.total_pages} 个页面, 耗时 {self.elapsed:.1f} 秒, {self.processes} 个进程",
+            f"   {'耗时(秒)':>8}  {'页面':>6}  {'问题':>6}  网站",
+        ]
+        for site in sorted(self.sites, key=lambda s: s.elapsed, reverse=True)[:limit]:
+            flag = ' ⏱️' if site.truncated else (' ❌' if site.error else '')
+            lines.append(f"   {site.elapsed:>8.1f}  {site.pages:>6}  {site.issues:>6}  {site.site}{flag}")
+        return '\n'.join(lines)
+
+
+def _run_site(task: Callable[[str, Any], dict], site: str, options: Any) -> Tuple[dict, float]:
+    """在工作进程中分析一个网站，返回 (结果, 耗时)"""
+    started = time.perf_counter()
+    try:
+        result = task(site, options)
+    except Exception as e:
+        result = {'site': site, 'error': str(e), 'highest_severity': None}
+    return result, time.perf_counter() - started
+
+
+def _timing(site: str, result: dict, elapsed: float) -> SiteTiming:
+    stats = result.get('stats', {})
+    return SiteTiming(
+        site=site,
+        elapsed=elapsed,
+        pages=stats.get('pages', 0),
+        issues=result.get('issue_count', 0),
+        highest_severity=result.get('highest_severity'),
+        truncated=stats.get('truncated', False),
+        error=result.get('error'),
+    )
+
+
+def run_fleet(sites: Iterable[str], task: Callable[[str, Any], dict], options: Any,
+              processes: int = 1, summary: Optional[FleetSummary] = None) -> Iterator[dict]:
+    """分析多个网站，按完成顺序逐个返回结果
+
+    task(site, options) 在工作进程中执行，必须是模块级函数，options必须可以pickle。
+    task返回的结果只应包含摘要（issue_count为问题数），问题和指标由task自己写入文件，不跨进程传递。
+    processes <= 1 时在当前进程中依次执行。每个网站的时间预算由task自己控制。
+    """
+    summary = summary if summary is not None else FleetSummary(processes=max(1, processes))
+
+    if processes <= 1:
+        for site in sites:
+            result, elapsed = _run_site(task, site, options)
+            summary.sites.append(_timing(site, result, elapsed))
+            yield result
+        summary.finished_at = time.perf_counter()
+        return
+
+    source = iter(sites)
+    window = processes * 2
+    pending = {}
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while True:
+            while len(pending) < window:
+                try:
+                    site = next(source)
+                except StopIteration:
+                    break
+                pending[executor.submit(_run_site, task, site, options)] = site
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                site = pending.pop(future)
+                try:
+                    result, elapsed = future.result()
+                except Exception as e:
+                    # 工作进程异常退出等情况
+                    result = {'site': site, 'error': str(e), 'highest_severity': None}
+                    elapsed = 0.0
+                summary.sites.append(_timing(site, result, elapsed))
+                yield result
+
+    summary.finished_at = time.perf_counter()
@@ -0,0 +1,452 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 运行历史
+
+每次分析结束后把运行、页面、问题和指标写入本地SQLite数据库（WAL模式，分批插入），
+用于跟踪优化效果：两次运行之间新增和已解决的问题、每个页面的指标变化趋势。
+
+问题的身份是“页面 + 问题类型 + 该类型在页面中的第几次出现”，编码为一个64位整数指纹，
+所以数量或长度变化（例如缺少alt的图片从5个变成3个）不算新问题。
+对比两次运行只需要按 (运行, 指纹) 索引查找，耗时与两次运行的问题数成正比，与历史总行数无关。
+抓取范围不同时只比较两次都成功分析的页面，范围变化不会被误报为新增/解决。
+
+命令行用法:
+    python seo_history.py runs https://example.com
+    python seo_history.py diff https://example.com            # 最近一次与上一次运行对比
+    python seo_history.py diff https://example.com --old 3 --new 7
+    python seo_history.py trend https://example.com/about --metric Title长度
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from seo_cache import DEFAULT_CACHE_DIR
+from seo_crawler import normalize_url
+from seo_issues import SEVERITIES, IssueStore, MetricStore
+
+# 每批插入的行数
+INSERT_BATCH = 10_000
+# 问题参数按类型字段顺序存为JSON数组（C编码器，不经过json.dumps的参数处理）
+_encode_params = json.JSONEncoder(separators=(',', ':')).encode
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    site TEXT NOT NULL,
+    started_at TEXT NOT NULL,
+    finished_at TEXT NOT NULL,
+    mode TEXT NOT NULL,
+    ruleset TEXT NOT NULL,
+    truncated INTEGER NOT NULL,
+    pages INTEGER NOT NULL,
+    issues INTEGER NOT NULL,
+    total_impact REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_runs_site ON runs(site, id);
+
+CREATE TABLE IF NOT EXISTS pages (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE
+);
+
+CREATE TABLE IF NOT EXISTS run_pages (
+    run_id INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    PRIMARY KEY (run_id, page_id)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS issue_types (
+    id INTEGER PRIMARY KEY,
+    key TEXT NOT NULL UNIQUE,
+    category TEXT NOT NULL,
+    title TEXT NOT NULL,
+    description TEXT NOT NULL,
+    fields TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS issues (
+    run_id INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    type_id INTEGER NOT NULL,
+    fingerprint INTEGER NOT NULL,
+    severity INTEGER NOT NULL,
+    impact REAL NOT NULL,
+    params TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_issues_run ON issues(run_id, fingerprint, page_id);
+
+CREATE TABLE IF NOT EXISTS metric_names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    unit TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS metrics (
+    run_id INTEGER NOT NULL,
+    page_id INTEGER NOT NULL,
+    name_id INTEGER NOT NULL,
+    value REAL NOT NULL,
+    good INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_metrics_page ON metrics(page_id, name_id, run_id);
+'''
+
+# this运行中有、other运行中没有的问题
+_DIFF_WHERE = '''
+WHERE i.run_id = :this
+  AND NOT EXISTS (SELECT 1 FROM issues o WHERE o.run_id = :other AND o.fingerprint = i.fingerprint)
+'''
+# 两次运行的页面范围不同时，只比较两次都分析过的页面
+_SAME_PAGES = '''
+  AND EXISTS (SELECT 1 FROM run_pages rp WHERE rp.run_id = :other AND rp.page_id = i.page_id)
+'''
+_DIFF_SELECT = '''
+SELECT p.url, t.key, t.category, t.title, t.description, t.fields, i.severity, i.impact, i.params
+FROM issues i
+JOIN pages p ON p.id = i.page_id
+JOIN issue_types t ON t.id = i.type_id
+'''
+
+
+@dataclass
+class RunInfo:
+    """一次运行"""
+    id: int
+    site: str
+    started_at: str
+    finished_at: str
+    mode: str
+    ruleset: str
+    truncated: bool
+    pages: int
+    issues: int
+    total_impact: float
+
+
+@dataclass
+class HistoryIssue:
+    """历史中的一个问题"""
+    page_url: str
+    key: str
+    category: str
+    title: str
+    severity: str
+    impact_score: float
+    description: str
+
+
+@dataclass
+class RunDiff:
+    """两次运行的对比"""
+    old_run: int
+    new_run: int
+    introduced: int = 0
+    resolved: int = 0
+    pages_added: int = 0  # 只在新运行中分析过的页面
+    pages_removed: int = 0  # 只在旧运行中分析过的页面
+
+
+@dataclass
+class MetricPoint:
+    """一个页面指标在某次运行中的值"""
+    run_id: int
+    started_at: str
+    name: str
+    unit: str
+    value: float
+    good: bool
+
+
+def issue_fingerprint(page_id: int, type_id: int, occurrence: int) -> int:
+    """问题身份的64位指纹：页面编号 + 类型编号 + 在页面中第几次出现（编号在数据库中稳定）"""
+    return (page_id << 32) | ((type_id & 0xFFFF) << 16) | min(occurrence, 0xFFFF)
+
+
+def _render(description: str, fields: str, params: str) -> str:
+    try:
+        return description.format(**dict(zip(json.loads(fields), json.loads(params))))
+    except (KeyError, IndexError, ValueError):
+        return description
+
+
+class RunHistory:
+    """运行历史数据库（SQLite，线程安全）"""
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, path: Optional[str] = None):
+        if path is None:
+            os.makedirs(cache_dir, exist_ok=True)
+            path = os.path.join(cache_dir, 'history.sqlite')
+        self.path = path
+        self._lock = threading.Lock()
+
+        # 多个进程（seo_fleet）可能同时写入，等待写锁而不是立即失败
+        self._db = sqlite3.connect(self.path, check_same_thread=False, timeout=60)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._db.commit()
+
+    # 写入
+
+    def _ids(self, table: str, column: str, values: Iterable,
+             extra: Optional[Dict[str, Dict[str, str]]] = None) -> Dict[str, int]:
+        """查询或插入名称表（issue_types/metric_names），返回 值 -> 编号
+
+        extra为新插入行的其他列：值 -> {列名: 列值}
+        """
+        ids = {}
+        for value in values:
+            row = self._db.execute(f'SELECT id FROM {table} WHERE {column} = ?', (value,)).fetchone()
+            if row is not None:
+                ids[value] = row[0]
+                continue
+            columns = {column: value, **(extra or {}).get(value, {})}
+            placeholders = ', '.join('?' * len(columns))
+            cursor = self._db.execute(f'INSERT INTO {table} ({", ".join(columns)}) VALUES ({placeholders})',
+                                      list(columns.values()))
+            ids[value] = cursor.lastrowid
+        return ids
+
+    def _page_ids(self, urls: Iterable[str]) -> Dict[str, int]:
+        """批量查询或插入页面，返回 URL -> 编号"""
+        self._db.execute('CREATE TEMP TABLE IF NOT EXISTS batch_urls (url TEXT PRIMARY KEY)')
+        self._db.execute('DELETE FROM temp.batch_urls')
+        self._db.executemany('INSERT OR IGNORE INTO temp.batch_urls VALUES (?)', ((url,) for url in urls))
+        self._db.execute('INSERT OR IGNORE INTO pages (url) SELECT url FROM temp.batch_urls')
+        return dict(self._db.execute(
+            'SELECT b.url, p.id FROM temp.batch_urls b JOIN pages p ON p.url = b.url'))
+
+    def record_run(self, site: str, started_at: datetime, issues: IssueStore, metrics: MetricStore,
+                   analyzed_pages: Iterable[str], mode: str = 'full', ruleset: str = '',
+                   truncated: bool = False) -> int:
+        """写入一次运行的所有页面、问题和指标，返回运行编号
+
+        analyzed_pages为成功分析的页面；问题和指标从存储的JSONL文件流式读取，分批插入。
+        """
+        site_key = normalize_url(site)
+        catalog = issues.catalog
+        with self._lock, self._db:
+            cursor = self._db.execute(
+                'INSERT INTO runs (site, started_at, finished_at, mode, ruleset, truncated, pages, issues, '
+                'total_impact) VALUES (?, ?, ?, ?, ?, ?, 0, ?, ?)',
+                (site_key, started_at.isoformat(timespec='seconds'),
+                 datetime.now(started_at.tzinfo).isoformat(timespec='seconds'),
+                 mode, ruleset, int(truncated), len(issues), issues.total_impact))
+            run_id = cursor.lastrowid
+
+            # 原始URL -> 页面编号（跨运行按规范化URL匹配）；站点级问题和指标归到网站首页
+            raw_urls = set(issues.pages)
+            raw_urls.update(analyzed_pages)
+            normalized = {url: normalize_url(url) for url in raw_urls}
+            ids = self._page_ids(set(normalized.values()) | {site_key})
+            page_ids = {url: ids[key] for url, key in normalized.items()}
+            site_page = ids[site_key]
+            store_pages = [page_ids[url] for url in issues.pages]
+
+            analyzed = {page_ids[url] for url in analyzed_pages}
+            self._db.execute('UPDATE runs SET pages = ? WHERE id = ?', (len(analyzed), run_id))
+            self._db.executemany('INSERT INTO run_pages VALUES (?, ?)',
+                                 ((run_id, page_id) for page_id in sorted(analyzed | {site_page})))
+
+            used_types = sorted(issues.type_counts)
+            type_ids = self._ids('issue_types', 'key', [catalog.types[t].key for t in used_types], {
+                catalog.types[t].key: {'category': catalog.types[t].category, 'title': catalog.types[t].title,
+                                       'description': catalog.types[t].description,
+                                       'fields': json.dumps(catalog.fields[t])}
+                for t in used_types})
+            type_map = {t: type_ids[catalog.types[t].key] for t in used_types}
+            severities = {severity: code for code, severity in enumerate(SEVERITIES)}
+
+            def issue_rows():
+                occurrences: Dict[Tuple[int, int], int] = {}
+                for record in issues.iter_records():
+                    page_id = store_pages[record.page_id] if record.page_id >= 0 else site_page
+                    type_id = type_map[record.type_id]
+                    occurrence = occurrences.get((page_id, type_id), 0)
+                    occurrences[(page_id, type_id)] = occurrence + 1
+                    yield (run_id, page_id, type_id, issue_fingerprint(page_id, type_id, occurrence),
+                           severities.get(record.severity, len(SEVERITIES)), record.impact_score,
+                           _encode_params(record.params))
+
+            self._insert_batches('INSERT INTO issues VALUES (?, ?, ?, ?, ?, ?, ?)', issue_rows())
+
+            name_ids = self._ids('metric_names', 'name', list(metrics.summaries), {
+                name: {'unit': summary.unit} for name, summary in metrics.summaries.items()})
+
+            def metric_rows():
+                for metric in metrics:
+                    page_id = page_ids.get(metric.page_url, site_page) if metric.page_url else site_page
+                    yield (run_id, page_id, name_ids[metric.name], float(metric.current_value),
+                           int(metric.status == 'good'))
+
+            self._insert_batches('INSERT INTO metrics VALUES (?, ?, ?, ?, ?)', metric_rows())
+        return run_id
+
+    def _insert_batches(self, sql: str, rows: Iterator[tuple]) -> None:
+        batch = []
+        for row in rows:
+            batch.append(row)
+            if len(batch) >= INSERT_BATCH:
+                self._db.executemany(sql, batch)
+                batch = []
+        if batch:
+            self._db.executemany(sql, batch)
+
+    # 查询
+
+    def runs(self, site: str, limit: int = 20) -> List[RunInfo]:
+        """网站最近的运行（从新到旧）"""
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM runs WHERE site = ? ORDER BY id DESC LIMIT ?',
+                                    (normalize_url(site), limit)).fetchall()
+        return [RunInfo(*row[:6], bool(row[6]), *row[7:]) for row in rows]
+
+    def previous_run(self, run_id: int) -> Optional[int]:
+        """同一网站、同一检查模式的上一次完整运行（没有因时间预算被截断）"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT p.id FROM runs r JOIN runs p ON p.site = r.site AND p.mode = r.mode '
+                'WHERE r.id = ? AND p.id < r.id AND p.truncated = 0 ORDER BY p.id DESC LIMIT 1',
+                (run_id,)).fetchone()
+        return row[0] if row else None
+
+    def _pages_only_in(self, this: int, other: int) -> int:
+        """只在this运行中分析过的页面数"""
+        return self._db.execute(
+            'SELECT COUNT(*) FROM run_pages a WHERE a.run_id = ? AND NOT EXISTS '
+            '(SELECT 1 FROM run_pages b WHERE b.run_id = ? AND b.page_id = a.page_id)', (this, other)).fetchone()[0]
+
+    def _diff_where(self, this: int, other: int) -> str:
+        if self._pages_only_in(this, other):
+            return _DIFF_WHERE + _SAME_PAGES
+        return _DIFF_WHERE
+
+    def diff(self, old_run: int, new_run: int) -> RunDiff:
+        """两次运行之间新增和已解决的问题数"""
+        with self._lock:
+            result = RunDiff(old_run=old_run, new_run=new_run,
+                             pages_added=self._pages_only_in(new_run, old_run),
+                             pages_removed=self._pages_only_in(old_run, new_run))
+            for field_name, this, other, pages_differ in (('introduced', new_run, old_run, result.pages_added),
+                                                          ('resolved', old_run, new_run, result.pages_removed)):
+                where = _DIFF_WHERE + (_SAME_PAGES if pages_differ else '')
+                count = self._db.execute(f'SELECT COUNT(*) FROM issues i {where}',
+                                         {'this': this, 'other': other}).fetchone()[0]
+                setattr(result, field_name, count)
+        return result
+
+    def _diff_issues(self, this: int, other: int, limit: Optional[int]) -> List[HistoryIssue]:
+        with self._lock:
+            sql = _DIFF_SELECT + self._diff_where(this, other) + ' ORDER BY i.impact DESC'
+            if limit:
+                sql += f' LIMIT {int(limit)}'
+            rows = self._db.execute(sql, {'this': this, 'other': other}).fetchall()
+        return [HistoryIssue(url, key, category, title,
+                             SEVERITIES[severity] if severity < len(SEVERITIES) else 'low',
+                             impact, _render(description, fields, params))
+                for url, key, category, title, description, fields, severity, impact, params in rows]
+
+    def introduced(self, old_run: int, new_run: int, limit: Optional[int] = None) -> List[HistoryIssue]:
+        """新运行中新出现的问题（按影响分从高到低）"""
+        return self._diff_issues(new_run, old_run, limit)
+
+    def resolved(self, old_run: int, new_run: int, limit: Optional[int] = None) -> List[HistoryIssue]:
+        """旧运行中存在、新运行中已解决的问题（按影响分从高到低）"""
+        return self._diff_issues(old_run, new_run, limit)
+
+    def metric_trend(self, page_url: str, name: Optional[str] = None, limit: int = 50) -> List[MetricPoint]:
+        """页面指标在各次运行中的值（从旧到新）"""
+        sql = ('SELECT m.run_id, r.started_at, n.name, n.unit, m.value, m.good FROM metrics m '
+               'JOIN pages p ON p.id = m.page_id JOIN metric_names n ON n.id = m.name_id '
+               'JOIN runs r ON r.id = m.run_id WHERE p.url = ?')
+        params: list = [normalize_url(page_url)]
+        if name:
+            sql += ' AND n.name = ?'
+            params.append(name)
+        sql += ' ORDER BY n.name, m.run_id DESC LIMIT ?'
+        params.append(limit)
+        with self._lock:
+            rows = self._db.execute(sql, params).fetchall()
+        points = [MetricPoint(run_id, started_at, metric, unit, value, bool(good))
+                  for run_id, started_at, metric, unit, value, good in rows]
+        return sorted(points, key=lambda point: (point.name, point.run_id))
+
+    def close(self) -> None:
+        """关闭数据库"""
+        with self._lock:
+            self._db.close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description='SEO Agent 运行历史查询')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help=f'缓存目录 (默认: {DEFAULT_CACHE_DIR})')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    runs = commands.add_parser('runs', help='列出网站最近的运行')
+    runs.add_argument('site')
+    runs.add_argument('-n', type=int, default=20, help='显示的运行数 (默认: 20)')
+
+    diff = commands.add_parser('diff', help='两次运行之间新增和已解决的问题')
+    diff.add_argument('site')
+    diff.add_argument('--old', type=int, help='旧运行编号 (默认: 新运行的上一次运行)')
+    diff.add_argument('--new', type=int, help='新运行编号 (默认: 最近一次运行)')
+    diff.add_argument('-n', type=int, default=20, help='每类最多显示的问题数 (默认: 20)')
+
+    trend = commands.add_parser('trend', help='页面指标的变化趋势')
+    trend.add_argument('page_url')
+    trend.add_argument('--metric', help='只显示这个指标')
+    args = parser.parse_args(argv)
+
+    history = RunHistory(args.cache_dir)
+    try:
+        if args.command == 'runs':
+            for run in history.runs(args.site, args.n):
+                flag = ' (已截断)' if run.truncated else ''
+                print(f"#{run.id}  {run.started_at}  {run.mode}  {run.pages} 个页面  "
+                      f"{run.issues} 个问题  影响分 {run.total_impact:.1f}{flag}")
+
+        elif args.command == 'diff':
+            new_run = args.new
+            if new_run is None:
+                latest = history.runs(args.site, 1)
+                if not latest:
+                    print(f"❌ 没有 {args.site} 的运行记录")
+                    return 1
+                new_run = latest[0].id
+            old_run = args.old or history.previous_run(new_run)
+            if old_run is None:
+                print(f"ℹ️  运行 #{new_run} 之前没有可对比的运行")
+                return 1
+            result = history.diff(old_run, new_run)
+            print(f"📊 运行 #{old_run} → #{new_run}: 新增 {result.introduced} 个问题, "
+                  f"已解决 {result.resolved} 个问题 (新增页面 {result.pages_added}, "
+                  f"不再分析的页面 {result.pages_removed})")
+            for label, issues in (("🆕 新增", history.introduced(old_run, new_run, args.n)),
+                                  ("✅ 已解决", history.resolved(old_run, new_run, args.n))):
+                if issues:
+                    print(f"\n{label}:")
+                for issue in issues:
+                    print(f"   [{issue.severity}] {issue.title} - {issue.page_url}: {issue.description}")
+
+        elif args.command == 'trend':
+            current = None
+            for point in history.metric_trend(args.page_url, args.metric):
+                if point.name != current:
+                    current = point.name
+                    print(f"\n📈 {point.name}:")
+                status = '✅' if point.good else '⚠️ '
+                print(f"   #{point.run_id}  {point.started_at}  {point.value:g}{point.unit} {status}")
+    finally:
+        history.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
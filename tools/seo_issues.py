@@ -0,0 +1,562 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 问题和指标存储
+
+问题和指标产生后立即追加写入JSONL文件，内存中只保留在线汇总：
+按严重程度/类别的问题数、总影响分、每个指标的计数/总和/最小值/最大值/达标数。
+问题的文本不驻留内存，报告从JSONL文件流式读取生成；每个问题在内存中只占几十字节的
+列和倒排索引，用于分组计数、筛选和按影响分排序。
+
+问题类型（类别、标题、建议、代码方案等不变的文本）在问题目录中只定义一次，
+每次出现只记录紧凑的IssueRecord：类型编号、页面编号、严重程度、影响分和格式化参数。
+描述和代码方案在生成报告时才渲染为SEOIssue。
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import os
+import string
+import sys
+import tempfile
+import weakref
+from array import array
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+
+@dataclass
+class SEOIssue:
+    """SEO问题描述"""
+    category: str
+    severity: str  # critical, high, medium, low
+    title: str
+    description: str
+    recommendation: str
+    code_solution: Optional[str] = None
+    impact_score: float = 0.0
+    page_url: Optional[str] = None  # 问题所在页面，站点级问题为空
+
+
+@dataclass
+class SEOMetric:
+    """SEO指标"""
+    name: str
+    current_value: float
+    target_value: float
+    unit: str
+    status: str  # good, warning, critical
+    page_url: Optional[str] = None  # 指标所属页面
+
+
+SEVERITIES = ['critical', 'high', 'medium', 'low']
+
+
+@dataclass(frozen=True)
+class IssueType:
+    """问题类型：同一类型的所有问题共享的文本
+
+    description和code_solution是str.format模板，字段值由每次出现的参数提供。
+    """
+    key: str
+    category: str
+    severity: str
+    title: str
+    description: str
+    recommendation: str
+    impact_score: float
+    code_solution: Optional[str] = None
+
+
+class IssueRecord:
+    """一次问题出现的紧凑记录"""
+
+    __slots__ = ('type_id', 'page_id', 'severity', 'impact_score', 'params')
+
+    def __init__(self, type_id: int, severity: str, impact_score: float,
+                 params: Tuple = (), page_id: int = -1):
+        self.type_id = type_id
+        self.page_id = page_id  # -1 表示站点级问题
+        self.severity = severity
+        self.impact_score = impact_score
+        self.params = params  # 按模板字段顺序排列的参数值
+
+
+def _template_fields(*templates: Optional[str]) -> Tuple[str, ...]:
+    """模板中出现的字段名（按首次出现顺序）"""
+    fields: List[str] = []
+    for template in templates:
+        for _, name, _, _ in string.Formatter().parse(template or ''):
+            if name and name not in fields:
+                fields.append(name)
+    return tuple(fields)
+
+
+def _escape(text: Optional[str]) -> Optional[str]:
+    """把普通文本转换为不含字段的模板"""
+    return text.replace('{', '{{').replace('}', '}}') if text is not None else None
+
+
+class IssueCatalog:
+    """问题类型目录：类型编号在进程内稳定，跨进程/跨运行使用key"""
+
+    def __init__(self, types: Iterable[IssueType] = ()):
+        self.types: List[IssueType] = []
+        self.fields: List[Tuple[str, ...]] = []
+        self.ids: Dict[str, int] = {}
+        for issue_type in types:
+            self.register(issue_type)
+
+    def register(self, issue_type: IssueType) -> int:
+        """注册问题类型，返回类型编号"""
+        if issue_type.key in self.ids:
+            raise ValueError(f"重复的问题类型: {issue_type.key}")
+        self.ids[issue_type.key] = len(self.types)
+        self.types.append(issue_type)
+        self.fields.append(_template_fields(issue_type.description, issue_type.code_solution))
+        return self.ids[issue_type.key]
+
+    def record(self, key: str, severity: Optional[str] = None,
+               impact_score: Optional[float] = None, **params: Any) -> IssueRecord:
+        """按类型key创建一次问题出现的记录，params为模板字段值"""
+        type_id = self.ids[key]
+        issue_type = self.types[type_id]
+        values = tuple(params[name] for name in self.fields[type_id])
+        return IssueRecord(type_id,
+                           severity or issue_type.severity,
+                           issue_type.impact_score if impact_score is None else impact_score,
+                           values)
+
+    @property
+    def digest(self) -> str:
+        """问题类型严重程度和影响分的指纹
+
+        检查结果缓存中的记录保存了严重程度和影响分，目录中的默认值变化时缓存失效；
+        其他文本在生成报告时才从目录渲染，不影响缓存。运行中注册的临时类型不计入。
+        """
+        defaults = [(issue_type.key, issue_type.severity, issue_type.impact_score)
+                    for issue_type in self.types if not issue_type.key.startswith('adhoc\0')]
+        text = json.dumps(defaults, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def adopt(self, issue: SEOIssue) -> IssueRecord:
+        """把直接构造的SEOIssue转换为紧凑记录，不在目录中的文本组合注册为临时类型"""
+        key = '\0'.join(['adhoc', issue.category, issue.title, issue.recommendation,
+                          issue.code_solution or ''])
+        if key not in self.ids:
+            self.register(IssueType(
+                key=key,
+                category=issue.category,
+                severity=issue.severity,
+                title=issue.title,
+                description='{description}',
+                recommendation=issue.recommendation,
+                impact_score=issue.impact_score,
+                code_solution=_escape(issue.code_solution),
+            ))
+        type_id = self.ids[key]
+        return IssueRecord(type_id, issue.severity, issue.impact_score, (issue.description,))
+
+    def render(self, record: IssueRecord, page_url: Optional[str] = None) -> SEOIssue:
+        """把记录渲染为完整的SEOIssue"""
+        issue_type = self.types[record.type_id]
+        params = dict(zip(self.fields[record.type_id], record.params))
+        code_solution = issue_type.code_solution
+        return SEOIssue(
+            category=issue_type.category,
+            severity=record.severity,
+            title=issue_type.title,
+            description=issue_type.description.format(**params),
+            recommendation=issue_type.recommendation,
+            code_solution=code_solution.format(**params) if code_solution is not None else None,
+            impact_score=record.impact_score,
+            page_url=page_url,
+        )
+
+    def to_row(self, record: IssueRecord) -> list:
+        """可序列化的记录（使用类型key，不依赖进程内的类型编号）"""
+        return [self.types[record.type_id].key, record.severity, record.impact_score, list(record.params)]
+
+    def from_row(self, row: list) -> IssueRecord:
+        key, severity, impact_score, params = row
+        return IssueRecord(self.ids[key], sys.intern(severity), impact_score, tuple(params))
+
+
+class _JsonlSink:
+    """只追加的JSONL文件；未指定路径时使用临时文件，对象回收时删除
+
+    write返回记录所在行的字节偏移，可以用read_at随机读取单条记录。
+    """
+
+    def __init__(self, path: Optional[str] = None, prefix: str = 'seo_'):
+        if path:
+            self.path = path
+        else:
+            fd, self.path = tempfile.mkstemp(prefix=prefix, suffix='.jsonl')
+            os.close(fd)
+            self._cleanup = weakref.finalize(self, _remove_file, self.path)
+        self._file = open(self.path, 'wb')
+        self._reader = None
+        self.size = 0
+
+    def write(self, record) -> int:
+        """追加一条记录，返回其字节偏移"""
+        line = json.dumps(record, ensure_ascii=False).encode('utf-8') + b'\n'
+        offset = self.size
+        self._file.write(line)
+        self.size += len(line)
+        return offset
+
+    def read(self) -> Iterator[Any]:
+        """从头流式读取所有记录"""
+        self._file.flush()
+        with open(self.path, 'rb') as f:
+            for line in f:
+                yield json.loads(line)
+
+    def read_at(self, offset: int) -> Any:
+        """读取指定偏移处的记录"""
+        self._file.flush()
+        if self._reader is None:
+            self._reader = open(self.path, 'rb')
+        self._reader.seek(offset)
+        return json.loads(self._reader.readline())
+
+    def truncate(self) -> None:
+        self._file.seek(0)
+        self._file.truncate()
+        self.size = 0
+
+    def close(self) -> None:
+        self._file.close()
+        if self._reader is not None:
+            self._reader.close()
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+@dataclass
+class MetricSummary:
+    """同名指标的在线汇总"""
+    name: str
+    unit: str
+    target_value: float
+    count: int = 0
+    total: float = 0.0
+    minimum: float = float('inf')
+    maximum: float = float('-inf')
+    good: int = 0
+    last_status: str = ''
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def add(self, metric: SEOMetric) -> None:
+        value = metric.current_value
+        self.count += 1
+        self.total += value
+        self.minimum = min(self.minimum, value)
+        self.maximum = max(self.maximum, value)
+        self.last_status = metric.status
+        if metric.status == 'good':
+            self.good += 1
+
+
+class IssueStore:
+    """SEO问题存储：追加写入JSONL，在线维护汇总和索引
+
+    兼容原来List[SEOIssue]的常用操作：append/extend/clear/len/迭代（迭代时渲染为SEOIssue）。
+    文件中每行是一条紧凑记录 [类型编号, 页面编号, 严重程度, 影响分, 参数]，
+    类型文本在目录中，页面URL在页面表中。
+
+    内存中按行号维护列（字节偏移、类型、页面、严重程度、影响分）和两个倒排索引：
+    (影响分, 类型, 严重程度) -> 行号 和 页面 -> 行号。分组计数为O(1)，
+    按严重程度/类别/类型/页面筛选和取影响分最高的前N个，代价只与结果数成正比。
+    """
+
+    # 每个类别在汇总中保留的示例问题标题数
+    SAMPLE_TITLES = 3
+
+    def __init__(self, path: Optional[str] = None, catalog: Optional[IssueCatalog] = None):
+        self._sink = _JsonlSink(path, prefix='seo_issues_')
+        self.catalog = catalog or IssueCatalog()
+        self._reset()
+
+    def _reset(self) -> None:
+        self.total_impact = 0.0
+        self.severity_counts: Counter = Counter()
+        self.category_counts: Counter = Counter()  # 按首次出现顺序
+        self.type_counts: Counter = Counter()
+        self.category_samples: Dict[str, List[str]] = {}
+        # 页面表：页面编号 -> URL
+        self.pages: List[str] = []
+        self._page_ids: Dict[str, int] = {}
+        # 严重程度编号
+        self._severity_names: List[str] = []
+        self._severity_codes: Dict[str, int] = {}
+
+        # 列：行号 -> 值
+        self._offsets = array('q')
+        self._type_col = array('I')
+        self._page_col = array('i')
+        self._severity_col = array('B')
+        self._impact_col = array('d')
+
+        # 倒排索引：值 -> 行号（升序）
+        self._by_group: Dict[Tuple[float, int, int], array] = {}
+        self._by_page: Dict[int, array] = {}
+
+    @property
+    def path(self) -> str:
+        """JSONL文件路径"""
+        return self._sink.path
+
+    def page_id(self, url: Optional[str]) -> int:
+        """页面URL对应的编号，站点级问题为-1"""
+        if url is None:
+            return -1
+        page_id = self._page_ids.get(url)
+        if page_id is None:
+            page_id = self._page_ids[url] = len(self.pages)
+            self.pages.append(url)
+        return page_id
+
+    def _severity_code(self, severity: str) -> int:
+        code = self._severity_codes.get(severity)
+        if code is None:
+            code = self._severity_codes[severity] = len(self._severity_names)
+            self._severity_names.append(severity)
+        return code
+
+    def add(self, record: IssueRecord, page_url: Optional[str] = None) -> None:
+        """写入一条问题记录，更新汇总和索引"""
+        if page_url is not None:
+            record.page_id = self.page_id(page_url)
+        offset = self._sink.write([record.type_id, record.page_id, record.severity,
+                                   record.impact_score, record.params])
+        issue_type = self.catalog.types[record.type_id]
+        severity_code = self._severity_code(record.severity)
+        row = len(self._offsets)
+
+        self._offsets.append(offset)
+        self._type_col.append(record.type_id)
+        self._page_col.append(record.page_id)
+        self._severity_col.append(severity_code)
+        self._impact_col.append(record.impact_score)
+        _posting(self._by_group, (record.impact_score, record.type_id, severity_code)).append(row)
+        _posting(self._by_page, record.page_id).append(row)
+
+        self.total_impact += record.impact_score
+        self.severity_counts[record.severity] += 1
+        self.category_counts[issue_type.category] += 1
+        self.type_counts[record.type_id] += 1
+        samples = self.category_samples.setdefault(issue_type.category, [])
+        if len(samples) < self.SAMPLE_TITLES:
+            samples.append(issue_type.title)
+
+    def add_page(self, page_url: str, records: Iterable[IssueRecord]) -> None:
+        """写入一个页面的所有问题记录"""
+        page_id = self.page_id(page_url)
+        for record in records:
+            record.page_id = page_id
+            self.add(record)
+
+    def append(self, issue: SEOIssue) -> None:
+        """写入一个完整的SEOIssue（转换为紧凑记录）"""
+        self.add(self.catalog.adopt(issue), issue.page_url)
+
+    def extend(self, issues: Iterable[SEOIssue]) -> None:
+        for issue in issues:
+            self.append(issue)
+
+    def clear(self) -> None:
+        self._sink.truncate()
+        self._reset()
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    @property
+    def count(self) -> int:
+        return len(self._offsets)
+
+    # 汇总
+
+    @property
+    def categories(self) -> List[str]:
+        """出现过的问题类别（按首次出现顺序）"""
+        return list(self.category_counts)
+
+    def count_by(self, dimension: str) -> Dict[Optional[str], int]:
+        """分组计数，dimension: severity / category / page / type"""
+        if dimension == 'severity':
+            return dict(self.severity_counts)
+        if dimension == 'category':
+            return dict(self.category_counts)
+        if dimension == 'page':
+            return {(self.pages[page_id] if page_id >= 0 else None): len(rows)
+                    for page_id, rows in self._by_page.items()}
+        if dimension == 'type':
+            return {self.catalog.types[type_id].key: count for type_id, count in self.type_counts.items()}
+        raise ValueError(f"不支持的分组: {dimension}")
+
+    # 查询
+
+    def _group_keys(self, severities: Optional[Iterable[str]], category: Optional[str],
+                    type_key: Optional[str]) -> List[Tuple[float, int, int]]:
+        """符合严重程度/类别/类型条件的索引分组"""
+        codes = None
+        if severities is not None:
+            codes = {self._severity_codes[s] for s in severities if s in self._severity_codes}
+        type_id = self.catalog.ids.get(type_key, -1) if type_key is not None else None
+
+        keys = []
+        for key in self._by_group:
+            _, group_type, code = key
+            if codes is not None and code not in codes:
+                continue
+            if type_id is not None and group_type != type_id:
+                continue
+            if category is not None and self.catalog.types[group_type].category != category:
+                continue
+            keys.append(key)
+        return keys
+
+    def _groups(self, severities: Optional[Iterable[str]], category: Optional[str],
+                type_key: Optional[str]) -> Dict[float, List[array]]:
+        """符合条件的索引分组，按影响分归并"""
+        groups: Dict[float, List[array]] = {}
+        for key in self._group_keys(severities, category, type_key):
+            groups.setdefault(key[0], []).append(self._by_group[key])
+        return groups
+
+    def _page_rows(self, page_url: str, severities: Optional[Iterable[str]], category: Optional[str],
+                   type_key: Optional[str]) -> List[int]:
+        """页面的问题中符合其他条件的行号（每个页面的问题很少，直接检查列值）"""
+        page_rows = self._by_page.get(self._page_ids.get(page_url, -2), array('I'))
+        if severities is None and category is None and type_key is None:
+            return list(page_rows)
+        allowed = set(self._group_keys(severities, category, type_key))
+        return [row for row in page_rows
+                if (self._impact_col[row], self._type_col[row], self._severity_col[row]) in allowed]
+
+    def rows(self, severities: Optional[Iterable[str]] = None, category: Optional[str] = None,
+             page_url: Optional[str] = None, type_key: Optional[str] = None) -> List[int]:
+        """符合条件的行号（升序）"""
+        if page_url is not None:
+            return self._page_rows(page_url, severities, category, type_key)
+        if severities is None and category is None and type_key is None:
+            return list(range(len(self)))
+        lists = [rows for group in self._groups(severities, category, type_key).values() for rows in group]
+        return list(heapq.merge(*lists))
+
+    def record_at(self, row: int) -> IssueRecord:
+        """读取指定行的紧凑记录"""
+        type_id, page_id, severity, impact_score, params = self._sink.read_at(self._offsets[row])
+        return IssueRecord(type_id, severity, impact_score, tuple(params), page_id)
+
+    def get(self, row: int) -> SEOIssue:
+        """读取并渲染指定行的问题"""
+        return self.view(self.record_at(row))
+
+    def filter(self, severities: Optional[Iterable[str]] = None, category: Optional[str] = None,
+               page_url: Optional[str] = None, type_key: Optional[str] = None) -> Iterator[SEOIssue]:
+        """按条件筛选问题（按写入顺序），只读取和渲染命中的行"""
+        if severities is None and category is None and page_url is None and type_key is None:
+            yield from self
+            return
+        for row in self.rows(severities, category, page_url, type_key):
+            yield self.get(row)
+
+    def top(self, n: int, severities: Optional[Iterable[str]] = None, category: Optional[str] = None,
+            page_url: Optional[str] = None, type_key: Optional[str] = None) -> List[SEOIssue]:
+        """影响分最高的前n个问题（同分按写入顺序），可以附加与rows()相同的筛选条件"""
+        if page_url is not None:
+            selected = self.rows(severities, category, page_url, type_key)
+            selected.sort(key=lambda row: -self._impact_col[row])
+        else:
+            selected = []
+            groups = self._groups(severities, category, type_key)
+            for impact_score in sorted(groups, reverse=True):
+                selected.extend(itertools.islice(heapq.merge(*groups[impact_score]), n - len(selected)))
+                if len(selected) >= n:
+                    break
+        return [self.get(row) for row in selected[:n]]
+
+    # 读取
+
+    def iter_records(self) -> Iterator[IssueRecord]:
+        """流式读取紧凑记录（不渲染文本）"""
+        for type_id, page_id, severity, impact_score, params in self._sink.read():
+            yield IssueRecord(type_id, severity, impact_score, tuple(params), page_id)
+
+    def view(self, record: IssueRecord) -> SEOIssue:
+        """把记录渲染为SEOIssue"""
+        page_url = self.pages[record.page_id] if record.page_id >= 0 else None
+        return self.catalog.render(record, page_url)
+
+    def __iter__(self) -> Iterator[SEOIssue]:
+        for record in self.iter_records():
+            yield self.view(record)
+
+    def close(self) -> None:
+        self._sink.close()
+
+
+def _posting(index: Dict[Any, array], key: Any) -> array:
+    """倒排索引中key对应的行号列表"""
+    rows = index.get(key)
+    if rows is None:
+        rows = index[key] = array('I')
+    return rows
+
+
+class MetricStore:
+    """SEO指标存储：追加写入JSONL，在线维护每个指标的汇总"""
+
+    def __init__(self, path: Optional[str] = None):
+        self._sink = _JsonlSink(path, prefix='seo_metrics_')
+        self.count = 0
+        self.summaries: Dict[str, MetricSummary] = {}
+
+    @property
+    def path(self) -> str:
+        """JSONL文件路径"""
+        return self._sink.path
+
+    def append(self, metric: SEOMetric) -> None:
+        """写入一个指标并更新汇总"""
+        self._sink.write(metric.__dict__)
+        self.count += 1
+        summary = self.summaries.get(metric.name)
+        if summary is None:
+            summary = MetricSummary(metric.name, metric.unit, metric.target_value)
+            self.summaries[metric.name] = summary
+        summary.add(metric)
+
+    def extend(self, metrics: Iterable[SEOMetric]) -> None:
+        for metric in metrics:
+            self.append(metric)
+
+    def clear(self) -> None:
+        self._sink.truncate()
+        self.count = 0
+        self.summaries = {}
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __iter__(self) -> Iterator[SEOMetric]:
+        for record in self._sink.read():
+            yield SEOMetric(**record)
+
+    def close(self) -> None:
+        self._sink.close()
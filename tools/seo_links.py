@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 链接有效性验证
+
+收集整个爬取过程中所有页面的链接目标，每个唯一目标只验证一次：
+先发送HEAD请求，服务器不支持HEAD时改用只请求第一个字节的GET。
+页头页脚等在每个页面都出现的链接只请求一次，验证结果归属到所有引用它的页面。
+"""
+
+import threading
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import requests
+
+from seo_crawler import HostLimiter, parse_retry_after
+
+# HEAD被拒绝或不支持时改用GET重试的状态码
+HEAD_FALLBACK_STATUSES = {400, 403, 405, 406, 500, 501}
+# 请求过快被限流，不能说明链接失效
+RATE_LIMITED_STATUSES = {429}
+# 重定向次数达到这个值时报告重定向链
+REDIRECT_CHAIN_HOPS = 2
+
+
+@dataclass
+class LinkResult:
+    """一个链接目标的验证结果"""
+    url: str
+    status: int = 0
+    final_url: str = ''
+    redirects: int = 0  # 重定向次数
+    method: str = 'HEAD'
+    error: Optional[str] = None
+
+    @property
+    def broken(self) -> bool:
+        if self.error is not None:
+            return True
+        return self.status >= 400 and self.status not in RATE_LIMITED_STATUSES
+
+    @property
+    def redirect_chain(self) -> bool:
+        return not self.broken and self.redirects >= REDIRECT_CHAIN_HOPS
+
+    @property
+    def reason(self) -> str:
+        """报告中显示的失败原因"""
+        return self.error or f"HTTP {self.status}"
+
+
+@dataclass
+class LinkStats:
+    """链接验证统计"""
+    references: int = 0  # 所有页面中的链接总数
+    targets: int = 0  # 唯一的链接目标数
+    head_requests: int = 0
+    get_fallbacks: int = 0
+    broken: int = 0
+    redirect_chains: int = 0
+
+
+class LinkChecker:
+    """并发验证链接目标，每个URL在一次运行中只请求一次，记录引用它的页面"""
+
+    def __init__(self, session: requests.Session, max_workers: int = 8,
+                 host_limiter: Optional[HostLimiter] = None, timeout: int = 10):
+        self.session = session
+        self.timeout = timeout
+        self.host_limiter = host_limiter or HostLimiter(max_workers)
+        self.stats = LinkStats()
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix='link')
+        self._futures: Dict[str, Future] = {}
+        self._referrers: Dict[str, array] = {}  # 目标URL -> 引用页面编号
+        self._pages: List[str] = []
+        self._lock = threading.Lock()
+
+    def add_page(self, page_url: str, targets: Iterable[str]) -> None:
+        """记录页面中的链接目标，新目标立即提交验证（与页面抓取并行进行）"""
+        with self._lock:
+            page_id = len(self._pages)
+            self._pages.append(page_url)
+            for target in targets:
+                self.stats.references += 1
+                referrers = self._referrers.get(target)
+                if referrers is None:
+                    referrers = self._referrers[target] = array('i')
+                    self._futures[target] = self._executor.submit(self._verify, target)
+                    self.stats.targets += 1
+                referrers.append(page_id)
+
+    def results(self) -> Iterator[Tuple[LinkResult, List[str]]]:
+        """等待验证完成，按链接首次出现的顺序返回 (结果, 引用页面)"""
+        for target, future in list(self._futures.items()):
+            result = future.result()
+            yield result, [self._pages[page_id] for page_id in self._referrers[target]]
+
+    def _verify(self, url: str) -> LinkResult:
+        result = LinkResult(url=url)
+        try:
+            with self.host_limiter.slot(url) as host_state:
+                with self._lock:
+                    self.stats.head_requests += 1
+                response = self.session.head(url, timeout=self.timeout, allow_redirects=True)
+                if response.status_code in HEAD_FALLBACK_STATUSES:
+                    # 只请求第一个字节，不下载正文
+                    result.method = 'GET'
+                    with self._lock:
+                        self.stats.get_fallbacks += 1
+                    with self.session.get(url, timeout=self.timeout, allow_redirects=True, stream=True,
+                                          headers={'Range': 'bytes=0-0'}) as response:
+                        pass
+                    if response.status_code == 416:
+                        # 部分服务器（例如正文为空时）以416拒绝Range，不带Range重试；
+                        # stream=True且不读取正文，连接关闭时不会下载
+                        with self.session.get(url, timeout=self.timeout, allow_redirects=True,
+                                              stream=True) as response:
+                            pass
+                host_state.observe(response.status_code, response.elapsed.total_seconds(),
+                                   parse_retry_after(response.headers.get('Retry-After')))
+            result.status = response.status_code
+            result.final_url = response.url
+            result.redirects = len(response.history)
+        except requests.TooManyRedirects:
+            result.error = "重定向次数过多"
+        except requests.RequestException as e:
+            result.error = type(e).__name__
+
+        with self._lock:
+            if result.broken:
+                self.stats.broken += 1
+            elif result.redirect_chain:
+                self.stats.redirect_chains += 1
+        return result
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 本地构建目录分析
+
+直接从磁盘读取构建输出目录（例如Vite的dist/）中的HTML文件，不需要启动服务器：
+1. 每个HTML文件映射为网站URL：index.html -> 网站根地址，about.html 和 about/index.html -> /about
+2. 文件用内存映射读取，解码时直接读取映射的内存，不再复制一份文件内容
+3. robots.txt和网站地图也从目录中读取，网站地图（包括子网站地图）中的URL映射回目录中的文件
+
+解析和检查在进程池中按批执行，调度和结果合并见 SEOOptimizerAgent.analyze_local。
+"""
+
+import gzip
+import mmap
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterator, NamedTuple, Optional, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+from seo_crawler import limit_body
+from seo_sitemap import GZIP_MAGIC, SitemapReader
+
+HTML_SUFFIXES = ('.html', '.htm')
+# 每个进程池任务包含的页面数：减少进程间通信次数，又不让单个任务太大
+CHUNK_PAGES = 32
+
+
+class LocalPageResult(NamedTuple):
+    """工作进程返回的单个页面结果，payload与检查结果缓存的格式相同，失败时为None"""
+    payload: Optional[dict]
+    size: int = 0  # 读取的字节数
+    stopped: Optional[str] = None  # head / truncated
+    error: Optional[str] = None
+
+
+@dataclass
+class LocalStats:
+    """本地目录分析统计"""
+    processes: int = 1
+    checked: int = 0  # 解析并检查的页面（不包括复用缓存结果的页面）
+    failed: int = 0
+    bytes_read: int = 0
+    head_only: int = 0
+    truncated: int = 0
+    sitemap_urls_without_file: int = 0  # 网站地图中在目录里找不到对应HTML文件的URL
+
+    def add(self, page: LocalPageResult) -> None:
+        if page.payload is None:
+            self.failed += 1
+            return
+        self.checked += 1
+        self.bytes_read += page.size
+        if page.stopped == 'head':
+            self.head_only += 1
+        elif page.stopped == 'truncated':
+            self.truncated += 1
+
+
+class LocalSite:
+    """本地构建目录：HTML文件和网站URL之间的映射"""
+
+    def __init__(self, root: str, base_url: str):
+        self.root = os.path.realpath(root)
+        if not os.path.isdir(self.root):
+            raise NotADirectoryError(f"目录不存在: {root}")
+        self.base_url = base_url.rstrip('/')
+        self.host = urlparse(self.base_url).netloc.lower()
+
+    def url_for(self, relpath: str) -> str:
+        """目录中的文件（相对路径）对应的网站URL"""
+        path = relpath.replace(os.sep, '/')
+        name = path.rsplit('/', 1)[-1]
+        if name in ('index.html', 'index.htm'):
+            path = path[:-len(name)]
+        elif path.lower().endswith(HTML_SUFFIXES):
+            path = path.rsplit('.', 1)[0]
+        path = path.strip('/')
+        return f"{self.base_url}/{quote(path)}" if path else self.base_url
+
+    def path_for(self, url: str) -> Optional[str]:
+        """网站URL对应的目录中的文件，不存在或不属于本站时返回None"""
+        parsed = urlparse(url)
+        if parsed.netloc and parsed.netloc.lower() != self.host:
+            return None
+        relpath = unquote(parsed.path).strip('/')
+        if not relpath:
+            candidates = ['index.html', 'index.htm']
+        else:
+            candidates = [relpath, relpath + '.html', relpath + '/index.html']
+        for candidate in candidates:
+            path = os.path.realpath(os.path.join(self.root, candidate))
+            # 不允许通过 .. 或符号链接读取目录之外的文件
+            if path.startswith(self.root + os.sep) and os.path.isfile(path):
+                return path
+        return None
+
+    def iter_pages(self) -> Iterator[Tuple[str, str]]:
+        """按路径顺序返回目录中的HTML页面 (URL, 文件路径)，多个文件对应同一URL时只返回第一个"""
+        seen = set()
+        for directory, subdirectories, files in os.walk(self.root):
+            subdirectories.sort()
+            for name in sorted(files):
+                if not name.lower().endswith(HTML_SUFFIXES):
+                    continue
+                path = os.path.join(directory, name)
+                url = self.url_for(os.path.relpath(path, self.root))
+                if url not in seen:
+                    seen.add(url)
+                    yield url, path
+
+    @staticmethod
+    @contextmanager
+    def read(path: str, max_bytes: Optional[int] = None,
+             stop_at_head: bool = False) -> Iterator[Tuple[memoryview, Optional[str]]]:
+        """内存映射读取文件，返回 (内容, 停止原因)；内容只在with块中有效"""
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # 空文件不能映射
+                yield memoryview(b''), None
+                return
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            view = memoryview(mapped)
+            body, stopped = limit_body(view, max_bytes, stop_at_head)
+            try:
+                yield body, stopped
+            finally:
+                # 所有引用映射内存的视图释放之后才能关闭映射
+                body.release()
+                view.release()
+                mapped.close()
+
+
+class LocalSitemapReader(SitemapReader):
+    """从本地目录读取网站地图：网站地图URL映射为目录中的文件"""
+
+    def __init__(self, site: LocalSite, max_sitemaps: int = 1000):
+        super().__init__(session=None, max_sitemaps=max_sitemaps)
+        self.site = site
+
+    def _open(self, url: str):
+        path = self.site.path_for(url)
+        if path is None:
+            return None, None
+        try:
+            f = open(path, 'rb')
+        except OSError:
+            return None, None
+        stream = gzip.GzipFile(fileobj=f) if f.peek(2)[:2] == GZIP_MAGIC else f
+        return f, stream
+
+    def find(self, candidates) -> Optional[str]:
+        for candidate in candidates:
+            if self.site.path_for(candidate):
+                self.found_url = candidate
+                return candidate
+        return None
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 报告输出（Markdown / HTML / JSON / CSV）
+
+问题和指标从问题存储中流式读取，每积累一批（ISSUES_PER_CHUNK个问题）拼接后一次写入文件，
+内存中只保留当前一批和去重后的代码解决方案，100万个问题的报告也只占用固定的内存。
+
+- Markdown：与交互模式保存的报告格式相同
+- HTML：单个自包含文件（内联样式，不引用外部资源），问题按批分成多个表格，第一批之后的表格默认折叠
+- JSON：与批量模式的单个网站结果格式相同（site/analyzed_at/highest_severity/stats/issues/metrics）
+- CSV：每个问题一行，方便导入表格软件
+"""
+
+import csv
+import hashlib
+import html
+import json
+import os
+import re
+from abc import ABC, abstractmethod
+from dataclasses import dataclass, field
+from typing import IO, Dict, Iterable, Iterator, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from seo_issues import SEOIssue, SEOMetric
+
+# 每批写入的问题数
+ISSUES_PER_CHUNK = 1000
+# 报告文件的写缓冲区大小
+WRITE_BUFFER = 1 << 20
+
+REPORT_FORMATS = {'md': 'markdown', 'html': 'html', 'json': 'json', 'csv': 'csv'}
+CSV_COLUMNS = ['序号', '严重程度', '类别', '标题', '页面', '描述', '建议', '影响分', '代码解决方案']
+
+
+@dataclass
+class ReportSection:
+    """报告中的一节：标题 + Markdown行（列表项、表格行、加粗小标题或普通段落）"""
+    title: str
+    lines: List[str]
+
+
+@dataclass
+class Report:
+    """一个网站的报告内容，issues和metrics可以是流式读取的存储（每种格式只遍历一次）"""
+    site: str
+    analyzed_at: str
+    highest_severity: Optional[str]
+    sections: List[ReportSection]
+    issues: Iterable[SEOIssue]
+    metrics: Iterable[SEOMetric] = ()
+    categories: List[str] = field(default_factory=list)  # 代码解决方案的类别顺序
+    stats: dict = field(default_factory=dict)  # JSON报告的运行统计
+
+
+def report_format(filename: str) -> str:
+    """按扩展名确定报告格式，未知扩展名使用Markdown"""
+    extension = os.path.splitext(filename)[1].lstrip('.').lower()
+    return REPORT_FORMATS.get(extension, 'markdown')
+
+
+def chunked(items: Iterable, size: int = ISSUES_PER_CHUNK) -> Iterator[List]:
+    """按批读取"""
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class CodeSolutions:
+    """按类别收集去重后的代码解决方案（写问题时顺便收集，不再单独遍历一次问题）"""
+
+    def __init__(self):
+        self.by_category: Dict[str, List[str]] = {}
+        self._seen = set()
+
+    def add(self, issue: SEOIssue) -> None:
+        if not issue.code_solution or (issue.category, issue.code_solution) in self._seen:
+            return
+        self._seen.add((issue.category, issue.code_solution))
+        self.by_category.setdefault(issue.category, []).extend(
+            [f"<!-- {issue.title} -->", issue.code_solution])
+
+    def items(self, categories: List[str]) -> Iterator[Tuple[str, List[str]]]:
+        for category in categories:
+            yield category, self.by_category.get(category, [])
+
+    def format(self, categories: List[str]) -> str:
+        """Markdown代码块，与 SEOOptimizerAgent.generate_code_solutions 相同"""
+        solutions = ["# SEO优化代码解决方案\n", "```html\n"]
+        for category, lines in self.items(categories):
+            solutions.append(f"\n<!-- {category} 优化 -->")
+            solutions.extend(lines)
+        solutions.append("\n```")
+        return "\n".join(solutions)
+
+
+class ReportWriter(ABC):
+    """报告写入器基类"""
+    extension = ''
+
+    def __init__(self, out: IO[str]):
+        self.out = out
+
+    @abstractmethod
+    def write(self, report: Report) -> int:
+        """写出报告，返回问题数"""
+
+
+class MarkdownReportWriter(ReportWriter):
+    extension = 'md'
+
+    def write(self, report: Report) -> int:
+        out = self.out
+        out.write(f"# SEO分析报告\n\n**网站**: {report.site}\n\n**分析时间**: {report.analyzed_at}\n\n")
+        for section in report.sections:
+            out.write(f"## {section.title}\n\n" + '\n'.join(section.lines) + '\n\n')
+
+        out.write("## 详细问题\n")
+        solutions = CodeSolutions()
+        count = 0
+        for chunk in chunked(report.issues):
+            parts = []
+            for issue in chunk:
+                count += 1
+                solutions.add(issue)
+                parts.append(f"\n### {count}. {issue.title}\n\n**严重程度**: {issue.severity}\n")
+                if issue.page_url:
+                    parts.append(f"\n**页面**: {issue.page_url}\n")
+                parts.append(f"\n**描述**: {issue.description}\n\n**建议**: {issue.recommendation}\n")
+                if issue.code_solution:
+                    parts.append(f"\n**代码解决方案**:\n```html\n{issue.code_solution}\n```\n")
+            out.write(''.join(parts))
+
+        out.write("\n## 代码解决方案\n\n")
+        out.write(solutions.format(report.categories) if count else "恭喜！未发现SEO问题。")
+        return count
+
+
+_HTML_STYLE = """
+body{font-family:-apple-system,"Segoe UI","PingFang SC","Microsoft YaHei",sans-serif;margin:2em auto;max-width:1200px;padding:0 1em;color:#222}
+table{border-collapse:collapse;width:100%;margin:.5em 0;font-size:14px}
+th,td{border:1px solid #ddd;padding:4px 8px;text-align:left;vertical-align:top}
+th{background:#f5f5f5}
+td.url{word-break:break-all}
+pre{background:#f7f7f7;padding:8px;overflow:auto;white-space:pre-wrap;margin:0}
+summary{cursor:pointer;font-weight:bold;margin:.5em 0}
+.critical{color:#b00020;font-weight:bold}.high{color:#d35400}.medium{color:#b7950b}.low{color:#555}
+""".strip()
+
+
+class HtmlReportWriter(ReportWriter):
+    """自包含HTML报告：问题按批分成多个表格，浏览器可以边读取边显示"""
+    extension = 'html'
+
+    def write(self, report: Report) -> int:
+        out = self.out
+        esc = html.escape
+        out.write(f'<!DOCTYPE html>\n<html lang="zh-CN">\n<head>\n<meta charset="utf-8">\n'
+                  f'<title>SEO分析报告 - {esc(report.site)}</title>\n<style>\n{_HTML_STYLE}\n</style>\n'
+                  f'</head>\n<body>\n<h1>SEO分析报告</h1>\n'
+                  f'<p><strong>网站</strong>: {esc(report.site)}<br>\n'
+                  f'<strong>分析时间</strong>: {esc(report.analyzed_at)}</p>\n')
+        for section in report.sections:
+            out.write(f"<h2>{esc(section.title)}</h2>\n{self.render_lines(section.lines)}\n")
+
+        out.write("<h2>详细问题</h2>\n")
+        solutions = CodeSolutions()
+        count = 0
+        for index, chunk in enumerate(chunked(report.issues)):
+            start = count + 1
+            parts = [f'<details{" open" if index == 0 else ""}>\n'
+                     f'<summary>第 {start}-{start + len(chunk) - 1} 个问题</summary>\n'
+                     '<table>\n<tr><th>#</th><th>严重程度</th><th>问题</th><th>页面</th>'
+                     '<th>描述</th><th>建议</th><th>代码解决方案</th></tr>\n']
+            for issue in chunk:
+                count += 1
+                solutions.add(issue)
+                code = f'<pre>{esc(issue.code_solution)}</pre>' if issue.code_solution else ''
+                parts.append(f'<tr><td>{count}</td><td class="{esc(issue.severity)}">{esc(issue.severity)}</td>'
+                             f'<td>{esc(issue.title)}</td><td class="url">{esc(issue.page_url or "")}</td>'
+                             f'<td>{esc(issue.description)}</td><td>{esc(issue.recommendation)}</td>'
+                             f'<td>{code}</td></tr>\n')
+            parts.append('</table>\n</details>\n')
+            out.write(''.join(parts))
+        if not count:
+            out.write("<p>恭喜！未发现SEO问题。</p>\n")
+
+        if solutions.by_category:
+            out.write("<h2>代码解决方案</h2>\n")
+        for category, lines in solutions.items(report.categories):
+            if lines:
+                out.write(f"<h3>{esc(category)} 优化</h3>\n<pre>{esc(chr(10).join(lines))}</pre>\n")
+        out.write("</body>\n</html>\n")
+        return count
+
+    @staticmethod
+    def render_lines(lines: List[str]) -> str:
+        """把报告各节使用的Markdown子集（列表、表格、加粗小标题）转换为HTML"""
+        esc = html.escape
+        parts = []
+        block = None  # 当前打开的 ul / table
+
+        def close():
+            nonlocal block
+            if block:
+                parts.append(f"</{block}>")
+                block = None
+
+        for line in lines:
+            text = line.strip()
+            if text.startswith('|'):
+                cells = [cell.strip() for cell in text.strip('|').split('|')]
+                if all(set(cell) <= set('-:') for cell in cells):
+                    continue  # 表头分隔行
+                if block != 'table':
+                    close()
+                    parts.append('<table>')
+                    block = 'table'
+                    tag = 'th'
+                else:
+                    tag = 'td'
+                parts.append('<tr>' + ''.join(f'<{tag}>{esc(cell)}</{tag}>' for cell in cells) + '</tr>')
+            elif text.startswith('- '):
+                if block != 'ul':
+                    close()
+                    parts.append('<ul>')
+                    block = 'ul'
+                parts.append(f'<li>{esc(text[2:].replace("`", ""))}</li>')
+            else:
+                close()
+                if text.startswith('**') and text.rstrip(':').endswith('**'):
+                    parts.append(f'<p><strong>{esc(text.rstrip(":").strip("*"))}</strong></p>')
+                elif text:
+                    parts.append(f'<p>{esc(text)}</p>')
+        close()
+        return '\n'.join(parts)
+
+
+class JsonReportWriter(ReportWriter):
+    """JSON报告：先写站点信息和统计，再逐批写出问题和指标数组"""
+    extension = 'json'
+
+    def write(self, report: Report) -> int:
+        header = {'site': report.site, 'analyzed_at': report.analyzed_at,
+                  'highest_severity': report.highest_severity, 'stats': report.stats}
+        count = self.write_document(header, report.issues, report.metrics)
+        self.out.write('\n')
+        return count
+
+    def write_document(self, header: dict, issues: Iterable, metrics: Iterable) -> int:
+        """写出一个JSON对象：header中的字段 + 逐批写出的issues和metrics数组（批量模式也使用），返回问题数"""
+        self.out.write(json.dumps(header, ensure_ascii=False)[:-1])
+        count = self.write_array('issues', issues)
+        self.write_array('metrics', metrics)
+        self.out.write('}')
+        return count
+
+    def write_array(self, name: str, items: Iterable) -> int:
+        self.out.write(f', "{name}": [')
+        count = 0
+        for chunk in chunked(items):
+            separator = ',\n' if count else '\n'
+            # 整批一次编码（C编码器），去掉数组的方括号后拼接
+            self.out.write(separator + json.dumps([vars(item) for item in chunk], ensure_ascii=False)[1:-1])
+            count += len(chunk)
+        self.out.write('\n]' if count else ']')
+        return count
+
+
+class CsvReportWriter(ReportWriter):
+    """CSV报告：每个问题一行（站点级问题的页面列为空）"""
+    extension = 'csv'
+
+    def write(self, report: Report) -> int:
+        writer = csv.writer(self.out)
+        writer.writerow(CSV_COLUMNS)
+        count = 0
+        for chunk in chunked(report.issues):
+            writer.writerows([count + offset, issue.severity, issue.category, issue.title, issue.page_url or '',
+                              issue.description, issue.recommendation, issue.impact_score,
+                              issue.code_solution or '']
+                             for offset, issue in enumerate(chunk, 1))
+            count += len(chunk)
+        return count
+
+
+WRITERS = {
+    'markdown': MarkdownReportWriter,
+    'html': HtmlReportWriter,
+    'json': JsonReportWriter,
+    'csv': CsvReportWriter,
+}
+
+
+def report_filename(site: str, fmt: str) -> str:
+    """批量模式中每个网站的报告文件名：主机名和路径 + 网站URL的短哈希 + 格式的扩展名
+
+    同一主机的不同协议或路径（http/https、example.com/blog）各自有报告文件，
+    哈希保证替换特殊字符后相同的名称也不会互相覆盖；文件名只由URL决定，多个进程可以同时写入。
+    """
+    site = site.rstrip('/')
+    parsed = urlparse(site)
+    name = re.sub(r'[^\w.-]+', '_', (parsed.netloc + parsed.path) or site).strip('_')[:80]
+    digest = hashlib.blake2b(site.encode('utf-8'), digest_size=4).hexdigest()
+    return f"{name}-{digest}.{WRITERS[fmt].extension}"
+
+
+def write_report(filename: str, report: Report, fmt: Optional[str] = None) -> int:
+    """按格式（默认由扩展名确定）把报告写入文件，返回问题数"""
+    writer_class = WRITERS[fmt or report_format(filename)]
+    # CSV需要newline=''，由csv模块写出行结束符
+    with open(filename, 'w', encoding='utf-8', newline='' if writer_class is CsvReportWriter else None,
+              buffering=WRITE_BUFFER) as f:
+        return writer_class(f).write(report)
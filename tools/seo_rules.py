@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 声明式规则引擎
+
+页面检查声明为数据（Rule）：选择器、元素条件、页面条件、问题类型/严重程度/影响分、
+模板参数，或者要记录的指标。内置规则在seo_catalog中定义，自定义规则从JSON（安装了
+PyYAML时也可以是YAML）文件加载。
+
+整套规则在启动时编译为一个遍历计划：标签名 -> 关心这个标签的收集器。
+构建页面索引时对DOM只遍历一次，每个元素只交给关心它的收集器，
+选择器、元素条件和取值相同的规则共享同一个收集器，所以增加规则几乎不增加每个页面的遍历开销。
+遍历结束后按检查分组计算每条规则的页面条件，生成问题记录和指标。
+
+表达式是Python表达式的一个安全子集（比较、布尔运算、算术、下标/切片、少量内置函数和
+字符串方法），编译时校验语法树，不能访问字符串方法以外的属性、导入模块或调用其他函数。
+
+元素表达式（where/value）中可用的名字：text（元素文本）、tag、level（h1-h6的级别）、
+base_url（网站地址）、attr('名称')，其他名字都表示同名属性的值（属性不存在时为空字符串）。
+页面表达式（when/params/current/good/for_each）中可用的名字：total（匹配选择器的元素数）、
+count（其中满足where的元素数）、values（这些元素的value列表）、first（第一个value，没有时为None）、
+url、base_url；for_each的每一项为item，指标的good中可以使用current。
+"""
+
+import ast
+import hashlib
+import json
+import re
+from dataclasses import asdict, dataclass, field, fields
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+from seo_issues import IssueCatalog, IssueRecord, IssueType, SEOMetric
+
+try:
+    import yaml
+except ImportError:  # 可选依赖，只用于YAML格式的规则文件
+    yaml = None
+
+# 只在<head>中出现的标签；只选择这些标签的规则在 --head-only 模式下执行
+HEAD_TAGS = {'title', 'meta', 'link', 'style', 'script', 'base', 'noscript'}
+HEADING_LEVELS = {'h1': 1, 'h2': 2, 'h3': 3, 'h4': 4, 'h5': 5, 'h6': 6}
+
+
+class RuleError(ValueError):
+    """规则定义错误"""
+
+
+@dataclass
+class Rule:
+    """声明式页面规则：报告一种问题（key）或者记录一个指标（metric）"""
+    select: str  # 选择器，例如 img、meta[name=description]、link[rel~=stylesheet]、h1, h2
+    key: Optional[str] = None  # 报告的问题类型（问题目录中的key）
+    metric: Optional[str] = None  # 记录的指标名
+    check: str = 'custom'  # 所属检查，用于分组计时
+    where: Optional[str] = None  # 元素条件，只统计满足条件的元素
+    value: Optional[str] = None  # 每个元素的取值，结果为values/first
+    when: Optional[str] = None  # 页面条件，默认问题为 count > 0、指标总是记录
+    for_each: Optional[str] = None  # 对这个列表的每一项分别判断when，每项报告一个问题
+    params: Dict[str, str] = field(default_factory=dict)  # 模板字段 -> 表达式，未指定的字段使用同名变量
+    severity: Optional[str] = None  # 覆盖问题类型的严重程度
+    impact_score: Optional[float] = None  # 覆盖问题类型的影响分
+    current: Optional[str] = None  # 指标当前值
+    target: float = 0
+    unit: str = ''
+    good: Optional[str] = None  # 指标达标条件
+
+
+# 表达式中可以调用的函数
+def missing(required: Iterable, present: Iterable) -> list:
+    """required中不在present里的项，保持原有顺序"""
+    present = set(present)
+    return [item for item in required if item not in present]
+
+
+FUNCTIONS: Dict[str, Callable] = {
+    'len': len, 'min': min, 'max': max, 'sum': sum, 'abs': abs, 'round': round,
+    'int': int, 'float': float, 'str': str, 'bool': bool, 'list': list,
+    'any': any, 'all': all, 'zip': zip, 'sorted': sorted, 'missing': missing,
+}
+STRING_METHODS = {'strip', 'lstrip', 'rstrip', 'lower', 'upper', 'startswith', 'endswith',
+                  'split', 'join', 'count', 'replace'}
+_GLOBALS = {'__builtins__': {}, **FUNCTIONS}
+
+_ALLOWED_NODES = (
+    ast.Expression, ast.BoolOp, ast.And, ast.Or, ast.UnaryOp, ast.Not, ast.USub, ast.UAdd,
+    ast.BinOp, ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod,
+    ast.Compare, ast.Eq, ast.NotEq, ast.Lt, ast.LtE, ast.Gt, ast.GtE, ast.In, ast.NotIn, ast.Is, ast.IsNot,
+    ast.IfExp, ast.Name, ast.Load, ast.Constant, ast.Subscript, ast.Slice, ast.Call, ast.Attribute,
+    ast.List, ast.Tuple,
+)
+PAGE_NAMES = {'total', 'count', 'values', 'first', 'url', 'base_url'}
+ELEMENT_NAMES = {'text', 'tag', 'level', 'base_url'}
+
+_SELECTOR = re.compile(r'\s*([a-zA-Z][\w-]*)((?:\[[^\]]*\])*)\s*$')
+_CONDITION = re.compile(r'\[\s*([^\s~^$*|=\]]+)\s*(?:([~^$*]?=)\s*(?:"([^"]*)"|\'([^\']*)\'|([^\]\s]*))\s*)?\]')
+
+
+class _AttributeCalls(ast.NodeTransformer):
+    """把元素表达式中的 attr('名称') 改写为 _attrs['名称']"""
+
+    def __init__(self):
+        self.names: List[str] = []
+
+    def visit_Call(self, node):
+        self.generic_visit(node)
+        if isinstance(node.func, ast.Name) and node.func.id == 'attr':
+            if len(node.args) != 1 or node.keywords or not isinstance(node.args[0], ast.Constant) \
+                    or not isinstance(node.args[0].value, str):
+                raise RuleError("attr() 只接受一个字符串常量")
+            name = node.args[0].value.lower()
+            self.names.append('@' + name)
+            return ast.copy_location(ast.Subscript(value=ast.Name(id='_attrs', ctx=ast.Load()),
+                                                   slice=ast.Constant(value=name), ctx=ast.Load()), node)
+        return node
+
+
+def compile_expression(source: str, names: Optional[set] = None, element: bool = False) -> Tuple[Any, set]:
+    """校验并编译表达式，返回 (代码对象, 用到的名字)
+
+    names为允许的变量名；element为True时未知的名字表示元素属性，attr('名称')读取的属性记为 '@名称'。
+    """
+    try:
+        tree = ast.parse(source.strip(), mode='eval')
+    except SyntaxError as e:
+        raise RuleError(f"表达式语法错误: {source!r} ({e.msg})") from None
+
+    used = set()
+    if element:
+        rewriter = _AttributeCalls()
+        tree = ast.fix_missing_locations(rewriter.visit(tree))
+        used.update(rewriter.names)
+
+    for node in ast.walk(tree):
+        if not isinstance(node, _ALLOWED_NODES):
+            raise RuleError(f"表达式中不支持 {type(node).__name__}: {source!r}")
+        if isinstance(node, ast.Call):
+            func = node.func
+            if node.keywords:
+                raise RuleError(f"表达式中不支持关键字参数: {source!r}")
+            if isinstance(func, ast.Name):
+                if func.id not in FUNCTIONS:
+                    raise RuleError(f"表达式中不能调用 {func.id}(): {source!r}")
+            elif not (isinstance(func, ast.Attribute) and func.attr in STRING_METHODS):
+                raise RuleError(f"表达式中只能调用内置函数和字符串方法: {source!r}")
+        elif isinstance(node, ast.Attribute):
+            if node.attr not in STRING_METHODS:
+                raise RuleError(f"表达式中不能访问属性 .{node.attr}: {source!r}")
+        elif isinstance(node, ast.Name) and node.id not in FUNCTIONS and node.id != '_attrs':
+            if not element and node.id not in (names or PAGE_NAMES):
+                raise RuleError(f"表达式中未知的名字 {node.id}: {source!r}")
+            used.add(node.id)
+    return compile(tree, f'<rule {source}>', 'eval'), used
+
+
+def parse_selector(selector: str) -> List[Tuple[str, Tuple[Tuple[str, str, str], ...]]]:
+    """解析选择器：逗号分隔的 标签[属性] / [属性=值] / [属性~=单词] / [属性^=前缀] / [属性$=后缀] / [属性*=子串]
+
+    返回 [(标签名, ((属性, 运算符, 值), ...))]，运算符为空表示只要求属性存在。
+    """
+    parts = []
+    for part in selector.split(','):
+        match = _SELECTOR.match(part)
+        if not match:
+            raise RuleError(f"无法解析选择器: {selector!r}")
+        tag, rest = match.group(1).lower(), match.group(2)
+        conditions = []
+        position = 0
+        for condition in _CONDITION.finditer(rest):
+            if condition.start() != position:
+                raise RuleError(f"无法解析选择器: {selector!r}")
+            position = condition.end()
+            value = next((v for v in condition.group(3, 4, 5) if v is not None), '')
+            conditions.append((condition.group(1).lower(), condition.group(2) or '', value))
+        if position != len(rest):
+            raise RuleError(f"无法解析选择器: {selector!r}")
+        parts.append((tag, tuple(conditions)))
+    return parts
+
+
+def _matches(conditions, node, attr) -> bool:
+    for name, op, expected in conditions:
+        actual = attr(node, name)
+        if actual is None:
+            return False
+        if op == '=':
+            ok = actual == expected
+        elif op == '~=':
+            ok = expected in actual.split()
+        elif op == '^=':
+            ok = actual.startswith(expected)
+        elif op == '$=':
+            ok = actual.endswith(expected)
+        elif op == '*=':
+            ok = expected in actual
+        else:
+            ok = True
+        if not ok:
+            return False
+    return True
+
+
+class _Collector:
+    """一组（选择器, where, value）相同的规则共享的元素收集器"""
+
+    def __init__(self, index: int, selector: str, where: Optional[str], value: Optional[str]):
+        self.index = index
+        self.parts = parse_selector(selector)
+        self.where, where_names = compile_expression(where, element=True) if where else (None, set())
+        self.value, value_names = compile_expression(value, element=True) if value else (None, set())
+        used = where_names | value_names
+        self.attributes = {name.lstrip('@') for name in used if name.startswith('@') or name not in ELEMENT_NAMES}
+        self.needs_text = 'text' in used
+
+    @property
+    def tags(self) -> set:
+        return {tag for tag, _ in self.parts}
+
+
+class TraversalPlan:
+    """编译后的遍历计划：标签名 -> 访问函数，构建页面索引时对每个元素调用"""
+
+    def __init__(self, collectors: List[_Collector], base_url: str):
+        self.size = len(collectors)
+        self.visitors: Dict[str, Callable] = {}
+        tags = sorted({tag for collector in collectors for tag in collector.tags})
+        for tag in tags:
+            entries = [(collector, conditions) for collector in collectors
+                       for part_tag, conditions in collector.parts if part_tag == tag]
+            self.visitors[tag] = self._visitor(tag, entries, base_url)
+
+    def new_state(self) -> list:
+        """每个页面的收集结果：收集器编号 -> [total, count, values]"""
+        return [[0, 0, []] for _ in range(self.size)]
+
+    @staticmethod
+    def _visitor(tag: str, entries, base_url: str) -> Callable:
+        attributes = sorted(set().union(*(collector.attributes for collector, _ in entries)))
+        needs_text = any(collector.needs_text for collector, _ in entries)
+        level = HEADING_LEVELS.get(tag, 0)
+
+        def visit(node, attr, text, state) -> None:
+            env = None
+            for collector, conditions in entries:
+                if conditions and not _matches(conditions, node, attr):
+                    continue
+                if env is None:
+                    # 所有收集器需要的元素字段只读取一次
+                    values = {name: attr(node, name) or '' for name in attributes}
+                    env = dict(values, _attrs=values, tag=tag, level=level, base_url=base_url)
+                    if needs_text:
+                        env['text'] = text(node)
+                entry = state[collector.index]
+                entry[0] += 1
+                if collector.where is None or eval(collector.where, _GLOBALS, env):
+                    entry[1] += 1
+                    if collector.value is not None:
+                        entry[2].append(eval(collector.value, _GLOBALS, env))
+        return visit
+
+
+class _CompiledRule:
+    """编译后的规则"""
+
+    def __init__(self, rule: Rule, collector: int, catalog: IssueCatalog):
+        self.rule = rule
+        self.collector = collector
+        self.check = rule.check
+        names = set(PAGE_NAMES)
+        if rule.for_each and rule.key is None:
+            raise RuleError(f"指标规则不支持for_each: {rule.metric}")
+        if rule.for_each:
+            self.for_each, _ = compile_expression(rule.for_each)
+            names.add('item')
+        else:
+            self.for_each = None
+
+        if rule.key is not None:
+            if rule.key not in catalog.ids:
+                raise RuleError(f"规则引用了未知的问题类型: {rule.key}")
+            self.when, _ = compile_expression(rule.when or 'count > 0', names)
+            fields_ = catalog.fields[catalog.ids[rule.key]]
+            unknown = set(rule.params) - set(fields_)
+            if unknown:
+                raise RuleError(f"规则 {rule.key} 的参数不在模板中: {', '.join(sorted(unknown))}")
+            self.params = [(name, compile_expression(rule.params.get(name, name), names)[0]) for name in fields_]
+        else:
+            self.when, _ = compile_expression(rule.when or 'True', names)
+            self.current, _ = compile_expression(rule.current or 'count', names)
+            self.good, _ = compile_expression(rule.good or 'True', names | {'current'})
+
+
+def _rule_from_dict(data: dict) -> Rule:
+    known = {f.name for f in fields(Rule)}
+    unknown = set(data) - known
+    if unknown:
+        raise RuleError(f"规则中未知的字段: {', '.join(sorted(unknown))}")
+    if 'select' not in data:
+        raise RuleError(f"规则缺少select: {data}")
+    return Rule(**data)
+
+
+def load_rule_file(path: str, catalog: IssueCatalog) -> List[Rule]:
+    """加载自定义规则文件：{"issue_types": [...], "rules": [...]}
+
+    issue_types中的问题类型注册到目录中（已存在的key必须定义相同），rules为规则列表。
+    """
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            if yaml is None:
+                raise RuleError(f"读取YAML规则文件需要安装PyYAML: {path}")
+            data = yaml.safe_load(f)
+        else:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise RuleError(f"{path}: JSON格式错误: {e}") from None
+    if not isinstance(data, dict):
+        raise RuleError(f"规则文件格式错误: {path}")
+
+    for item in data.get('issue_types', []):
+        try:
+            issue_type = IssueType(**item)
+        except TypeError as e:
+            raise RuleError(f"{path}: 问题类型定义错误: {e}") from None
+        existing = catalog.ids.get(issue_type.key)
+        if existing is None:
+            catalog.register(issue_type)
+        elif catalog.types[existing] != issue_type:
+            raise RuleError(f"{path}: 问题类型 {issue_type.key} 与已有的定义不同")
+
+    try:
+        return [_rule_from_dict(item) for item in data.get('rules', [])]
+    except TypeError as e:
+        raise RuleError(f"{path}: 规则定义错误: {e}") from None
+
+
+class RuleSet:
+    """编译后的规则集：一个遍历计划 + 按检查分组的页面规则"""
+
+    def __init__(self, rules: Iterable[Rule], catalog: IssueCatalog, base_url: str = '',
+                 head_only: bool = False):
+        self.catalog = catalog
+        self.base_url = base_url
+        self.rules: List[Rule] = []
+        collectors: Dict[Tuple, _Collector] = {}
+        compiled: List[_CompiledRule] = []
+
+        for rule in rules:
+            if (rule.key is None) == (rule.metric is None):
+                raise RuleError(f"规则必须指定key或metric之一: {rule.select}")
+            signature = (rule.select, rule.where, rule.value)
+            collector = collectors.get(signature)
+            if collector is None:
+                collector = _Collector(len(collectors), rule.select, rule.where, rule.value)
+            # --head-only 时正文没有下载，只执行只选择<head>标签的规则
+            if head_only and not collector.tags <= HEAD_TAGS:
+                continue
+            collectors.setdefault(signature, collector)
+            compiled.append(_CompiledRule(rule, collector.index, catalog))
+            self.rules.append(rule)
+
+        self.plan = TraversalPlan(list(collectors.values()), base_url)
+        self.checks: List[str] = list(dict.fromkeys(rule.check for rule in compiled))
+        self._by_check: Dict[str, List[_CompiledRule]] = {}
+        for rule in compiled:
+            self._by_check.setdefault(rule.check, []).append(rule)
+
+    @property
+    def digest(self) -> str:
+        """规则定义的指纹，规则变化时检查结果缓存失效"""
+        text = json.dumps([asdict(rule) for rule in self.rules], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+    def evaluate(self, state: list, url: str, issues: List[IssueRecord], metrics: List[SEOMetric],
+                 check: Optional[str] = None) -> None:
+        """根据页面的收集结果计算规则（check为空时计算所有检查），问题和指标追加到列表中"""
+        envs: Dict[int, dict] = {}
+        for name in ([check] if check else self.checks):
+            for rule in self._by_check.get(name, ()):
+                env = envs.get(rule.collector)
+                if env is None:
+                    total, count, values = state[rule.collector]
+                    env = envs[rule.collector] = {
+                        'total': total, 'count': count, 'values': values,
+                        'first': values[0] if values else None,
+                        'url': url, 'base_url': self.base_url,
+                    }
+                if rule.for_each is not None:
+                    for item in eval(rule.for_each, _GLOBALS, env):
+                        item_env = dict(env, item=item)
+                        if eval(rule.when, _GLOBALS, item_env):
+                            issues.append(self._record(rule, item_env))
+                elif not eval(rule.when, _GLOBALS, env):
+                    continue
+                elif rule.rule.key is not None:
+                    issues.append(self._record(rule, env))
+                else:
+                    current = eval(rule.current, _GLOBALS, env)
+                    good = eval(rule.good, _GLOBALS, dict(env, current=current))
+                    metrics.append(SEOMetric(name=rule.rule.metric, current_value=current,
+                                             target_value=rule.rule.target, unit=rule.rule.unit,
+                                             status="good" if good else "warning"))
+
+    def _record(self, rule: _CompiledRule, env: dict) -> IssueRecord:
+        params = {name: eval(code, _GLOBALS, env) for name, code in rule.params}
+        return self.catalog.record(rule.rule.key, severity=rule.rule.severity,
+                                   impact_score=rule.rule.impact_score, **params)
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 网站地图流式读取
+
+用iterparse逐个元素解析sitemap.xml，解析完的元素立即释放，
+5万条URL的网站地图也不会整体驻留内存。支持：
+1. 嵌套的sitemap索引（sitemapindex）
+2. .xml.gz 压缩网站地图
+3. 按lastmod只返回上次运行之后变化的页面
+"""
+
+import gzip
+import xml.etree.ElementTree as ET
+from collections import deque
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Iterable, Iterator, Optional, Set
+
+import requests
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+@dataclass
+class SitemapEntry:
+    """网站地图中的一条URL"""
+    loc: str
+    lastmod: Optional[datetime] = None
+
+
+@dataclass
+class SitemapStats:
+    """网站地图读取统计"""
+    sitemaps: int = 0
+    urls: int = 0
+    unchanged: int = 0
+    errors: int = 0
+
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """解析W3C日期时间格式的lastmod，统一转换为UTC时间"""
+    if not value:
+        return None
+    value = value.strip()
+    if value.endswith('Z'):
+        value = value[:-1] + '+00:00'
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.astimezone(timezone.utc)
+
+
+def _local_name(tag: str) -> str:
+    """去掉XML命名空间前缀"""
+    return tag.rsplit('}', 1)[-1]
+
+
+class _PrefixedStream:
+    """把已经读取的文件头补回数据流前面"""
+
+    def __init__(self, head: bytes, raw):
+        self.head = head
+        self.raw = raw
+
+    def read(self, size: int = -1) -> bytes:
+        if not self.head:
+            return self.raw.read(size)
+        if size is None or size < 0:
+            data, self.head = self.head + self.raw.read(), b''
+        else:
+            data, self.head = self.head[:size], self.head[size:]
+        return data
+
+
+class SitemapReader:
+    """流式读取网站地图（包括嵌套索引和gzip压缩）"""
+
+    def __init__(self, session: requests.Session, timeout: int = 10, max_sitemaps: int = 1000):
+        self.session = session
+        self.timeout = timeout
+        self.max_sitemaps = max_sitemaps
+        self.found_url: Optional[str] = None
+        self.stats = SitemapStats()
+
+    def _open(self, url: str):
+        """以流的方式打开网站地图，返回 (响应, 数据流)，自动识别gzip压缩"""
+        response = self.session.get(url, timeout=self.timeout, stream=True)
+        if response.status_code != 200:
+            response.close()
+            return None, None
+
+        # 处理 Content-Encoding，再按文件头识别 .xml.gz
+        response.raw.decode_content = True
+        head = response.raw.read(2)
+        stream = _PrefixedStream(head, response.raw)
+        if head == GZIP_MAGIC:
+            stream = gzip.GzipFile(fileobj=stream)
+        return response, stream
+
+    def _parse(self, stream, since: Optional[datetime], children: deque) -> Iterator[SitemapEntry]:
+        """逐个元素解析网站地图，子网站地图加入children队列"""
+        root = None
+        loc = lastmod = None
+
+        for event, elem in ET.iterparse(stream, events=('start', 'end')):
+            if root is None:
+                root = elem
+                continue
+            if event != 'end':
+                continue
+
+            name = _local_name(elem.tag)
+            if name == 'loc':
+                loc = (elem.text or '').strip()
+            elif name == 'lastmod':
+                lastmod = parse_lastmod(elem.text)
+            elif name in ('url', 'sitemap'):
+                if loc:
+                    if since and lastmod and lastmod <= since:
+                        # 上次运行之后没有变化的页面（或整个子网站地图）直接跳过
+                        self.stats.unchanged += 1
+                    elif name == 'sitemap':
+                        children.append(loc)
+                    else:
+                        self.stats.urls += 1
+                        yield SitemapEntry(loc, lastmod)
+                loc = lastmod = None
+                # 已处理的元素立即释放
+                root.clear()
+
+    def _read(self, url: str, since: Optional[datetime], children: deque) -> Iterator[SitemapEntry]:
+        """读取单个网站地图文件"""
+        try:
+            response, stream = self._open(url)
+        except requests.RequestException:
+            response = None
+        if response is None:
+            self.stats.errors += 1
+            return
+
+        self.stats.sitemaps += 1
+        try:
+            yield from self._parse(stream, since, children)
+        except (ET.ParseError, OSError, EOFError, requests.RequestException):
+            self.stats.errors += 1
+        finally:
+            response.close()
+
+    def find(self, candidates: Iterable[str]) -> Optional[str]:
+        """返回第一个可访问的网站地图URL"""
+        for candidate in candidates:
+            try:
+                response = self.session.get(candidate, timeout=self.timeout, stream=True)
+            except requests.RequestException:
+                continue
+            response.close()
+            if response.status_code == 200:
+                self.found_url = candidate
+                return candidate
+        return None
+
+    def iter_entries(self, sitemap_url: str, since: Optional[datetime] = None) -> Iterator[SitemapEntry]:
+        """从网站地图（或网站地图索引）流式返回页面URL
+
+        since不为空时，跳过lastmod不晚于since的页面和子网站地图。
+        """
+        queue = deque([sitemap_url])
+        seen: Set[str] = set()
+
+        while queue and len(seen) < self.max_sitemaps:
+            url = queue.popleft()
+            if url in seen:
+                continue
+            seen.add(url)
+            yield from self._read(url, since, queue)
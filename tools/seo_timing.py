@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+SEO Agent 分阶段耗时统计
+
+按阶段和主机记录耗时直方图：等待主机并发槽位、首字节时间(TTFB)、下载、解析、
+每项页面检查、robots.txt和网站地图检查，以及每个页面的总耗时。
+关闭时time()返回共享的空上下文，几乎没有开销。
+
+结果可以导出为Prometheus文本格式或JSON，也可以生成最慢页面/最慢检查表格。
+"""
+
+import heapq
+import threading
+import time
+from contextlib import nullcontext
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 直方图桶上限（秒），与Prometheus客户端的默认桶接近
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+_DISABLED = nullcontext()
+
+
+class Histogram:
+    """固定桶的耗时直方图"""
+
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # 最后一个桶为 +Inf
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, seconds: float) -> None:
+        index = 0
+        while index < len(BUCKETS) and seconds > BUCKETS[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.maximum:
+            self.maximum = seconds
+
+    def merge(self, other: 'Histogram') -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total += other.total
+        self.maximum = max(self.maximum, other.maximum)
+
+    @property
+    def average(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> float:
+        """按桶内线性插值估算分位数"""
+        if not self.count:
+            return 0.0
+        target = q * self.count
+        seen = 0
+        lower = 0.0
+        for index, count in enumerate(self.counts):
+            upper = BUCKETS[index] if index < len(BUCKETS) else self.maximum
+            if count and seen + count >= target:
+                return min(self.maximum, lower + (upper - lower) * (target - seen) / count)
+            seen += count
+            lower = upper
+        return self.maximum
+
+
+class _Span:
+    """计时上下文"""
+
+    __slots__ = ('timings', 'phase', 'host', 'started')
+
+    def __init__(self, timings: 'PhaseTimings', phase: str, host: Optional[str]):
+        self.timings = timings
+        self.phase = phase
+        self.host = host
+
+    def __enter__(self) -> '_Span':
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.timings.observe(self.phase, time.perf_counter() - self.started, self.host)
+
+
+class PhaseTimings:
+    """按 (阶段, 主机) 汇总耗时直方图，线程安全"""
+
+    def __init__(self, enabled: bool = False, slowest: int = 10):
+        self.enabled = enabled
+        self.slowest = slowest
+        self.histograms: Dict[Tuple[str, str], Histogram] = {}
+        self._slowest_pages: List[Tuple[float, str]] = []  # 最小堆，保留最慢的页面
+        self._lock = threading.Lock()
+
+    def time(self, phase: str, host: Optional[str] = None):
+        """计时上下文：with timings.time('parse', host): ..."""
+        if not self.enabled:
+            return _DISABLED
+        return _Span(self, phase, host)
+
+    def observe(self, phase: str, seconds: float, host: Optional[str] = None) -> None:
+        if not self.enabled:
+            return
+        key = (phase, host or '')
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    def observe_page(self, url: str, seconds: float, host: Optional[str] = None) -> None:
+        """记录页面总耗时，同时保留最慢的页面"""
+        if not self.enabled:
+            return
+        self.observe('page', seconds, host)
+        self._track_slowest(url, seconds)
+
+    def _track_slowest(self, url: str, seconds: float) -> None:
+        with self._lock:
+            if len(self._slowest_pages) < self.slowest:
+                heapq.heappush(self._slowest_pages, (seconds, url))
+            elif seconds > self._slowest_pages[0][0]:
+                heapq.heapreplace(self._slowest_pages, (seconds, url))
+
+    # 汇总
+
+    def by_phase(self) -> Dict[str, Histogram]:
+        """合并所有主机，按阶段汇总"""
+        phases: Dict[str, Histogram] = {}
+        for (phase, _), histogram in sorted(self.histograms.items()):
+            phases.setdefault(phase, Histogram()).merge(histogram)
+        return phases
+
+    def slowest_pages(self) -> List[Tuple[str, float]]:
+        """最慢的页面 [(URL, 秒)]，从慢到快"""
+        return [(url, seconds) for seconds, url in sorted(self._slowest_pages, reverse=True)]
+
+    def slowest_checks(self, checks: Iterable[str]) -> List[Tuple[str, Histogram]]:
+        """页面检查按平均耗时从慢到快排列"""
+        phases = self.by_phase()
+        found = [(name, phases[name]) for name in checks if name in phases]
+        return sorted(found, key=lambda item: item[1].average, reverse=True)
+
+    def format_tables(self, checks: Iterable[str]) -> List[str]:
+        """Markdown格式的阶段耗时、最慢页面和最慢检查表格"""
+        lines = ["| 阶段 | 次数 | 总耗时(秒) | 平均(ms) | p95(ms) | 最大(ms) |",
+                 "|------|------|-----------|---------|---------|---------|"]
+        for phase, histogram in self.by_phase().items():
+            lines.append(f"| {phase} | {histogram.count} | {histogram.total:.3f} | "
+                         f"{histogram.average * 1000:.2f} | {histogram.quantile(0.95) * 1000:.2f} | "
+                         f"{histogram.maximum * 1000:.2f} |")
+
+        lines += ["", "**最慢的页面**:", "",
+                  "| 页面 | 耗时(ms) |", "|------|---------|"]
+        for url, seconds in self.slowest_pages():
+            lines.append(f"| {url} | {seconds * 1000:.1f} |")
+
+        lines += ["", "**最慢的检查**:", "",
+                  "| 检查 | 次数 | 平均(ms) | p95(ms) | 最大(ms) |", "|------|------|---------|---------|---------|"]
+        for name, histogram in self.slowest_checks(checks):
+            lines.append(f"| {name} | {histogram.count} | {histogram.average * 1000:.3f} | "
+                         f"{histogram.quantile(0.95) * 1000:.3f} | {histogram.maximum * 1000:.3f} |")
+        return lines
+
+    # 导出
+
+    def to_dict(self) -> dict:
+        """可序列化的直方图数据（可以用merge_dict合并多个网站）"""
+        return {
+            'buckets': list(BUCKETS),
+            'phases': [
+                {'phase': phase, 'host': host, 'count': histogram.count,
+                 'sum': round(histogram.total, 6), 'max': round(histogram.maximum, 6),
+                 'counts': histogram.counts}
+                for (phase, host), histogram in sorted(self.histograms.items())
+            ],
+            'slowest_pages': [[url, round(seconds, 6)] for url, seconds in self.slowest_pages()],
+        }
+
+    def merge_dict(self, data: dict) -> None:
+        """合并to_dict导出的数据"""
+        with self._lock:
+            for item in data.get('phases', []):
+                histogram = Histogram()
+                histogram.counts = list(item['counts'])
+                histogram.count = item['count']
+                histogram.total = item['sum']
+                histogram.maximum = item['max']
+                self.histograms.setdefault((item['phase'], item['host']), Histogram()).merge(histogram)
+        # 直方图已经包含这些页面，只更新最慢页面列表
+        for url, seconds in data.get('slowest_pages', []):
+            self._track_slowest(url, seconds)
+
+    def to_prometheus(self, name: str = 'seo_agent_phase_duration_seconds') -> str:
+        """Prometheus文本格式"""
+        lines = [f"# HELP {name} Time spent in each analysis phase.",
+                 f"# TYPE {name} histogram"]
+        for (phase, host), histogram in sorted(self.histograms.items()):
+            labels = f'phase="{_escape_label(phase)}",host="{_escape_label(host)}"'
+            cumulative = 0
+            for index, count in enumerate(histogram.counts):
+                cumulative += count
+                bound = repr(BUCKETS[index]) if index < len(BUCKETS) else '+Inf'
+                lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+            lines.append(f'{name}_sum{{{labels}}} {histogram.total:.6f}')
+            lines.append(f'{name}_count{{{labels}}} {histogram.count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -0,0 +1,6 @@
+"""测试配置：工具模块位于tests的上一级目录（不是包），加入导入路径"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
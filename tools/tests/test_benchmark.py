@@ -0,0 +1,18 @@
+"""基准测试与基线比较"""
+
+import json
+
+import seo_benchmark
+
+
+def test_json_output_with_baseline_is_a_single_document(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    args = ['--json', 'run', '--pages', '10', '-s', 'parse', '--parser', 'html.parser', '--page-sample', '3']
+    assert seo_benchmark.main(args + ['--save-baseline', str(baseline)]) == 0
+    capsys.readouterr()
+
+    assert seo_benchmark.main(args + ['--baseline', str(baseline), '--tolerance', '100']) == 0
+    captured = capsys.readouterr()
+    report = json.loads(captured.out)
+    assert report['regressions'] == []
+    assert '与基线比较' in captured.err
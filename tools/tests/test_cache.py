@@ -0,0 +1,27 @@
+"""网站运行时间记录"""
+
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+from seo_cache import RunState
+
+STARTED = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def mark_sites(cache_dir: str, worker: int) -> None:
+    state = RunState(cache_dir)
+    for index in range(20):
+        state.mark_run(f'https://site{worker}-{index}.example.com', STARTED)
+    state.close()
+
+
+def test_concurrent_processes_keep_every_site(tmp_path):
+    with ProcessPoolExecutor(max_workers=4) as executor:
+        list(executor.map(mark_sites, [str(tmp_path)] * 4, range(4)))
+
+    state = RunState(str(tmp_path))
+    for worker in range(4):
+        for index in range(20):
+            assert state.last_run(f'https://site{worker}-{index}.example.com') == STARTED
+    assert state.last_run('https://unknown.example.com') is None
+    state.close()
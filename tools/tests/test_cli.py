@@ -0,0 +1,51 @@
+"""批量模式的退出码"""
+
+import json
+import os
+
+import pytest
+
+from seo_cli import EXIT_ALL_FAILED, main
+
+
+@pytest.mark.parametrize('options, failed_pages', [([], 1), (['--crawl'], 0), (['--crawl', '--ignore-robots'], 1)])
+def test_unreachable_site_counts_as_failed(tmp_path, options, failed_pages):
+    output = os.path.join(tmp_path, 'results.json')
+    # 端口9（discard）上没有服务，连接被拒绝；爬取模式下robots.txt无法访问，首页也不会请求
+    code = main(['http://127.0.0.1:9/', '--no-cache', '--retries', '0', '-q', '-o', output, *options])
+    assert code == EXIT_ALL_FAILED
+    with open(output, encoding='utf-8') as f:
+        [result] = json.load(f)
+    assert result['error']
+    assert result['stats']['failed_pages'] == failed_pages
+
+
+def write_site_dir(root) -> None:
+    os.makedirs(os.path.join(root, 'blog'))
+    pages = {'index.html': '<html><head><title>Home</title></head><body><h1>A</h1><h1>B</h1>'
+                           '<img src="/a.png"></body></html>',
+             'blog/index.html': '<html><head><title>Blog</title></head><body><p>blog</p></body></html>'}
+    for name, html in pages.items():
+        with open(os.path.join(root, name), 'w', encoding='utf-8') as f:
+            f.write(html)
+
+
+def test_results_are_streamed_in_both_formats(tmp_path):
+    site_dir = os.path.join(tmp_path, 'dist')
+    write_site_dir(site_dir)
+    results = {}
+    for fmt in ('json', 'jsonl'):
+        output = os.path.join(tmp_path, f'results.{fmt}')
+        main(['https://example.com', '--local-dir', site_dir, '--crawl', '--no-cache', '-q', '-f', fmt, '-o', output])
+        with open(output, encoding='utf-8') as f:
+            results[fmt] = json.load(f) if fmt == 'json' else [json.loads(line) for line in f]
+
+    [document] = results['json']
+    rows = results['jsonl']
+    issues = [row for row in rows if row['type'] == 'issue']
+    assert rows[-1]['type'] == 'site' and rows[-1]['issue_count'] == len(issues) == len(document['issues'])
+    assert [{**row, 'type': None, 'site': None} for row in issues] == \
+        [{'type': None, 'site': None, **issue} for issue in document['issues']]
+    assert len([row for row in rows if row['type'] == 'metric']) == len(document['metrics'])
+    assert {issue['page_url'] for issue in document['issues']} >= {'https://example.com'}
+    assert document['stats']['pages'] == 2 and 'error' not in document
@@ -0,0 +1,84 @@
+"""页面正文的流式读取和并发抓取引擎"""
+
+import threading
+
+from seo_crawler import CrawlEngine, Frontier, PageDownloader, limit_body
+
+PAGE = b'<html><head><title>T</title></head><body>' + b'x' * 10000 + b'</body></html>'
+
+
+class FakeRaw:
+    def tell(self):
+        return 0
+
+
+class FakeResponse:
+    def __init__(self, body: bytes, chunk: int):
+        self.headers = {'Content-Length': str(len(body))}
+        self.raw = FakeRaw()
+        self._chunks = [body[start:start + chunk] for start in range(0, len(body), chunk)]
+
+    def iter_content(self, size):
+        yield from self._chunks
+
+
+def test_stops_after_head_split_across_chunks():
+    end = PAGE.index(b'</head>') + len(b'</head>')
+    for chunk in (1, 3, 7, 33, 4096):
+        downloader = PageDownloader(stop_at_head=True)
+        body, complete = downloader.read(FakeResponse(PAGE, chunk))
+        assert body == PAGE[:end] and not complete, chunk
+    assert downloader.stats.head_only == 1
+    assert limit_body(PAGE, stop_at_head=True) == (PAGE[:end], 'head')
+
+
+def test_truncates_at_max_bytes():
+    downloader = PageDownloader(max_bytes=1000)
+    body, complete = downloader.read(FakeResponse(PAGE, 300))
+    assert body == PAGE[:1000] and not complete
+    assert downloader.stats.truncated == 1
+    assert downloader.stats.bytes_skipped == len(PAGE) - 1200
+
+
+def test_reads_complete_body():
+    body, complete = PageDownloader(max_bytes=None).read(FakeResponse(PAGE, 4096))
+    assert body == PAGE and complete
+
+
+def test_ordered_run_bounds_results_waiting_behind_slow_task():
+    release = threading.Event()
+    pulled = []
+
+    def urls():
+        for index in range(100):
+            pulled.append(index)
+            yield str(index)
+
+    def worker(url):
+        if url == '0':
+            release.wait(5)
+        return int(url)
+
+    threading.Timer(0.3, release.set).start()
+    engine = CrawlEngine(max_workers=2)
+    results = engine.run(urls(), worker)
+    assert next(results) == ('0', 0)
+    assert len(pulled) <= 2 * 2  # 慢任务完成前最多读取一个窗口
+    assert [value for _, value in results] == list(range(1, 100))
+
+
+def test_frontier_reads_seeds_on_demand_before_links():
+    pulled = []
+
+    def seeds():
+        for path in ['/', '/a', '/a', 'https://other.example.com/', '/b', '/c']:
+            pulled.append(path)
+            yield path if path.startswith('http') else 'https://example.com' + path
+
+    frontier = Frontier('https://example.com', seeds=seeds())
+    assert next(frontier) == 'https://example.com/'
+    assert pulled == ['/']
+    frontier.add_links(['https://example.com/x', 'https://example.com/b'], 'https://example.com/')
+    assert list(frontier) == ['https://example.com/a', 'https://example.com/c',
+                              'https://example.com/x', 'https://example.com/b']
+    assert frontier.stats.deduplicated == 2 and frontier.stats.out_of_scope == 1
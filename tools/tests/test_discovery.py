@@ -0,0 +1,55 @@
+"""常见页面探测：软404和总时间限制"""
+
+import time
+from datetime import timedelta
+
+from seo_discovery import PageDiscovery
+
+
+class FakeResponse:
+    def __init__(self, url: str, status: int, body: bytes):
+        self.url = url
+        self.status_code = status
+        self.headers = {}
+        self.elapsed = timedelta(milliseconds=1)
+        self._body = body
+
+    def iter_content(self, size):
+        yield self._body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """/about 和 /blog 存在，其他路径返回与首页不同的“页面不存在”页面（软404）"""
+    pages = {'/about': b'<title>About</title>' + b'a' * 500, '/blog': b'<title>Blog</title>' + b'b' * 800}
+    delays = {'/blog': 0.05}
+
+    def get(self, url, **kwargs):
+        path = url.split('example.com', 1)[1]
+        time.sleep(self.delays.get(path, 0))
+        body = self.pages.get(path, b'<title>Not found</title>' + b'x' * 300)
+        return FakeResponse(url, 200, body)
+
+
+def test_soft_404_responses_are_not_reported():
+    discovery = PageDiscovery(FakeSession(), 'http://example.com', deadline=5)
+    found = sorted(discovery.iter_found(['/about', '/blog', '/missing', '/gone']))
+    assert found == ['http://example.com/about', 'http://example.com/blog']
+    assert discovery.stats.soft_404 == 2
+    assert discovery.stats.timed_out == 0
+
+
+def test_pages_finished_before_the_deadline_survive_a_slow_consumer():
+    discovery = PageDiscovery(FakeSession(), 'http://example.com', deadline=0.2)
+    found = []
+    for url in discovery.iter_found(['/about', '/blog', '/missing']):
+        found.append(url)
+        # 调用方处理第一个页面时总时间到期，/blog 在此期间完成，仍然返回
+        time.sleep(0.3)
+    assert sorted(found) == ['http://example.com/about', 'http://example.com/blog']
+    assert discovery.stats.timed_out == 0
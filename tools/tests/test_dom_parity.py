@@ -0,0 +1,64 @@
+"""各解析器后端对同一组页面给出相同的检查结果"""
+
+import os
+from dataclasses import asdict
+
+import pytest
+
+from claude_seo_agent import SEOOptimizerAgent
+from seo_catalog import ISSUE_CATALOG
+from seo_dom import HtmlParserBackend, ParserBackend, available_backends, build_page_index, get_backend
+
+PAGES_DIR = os.path.join(os.path.dirname(__file__), 'fixtures', 'pages')
+PAGES = sorted(name for name in os.listdir(PAGES_DIR) if name.endswith('.html'))
+BACKENDS = available_backends()
+
+
+def read_page(name: str) -> bytes:
+    with open(os.path.join(PAGES_DIR, name), 'rb') as f:
+        return f.read()
+
+
+def rendered_issues(backend: str, name: str) -> list:
+    """用指定后端解析并检查页面，返回渲染后的问题和指标"""
+    agent = SEOOptimizerAgent('http://example.com', parser_backend=backend, cache_dir=None,
+                              verbose=False, find_duplicates=True)
+    url = f'http://example.com/{name}'
+    page = agent.parse_page(read_page(name), None)
+    result = agent.check_page(url, page)
+    return [asdict(ISSUE_CATALOG.render(record, url)) for record in result.issues] + \
+        [asdict(metric) for metric in result.metrics]
+
+
+@pytest.mark.skipif(len(BACKENDS) < 2, reason="只安装了一个解析器后端")
+@pytest.mark.parametrize('name', PAGES)
+def test_backends_report_identical_issues(name):
+    expected = rendered_issues(BACKENDS[-1], name)
+    for backend in BACKENDS[:-1]:
+        assert rendered_issues(backend, name) == expected, backend
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_template_content_is_not_part_of_the_document(backend):
+    index = build_page_index(read_page('template_script.html').decode('utf-8'), get_backend(backend))
+    assert index.headings == [(1, 'A')]
+    assert index.images == []
+    assert index.links == []
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_body_text_excludes_script_and_style(backend):
+    index = build_page_index(read_page('template_script.html').decode('utf-8'), get_backend(backend))
+    text = ''.join(index.body_text.split())
+    assert text == 'Ahello请启用JavaScript'
+
+
+def test_incomplete_backend_cannot_be_created():
+    class NoVisibleText(ParserBackend):
+        parse = HtmlParserBackend.parse
+        elements = HtmlParserBackend.elements
+        attr = HtmlParserBackend.attr
+        text = HtmlParserBackend.text
+
+    with pytest.raises(TypeError):
+        NoVisibleText()
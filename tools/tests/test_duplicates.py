@@ -0,0 +1,74 @@
+"""SimHash指纹和重复页面分组（LSH分段）"""
+
+import random
+
+import pytest
+
+from seo_dom import available_backends, build_page_index, get_backend
+from seo_duplicates import (MIN_CONTENT_TOKENS, NEAR_DUPLICATE_DISTANCE, DuplicateDetector,
+                            PageFingerprint, simhash, text_hash)
+
+
+def words(seed: int, count: int = 300) -> list:
+    rng = random.Random(seed)
+    return [f"w{rng.randrange(5000)}" for _ in range(count)]
+
+
+def distance(first: int, second: int) -> int:
+    return bin(first ^ second).count('1')
+
+
+def test_text_hash_ignores_case_and_whitespace():
+    assert text_hash('  Hello\n World ') == text_hash('hello world')
+    assert text_hash('hello world') != text_hash('hello there')
+    assert text_hash(None) == text_hash('   ') == 0
+
+
+def test_simhash_needs_enough_tokens():
+    assert simhash(' '.join(words(1, MIN_CONTENT_TOKENS - 1))) == 0
+    assert simhash(' '.join(words(1, MIN_CONTENT_TOKENS))) != 0
+
+
+def test_simhash_of_nearly_identical_text_is_close():
+    text = words(1)
+    edited = list(text)
+    edited[150] = 'changed'
+    assert distance(simhash(' '.join(text)), simhash(' '.join(edited))) <= NEAR_DUPLICATE_DISTANCE
+    assert distance(simhash(' '.join(text)), simhash(' '.join(words(2)))) > NEAR_DUPLICATE_DISTANCE
+
+
+def test_simhash_counts_each_cjk_character_as_a_token():
+    text = ''.join(chr(0x4e00 + (index * 7919) % 20000) for index in range(200))
+    assert simhash(text) != 0
+    assert simhash(text) == simhash(' '.join(text))
+
+
+def test_exact_and_near_duplicate_groups():
+    detector = DuplicateDetector()
+    base = words(1)
+    pages = []
+    for page_id in range(40):
+        text = words(100 + page_id)
+        if page_id in (3, 17, 29):
+            text = list(base)
+            text[page_id] = f'edit{page_id}'
+        title = 'Same title' if page_id in (5, 6) else f'Title {page_id}'
+        pages.append(PageFingerprint(text_hash(title), 0, simhash(' '.join(text))))
+    for page_id, fingerprint in enumerate(pages):
+        detector.add(page_id, fingerprint)
+
+    groups = list(detector.groups())
+    assert ('title', [5, 6]) in groups
+    assert ('content', [3, 17, 29]) in groups
+    assert [kind for kind, _ in groups].count('content') == 1
+    assert detector.stats.description_groups == 0
+    # LSH分段只比较落在同一分组的页面，远少于两两比较
+    assert detector.stats.comparisons < 40 * 39 // 2
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_body_text_separates_text_nodes(backend):
+    html = '<html><body><ul><li>alpha</li><li>beta</li></ul><p>gamma<b>delta</b></p></body></html>'
+    index = build_page_index(html, get_backend(backend))
+    assert index.body_text.split() == ['alpha', 'beta', 'gamma', 'delta']
+    assert build_page_index(html, get_backend(backend), body_text=False).body_text == ''
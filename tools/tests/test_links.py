@@ -0,0 +1,66 @@
+"""链接验证：HEAD不可用时的GET回退"""
+
+from datetime import timedelta
+
+from seo_links import LinkChecker
+
+
+class FakeResponse:
+    def __init__(self, url: str, status: int):
+        self.url = url
+        self.status_code = status
+        self.headers = {}
+        self.history = []
+        self.elapsed = timedelta(milliseconds=1)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class FakeSession:
+    """不支持HEAD；/empty 的正文为空，带Range的请求返回416"""
+
+    def __init__(self):
+        self.requests = []
+
+    def head(self, url, **kwargs):
+        self.requests.append(('HEAD', url, None))
+        return FakeResponse(url, 405)
+
+    def get(self, url, headers=None, **kwargs):
+        ranged = bool(headers and 'Range' in headers)
+        self.requests.append(('GET', url, ranged))
+        if url.endswith('/missing'):
+            return FakeResponse(url, 404)
+        if url.endswith('/empty') and ranged:
+            return FakeResponse(url, 416)
+        return FakeResponse(url, 206 if ranged else 200)
+
+
+def verify(url: str):
+    session = FakeSession()
+    checker = LinkChecker(session, max_workers=1)
+    checker.add_page('https://example.com/', [url])
+    (result, referrers), = checker.results()
+    checker.close()
+    return result, session.requests
+
+
+def test_range_not_satisfiable_retries_without_range():
+    result, requests = verify('https://example.com/empty')
+    assert result.status == 200 and not result.broken
+    assert requests == [('HEAD', 'https://example.com/empty', None),
+                        ('GET', 'https://example.com/empty', True),
+                        ('GET', 'https://example.com/empty', False)]
+
+
+def test_get_fallback_uses_a_single_ranged_request():
+    result, requests = verify('https://example.com/page')
+    assert result.status == 206 and not result.broken
+    assert len(requests) == 2
+
+    result, _ = verify('https://example.com/missing')
+    assert result.broken
@@ -0,0 +1,56 @@
+"""报告文件名和流式报告写入"""
+
+import csv
+import json
+import os
+
+import pytest
+
+from seo_issues import SEOIssue
+from seo_report import WRITERS, Report, ReportSection, ReportWriter, report_filename, write_report
+
+
+def issues(count: int):
+    for index in range(count):
+        yield SEOIssue('技术SEO', 'high', f'问题{index}', '描述 <b>', '建议', '<meta name="x">', 5.0,
+                       f'https://example.com/p{index}')
+
+
+def make_report(count: int) -> Report:
+    return Report(site='https://example.com', analyzed_at='2026-01-01T00:00:00', highest_severity='high',
+                  sections=[ReportSection('概览', ['- 页面数: 3', '| 指标 | 值 |', '|---|---|', '| a | 1 |'])],
+                  issues=issues(count), categories=['技术SEO'], stats={'pages': 3})
+
+
+def test_report_filenames_are_unique_per_site():
+    sites = ['https://example.com', 'http://example.com', 'https://example.com/blog',
+             'https://example.com/blog/', 'https://example.com:8443', 'https://example.com_8443']
+    names = {report_filename(site, 'html') for site in sites}
+    assert len(names) == len(sites) - 1  # 结尾的 / 不区分
+    assert all(name.startswith('example.com') and name.endswith('.html') for name in names)
+    assert report_filename('https://example.com', 'markdown').endswith('.md')
+
+
+def test_writer_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        ReportWriter(None)
+
+
+@pytest.mark.parametrize('fmt', sorted(WRITERS))
+def test_writers_stream_every_issue(fmt, tmp_path):
+    filename = os.path.join(tmp_path, report_filename('https://example.com', fmt))
+    assert write_report(filename, make_report(2500), fmt) == 2500
+    with open(filename, encoding='utf-8', newline='') as f:
+        if fmt == 'json':
+            data = json.load(f)
+            assert data['stats'] == {'pages': 3} and len(data['issues']) == 2500
+            assert data['issues'][-1]['title'] == '问题2499'
+        elif fmt == 'csv':
+            rows = list(csv.reader(f))
+            assert len(rows) == 2501 and rows[-1][0] == '2500'
+        else:
+            text = f.read()
+            assert '问题2499' in text
+            if fmt == 'html':
+                # 问题文本经过转义；概览一个表格，问题分三批写成三个表格
+                assert '描述 &lt;b&gt;' in text and text.count('<table>') == 4
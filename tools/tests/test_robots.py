@@ -0,0 +1,100 @@
+"""robots.txt解析和匹配（RFC 9309）"""
+
+from seo_robots import RobotsCache, parse_robots_txt, split_url
+
+ROBOTS = """
+User-agent: *
+Disallow: /private/
+Allow: /private/public
+Crawl-delay: 2
+
+# 只适用于名为claude的爬虫，不适用于claude-seo-agent
+User-agent: claude
+Disallow: /
+
+User-agent: Claude-SEO-Agent/1.0
+Disallow: /admin
+Allow: /admin/help$
+Disallow: /*.pdf$
+Disallow: /search*q=
+
+user-agent: claude-seo-agent
+Crawl-delay: 0.5
+Disallow: /tmp
+
+Sitemap: https://example.com/custom-sitemap.xml
+"""
+
+
+def matcher(user_agent='claude-seo-agent', text=ROBOTS):
+    return parse_robots_txt(text).matcher(user_agent)
+
+
+def test_user_agent_is_compared_for_equality_not_prefix():
+    robots = parse_robots_txt(ROBOTS)
+    group = robots.group_for('claude-seo-agent')
+    # 两个同名组合并，"claude" 组（Disallow: /）不适用
+    assert [str(rule) for rule in group.rules] == [
+        'Disallow: /admin (第12行)', 'Allow: /admin/help$ (第13行)',
+        'Disallow: /*.pdf$ (第14行)', 'Disallow: /search*q= (第15行)', 'Disallow: /tmp (第19行)']
+    assert group.crawl_delay == 0.5
+    assert [rule.pattern for rule in robots.group_for('CLAUDE').rules] == ['/']
+    assert robots.group_for('claude-seo').agents == ['*']
+    assert robots.sitemaps == ['https://example.com/custom-sitemap.xml']
+
+
+def test_longest_match_wins_and_allow_wins_ties():
+    star = matcher('otherbot')
+    assert not star.allowed('https://example.com/private/x')
+    assert star.allowed('https://example.com/private/public/page')
+    assert star.allowed('https://example.com/')
+    tie = matcher(text="User-agent: *\nDisallow: /page\nAllow: /page\n")
+    assert tie.allowed('https://example.com/page')
+
+
+def test_wildcards_and_end_anchor():
+    rules = matcher()
+    assert not rules.allowed('https://example.com/files/report.pdf')
+    assert rules.allowed('https://example.com/files/report.pdf?download=1')
+    assert not rules.allowed('https://example.com/search?page=2&q=seo')
+    assert rules.allowed('https://example.com/search?page=2')
+    assert rules.allowed('https://example.com/admin/help')
+    assert not rules.allowed('https://example.com/admin/help/more')
+    assert not rules.allowed('https://example.com/tmp/file')
+    assert rules.allowed('https://example.com/private/x')
+
+
+def test_non_ascii_rules_match_percent_encoded_urls():
+    rules = matcher(text="User-agent: *\nDisallow: /产品\n")
+    assert not rules.allowed('https://example.com/%E4%BA%A7%E5%93%81/1')
+    assert rules.allowed('https://example.com/about')
+
+
+def test_split_url():
+    assert split_url('HTTPS://Example.com:8080/a/b?x=1#top') == ('https://example.com:8080', '/a/b?x=1')
+    assert split_url('https://example.com?x=1') == ('https://example.com', '/?x=1')
+    assert split_url('https://example.com') == ('https://example.com', '/')
+
+
+def test_cache_fetches_each_host_once_and_counts_blocking_rules():
+    fetched = []
+
+    def fetch(url):
+        fetched.append(url)
+        if url.startswith('https://down.example'):
+            raise OSError('connection refused')
+        if url.startswith('https://none.example'):
+            return None
+        return ROBOTS
+
+    cache = RobotsCache(fetch)
+    assert str(cache.check('https://example.com/tmp/a')) == 'Disallow: /tmp (第19行)'
+    assert cache.check('https://example.com/tmp/b') is not None
+    assert cache.check('https://example.com/ok') is None
+    # robots.txt不存在时允许全部，无法访问时禁止全部
+    assert cache.check('https://none.example/anything') is None
+    assert str(cache.check('https://down.example/anything')) == 'Disallow: /'
+    assert fetched == ['https://example.com/robots.txt', 'https://none.example/robots.txt',
+                       'https://down.example/robots.txt']
+    assert cache.stats.checked == 5 and cache.stats.blocked == 3
+    assert cache.blocked_rules()[0] == {'host': 'example.com', 'rule': 'Disallow: /tmp (第19行)', 'blocked': 2}
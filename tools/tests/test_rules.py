@@ -0,0 +1,98 @@
+"""规则引擎：受限表达式、选择器解析和规则计算"""
+
+import pytest
+
+from seo_dom import available_backends, build_page_index, get_backend
+from seo_issues import IssueCatalog, IssueType, SEOIssue
+from seo_rules import _GLOBALS, Rule, RuleError, RuleSet, compile_expression, parse_selector
+
+
+def evaluate(source: str, **env):
+    code, _ = compile_expression(source)
+    return eval(code, _GLOBALS, env)
+
+
+@pytest.mark.parametrize('source', [
+    "().__class__",
+    "count.real",
+    "first.__class__.__mro__",
+    "values.append(1)",
+    "open('/etc/passwd')",
+    "__import__('os')",
+    "getattr(first, 'strip')",
+    "(lambda: 1)()",
+    "[v for v in values]",
+    "first.format(1)",
+    "sorted(values, key=len)",
+    "unknown_name > 1",
+    "count =",
+])
+def test_expression_sandbox_rejects(source):
+    with pytest.raises(RuleError):
+        compile_expression(source)
+
+
+def test_expression_allows_functions_and_string_methods():
+    env = {'total': 3, 'count': 2, 'values': [' A ', 'b'], 'first': ' A ', 'url': 'https://example.com/',
+           'base_url': 'https://example.com'}
+    assert evaluate("count > 1 and first.strip().lower() == 'a'", **env)
+    assert evaluate("missing(['a', 'b', 'c'], values[1:])", **env) == ['a', 'c']
+    assert evaluate("url.startswith(base_url) and len(values) == total - 1", **env)
+    _, used = compile_expression("count + len(values)")
+    assert used == {'count', 'values'}
+
+
+def test_element_expressions_read_attributes():
+    code, used = compile_expression("attr('LOADING') != 'lazy' and text", element=True)
+    assert used == {'@loading', 'text'}
+    with pytest.raises(RuleError):
+        compile_expression("attr(name)", element=True)
+    with pytest.raises(RuleError):
+        compile_expression("unknown", names={'count'})
+
+
+def test_parse_selector():
+    assert parse_selector('img') == [('img', ())]
+    assert parse_selector('META[name=description]') == [('meta', (('name', '=', 'description'),))]
+    assert parse_selector('link[rel~=stylesheet][href], h1 , h2') == [
+        ('link', (('rel', '~=', 'stylesheet'), ('href', '', ''))), ('h1', ()), ('h2', ())]
+    assert parse_selector('a[href^="https://"][href$=\'.pdf\'][class*=btn]') == [
+        ('a', (('href', '^=', 'https://'), ('href', '$=', '.pdf'), ('class', '*=', 'btn')))]
+
+
+@pytest.mark.parametrize('selector', ['', 'div p', 'a > b', '[href]', 'a[href', 'a[href]x', '#id', 'a:hover'])
+def test_parse_selector_rejects(selector):
+    with pytest.raises(RuleError):
+        parse_selector(selector)
+
+
+@pytest.mark.parametrize('backend', available_backends())
+def test_rule_evaluation(backend):
+    catalog = IssueCatalog([IssueType('external_pdf', '内容结构', 'low', '外部PDF链接', '页面链接了 {count} 个PDF: {urls}',
+                                      '改为HTML页面', 1.0)])
+    rules = RuleSet([
+        Rule(select='a[href$=".pdf"]', key='external_pdf', value="attr('href')",
+             params={'urls': "', '.join(values)"}),
+        Rule(select='img', metric='缺少alt的图片', where="not attr('alt')", current='count', good='current == 0'),
+    ], catalog)
+    html = ('<html><body><a href="/a.pdf">A</a><a href="/b.html">B</a><a href="/c.pdf">C</a>'
+            '<img src="/1.png" alt="x"><img src="/2.png"></body></html>')
+    page = build_page_index(html, get_backend(backend), rules.plan)
+    issues, metrics = [], []
+    rules.evaluate(page.matches, 'https://example.com/', issues, metrics)
+    assert [catalog.render(record).description for record in issues] == ['页面链接了 2 个PDF: /a.pdf, /c.pdf']
+    assert [(metric.name, metric.current_value, metric.status) for metric in metrics] == [('缺少alt的图片', 1, 'warning')]
+
+
+def test_catalog_digest_tracks_default_severity_and_impact():
+    def catalog(severity='high', impact_score=5.0):
+        return IssueCatalog([IssueType('k', '技术SEO', severity, '标题', '描述', '建议', impact_score)])
+
+    base = catalog()
+    assert base.digest == catalog().digest
+    assert base.digest != catalog(severity='medium').digest
+    assert base.digest != catalog(impact_score=6.0).digest
+
+    digest = base.digest
+    base.adopt(SEOIssue('技术SEO', 'low', '临时问题', '描述', '建议'))
+    assert base.digest == digest  # 临时类型不影响缓存的结果
@@ -0,0 +1,95 @@
+"""网站地图的流式读取"""
+
+import gzip
+import io
+from datetime import datetime, timezone
+
+from seo_sitemap import SitemapReader, parse_lastmod
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def urlset(*entries) -> bytes:
+    items = ''.join(f'<url><loc>{loc}</loc>' + (f'<lastmod>{lastmod}</lastmod>' if lastmod else '') + '</url>'
+                    for loc, lastmod in entries)
+    return f'<?xml version="1.0" encoding="UTF-8"?><urlset {NS}>{items}</urlset>'.encode()
+
+
+class CountingStream(io.BytesIO):
+    """记录已经读取的字节数"""
+    decode_content = False
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.consumed = self.tell()
+        return data
+
+
+class FakeResponse:
+    def __init__(self, status: int, body: bytes):
+        self.status_code = status
+        self.raw = CountingStream(body)
+
+    def close(self):
+        pass
+
+
+class FakeSession:
+    def __init__(self, files: dict):
+        self.files = files
+        self.requested = []
+        self.responses = []
+
+    def get(self, url, **kwargs):
+        self.requested.append(url)
+        response = FakeResponse(200, self.files[url]) if url in self.files else FakeResponse(404, b'')
+        self.responses.append(response)
+        return response
+
+
+def test_parse_lastmod():
+    assert parse_lastmod('2024-05-01') == datetime(2024, 5, 1, tzinfo=timezone.utc)
+    assert parse_lastmod('2024-05-01T10:00:00+02:00') == datetime(2024, 5, 1, 8, tzinfo=timezone.utc)
+    assert parse_lastmod('2024-05-01T10:00:00Z') == datetime(2024, 5, 1, 10, tzinfo=timezone.utc)
+    assert parse_lastmod('yesterday') is None and parse_lastmod(None) is None
+
+
+def test_nested_index_gzip_and_incremental_filter():
+    index = (f'<sitemapindex {NS}>'
+             '<sitemap><loc>https://example.com/a.xml.gz</loc><lastmod>2024-06-01</lastmod></sitemap>'
+             '<sitemap><loc>https://example.com/old.xml</loc><lastmod>2023-01-01</lastmod></sitemap>'
+             '<sitemap><loc>https://example.com/missing.xml</loc></sitemap>'
+             '</sitemapindex>').encode()
+    session = FakeSession({
+        'https://example.com/sitemap.xml': index,
+        'https://example.com/a.xml.gz': gzip.compress(urlset(
+            ('https://example.com/new', '2024-06-01'), ('https://example.com/stale', '2024-01-01'),
+            ('https://example.com/undated', None))),
+        'https://example.com/old.xml': urlset(('https://example.com/never-read', None)),
+    })
+    reader = SitemapReader(session)
+    since = datetime(2024, 3, 1, tzinfo=timezone.utc)
+    locs = [entry.loc for entry in reader.iter_entries('https://example.com/sitemap.xml', since)]
+    assert locs == ['https://example.com/new', 'https://example.com/undated']
+    assert 'https://example.com/old.xml' not in session.requested
+    assert (reader.stats.sitemaps, reader.stats.urls, reader.stats.unchanged, reader.stats.errors) == (2, 2, 2, 1)
+
+
+def test_entries_are_yielded_while_the_file_is_still_being_read():
+    body = urlset(*((f'https://example.com/page/{number}', None) for number in range(50000)))
+    session = FakeSession({'https://example.com/sitemap.xml': body})
+    entries = SitemapReader(session).iter_entries('https://example.com/sitemap.xml')
+    assert next(entries).loc == 'https://example.com/page/0'
+    # 第一条URL返回时只读取了文件的开头
+    assert session.responses[-1].raw.consumed < len(body) / 10
+    assert sum(1 for _ in entries) == 49999
+
+
+def test_malformed_sitemap_keeps_entries_before_the_error():
+    # 文件在第三条URL中间中断
+    body = urlset(('https://example.com/1', None), ('https://example.com/2', None))[:-len('</urlset>')] + \
+        b'<url><loc>https://example.com/3</lo'
+    reader = SitemapReader(FakeSession({'https://example.com/sitemap.xml': body}))
+    assert [entry.loc for entry in reader.iter_entries('https://example.com/sitemap.xml')] == \
+        ['https://example.com/1', 'https://example.com/2']
+    assert reader.stats.errors == 1